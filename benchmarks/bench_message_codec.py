@@ -0,0 +1,82 @@
+"""Conversation 항목 content 압축의 WCU/RCU 절감과 코덱 CPU 비용을 측정합니다.
+
+    python benchmarks/bench_message_codec.py
+"""
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from message_codec import encode_content, decode_content  # noqa: E402
+
+WORDS_EN = (
+    "the assistant can help you recycle plastic bottles glass paper and aluminium cans "
+    "please rinse containers before sorting them into the correct bin carbon emissions "
+    "reduce reuse energy water community challenge points reward mission daily weekly"
+).split()
+WORDS_KO = "재활용 플라스틱 분리배출 탄소 배출 절감 챌린지 포인트 미션 환경 보호 에너지 물 사용량 지역 사회".split()
+
+# 실제 답변 길이 분포를 반영한 content 크기(바이트)
+MESSAGE_SIZES = [200, 800, 2000, 6000, 16000, 48000]
+
+
+def make_message(size, words, rng):
+    lines = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.15:
+            line = f"{len(lines) + 1}. " + " ".join(rng.choices(words, k=rng.randint(4, 12)))
+        else:
+            line = " ".join(rng.choices(words, k=rng.randint(8, 24))) + "."
+        lines.append(line)
+        length += len(line.encode('utf-8')) + 1
+    return "\n".join(lines)
+
+
+def item_size(attributes):
+    """DynamoDB 항목 크기: 속성 이름 길이 + 값 길이"""
+    base = {
+        'thread_id': 'thread_' + 'x' * 24,
+        'message_id': 'msg_' + 'x' * 24,
+        'role': 'assistant',
+        'created_at': 1700000000,
+        'assistant_id': 'asst_' + 'x' * 24,
+    }
+    size = 0
+    for name, value in {**base, **attributes}.items():
+        size += len(name.encode('utf-8'))
+        if isinstance(value, int):
+            size += 8
+        elif isinstance(value, bytes):
+            size += len(value)
+        else:
+            size += len(value.encode('utf-8'))
+    return size
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'lang':<4} {'content':>8} {'item':>8} {'stored':>8} {'WCU':>7} {'RCU':>7} {'encode':>10} {'decode':>10}")
+    for label, words in (('en', WORDS_EN), ('ko', WORDS_KO)):
+        for size in MESSAGE_SIZES:
+            content = make_message(size, words, rng)
+            plain = item_size({'content': content})
+            attributes = encode_content(content)
+            stored = item_size(attributes)
+            assert decode_content(attributes) == content
+
+            number = max(1, 20000 // (size // 100 + 1))
+            encode_us = timeit.timeit(lambda: encode_content(content), number=number) / number * 1e6
+            decode_us = timeit.timeit(lambda: decode_content(attributes), number=number) / number * 1e6
+
+            wcu = f"{math.ceil(plain / 1024)}->{math.ceil(stored / 1024)}"
+            rcu = f"{math.ceil(plain / 4096)}->{math.ceil(stored / 4096)}"
+            print(f"{label:<4} {len(content.encode('utf-8')):>8} {plain:>8} {stored:>8} {wcu:>7} {rcu:>7} "
+                  f"{encode_us:>8.1f}us {decode_us:>8.1f}us")
+
+
+if __name__ == '__main__':
+    main()
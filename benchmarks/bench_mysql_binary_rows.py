@@ -0,0 +1,101 @@
+"""pymysql 텍스트 프로토콜 행 디코딩과 바이너리 프로토콜(prepared statement) 행 디코딩 처리량을 비교합니다.
+
+숫자 위주의 넓은 결과 집합을 메모리에서 만들어 MySQLResult로 파싱하므로 DB 서버가 필요 없습니다.
+
+    python benchmarks/bench_mysql_binary_rows.py [rows]
+"""
+import datetime
+import struct
+import sys
+import time
+
+from mysql_fixtures import PacketSource, column_definition, lenenc, result_payloads
+
+from pymysql.connections import MySQLResult
+from pymysql.constants import FIELD_TYPE, FLAG
+
+# (컬럼 타입, flags, 바이너리 struct 포맷) — 24개 컬럼
+COLUMNS = (
+    [(FIELD_TYPE.LONGLONG, FLAG.NOT_NULL, 'q')] * 8
+    + [(FIELD_TYPE.LONG, FLAG.NOT_NULL, 'i')] * 6
+    + [(FIELD_TYPE.DOUBLE, FLAG.NOT_NULL, 'd')] * 6
+    + [(FIELD_TYPE.TINY, FLAG.NOT_NULL | FLAG.UNSIGNED, 'B')] * 2
+    + [(FIELD_TYPE.DATETIME, FLAG.NOT_NULL, None)] * 2
+)
+
+
+def make_values(i):
+    base = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    values = []
+    for n, (type_code, _, _) in enumerate(COLUMNS):
+        if type_code == FIELD_TYPE.DOUBLE:
+            values.append((i * 31 + n) / 8.0)
+        elif type_code == FIELD_TYPE.DATETIME:
+            values.append(base + datetime.timedelta(seconds=i * 7 + n))
+        elif type_code == FIELD_TYPE.TINY:
+            values.append((i + n) % 200)
+        elif type_code == FIELD_TYPE.LONG:
+            values.append(i * 1000 + n)
+        else:
+            values.append(i * 1_000_003 + n * 17)
+    return values
+
+
+def text_row(values):
+    out = b''
+    for value in values:
+        if isinstance(value, datetime.datetime):
+            out += lenenc(value.strftime('%Y-%m-%d %H:%M:%S').encode())
+        else:
+            out += lenenc(repr(value).encode())
+    return out
+
+
+def binary_row(values):
+    bitmap_len = (len(values) + 9) // 8
+    out = b'\x00' + bytes(bitmap_len)
+    for value, (_, _, fmt) in zip(values, COLUMNS):
+        if fmt is None:
+            out += struct.pack('<BHBBBBB', 7, value.year, value.month, value.day,
+                               value.hour, value.minute, value.second)
+        else:
+            out += struct.pack('<' + fmt, value)
+    return out
+
+
+def payloads_for(rows):
+    return result_payloads([column_definition(i, t, f) for i, (t, f, _) in enumerate(COLUMNS)], rows)
+
+
+def parse(payloads, binary):
+    result = MySQLResult(PacketSource(payloads), binary)
+    result.read()
+    return result.rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    values = [make_values(i) for i in range(count)]
+    text_payloads = payloads_for([text_row(v) for v in values])
+    binary_payloads = payloads_for([binary_row(v) for v in values])
+
+    expected = [tuple(v) for v in values[:1000]]
+    assert list(parse(payloads_for([text_row(v) for v in values[:1000]]), False)) == expected
+    assert list(parse(payloads_for([binary_row(v) for v in values[:1000]]), True)) == expected
+
+    print(f"{len(COLUMNS)} columns x {count} rows")
+    print(f"{'protocol':<8} {'bytes/row':>10} {'seconds':>9} {'rows/s':>12}")
+    for label, payloads, binary in (('text', text_payloads, False), ('binary', binary_payloads, True)):
+        row_bytes = sum(len(p) for p in payloads[len(COLUMNS) + 2:-1]) / count
+        best = min(_timed(payloads, binary) for _ in range(3))
+        print(f"{label:<8} {row_bytes:>10.1f} {best:>9.3f} {count / best:>12,.0f}")
+
+
+def _timed(payloads, binary):
+    start = time.perf_counter()
+    parse(payloads, binary)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
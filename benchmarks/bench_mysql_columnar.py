@@ -0,0 +1,107 @@
+"""pymysql 결과 집합을 행 튜플로 읽을 때와 컬럼별 배열로 읽을 때의 처리량과 메모리를 비교합니다.
+
+결과 집합을 메모리에서 만들어 MySQLResult로 파싱하므로 DB 서버가 필요 없습니다.
+
+- rows: MySQLResult.read()로 행마다 튜플을 만든다 (Cursor.fetchall)
+- rows -> columns: 행 튜플을 읽은 뒤 컬럼으로 옮긴다 (Cursor.fetch_columns)
+- columns: 행 패킷을 바로 컬럼 배열에 디코딩한다 (ColumnarCursor, SSCursor.fetch_columns)
+
+컬럼별 읽기의 이점은 남는 결과의 메모리(정수/실수 값마다 Python 객체 대신 8바이트)이며,
+처리량은 행 튜플과 측정 편차 범위 안에서 비슷합니다.
+
+    python benchmarks/bench_mysql_columnar.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+
+from mysql_fixtures import PacketSource, column_definition, lenenc, result_payloads
+
+from pymysql import columnar
+from pymysql.connections import MySQLResult
+from pymysql.constants import FIELD_TYPE, FLAG
+
+# (컬럼 타입, flags, charset): 분석 쿼리처럼 숫자 컬럼 위주
+COLUMNS = (
+    (FIELD_TYPE.LONGLONG, FLAG.NOT_NULL, 63),
+    (FIELD_TYPE.LONG, 0, 63),
+    (FIELD_TYPE.LONG, 0, 63),
+    (FIELD_TYPE.DOUBLE, 0, 63),
+    (FIELD_TYPE.DOUBLE, 0, 63),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+)
+
+
+def text_row(i):
+    values = (
+        str(i).encode(),
+        str(i % 50000).encode(),
+        str(i % 1000).encode() if i % 10 else None,
+        repr(i / 7).encode(),
+        repr((i % 500) * 0.25).encode(),
+        b'plastic' if i % 3 else b'glass',
+    )
+    return b''.join(b'\xfb' if v is None else lenenc(v) for v in values)
+
+
+def payloads_for(rows):
+    definitions = [column_definition(i, t, f, charset) for i, (t, f, charset) in enumerate(COLUMNS)]
+    return result_payloads(definitions, rows)
+
+
+def read_rows(payloads):
+    result = MySQLResult(PacketSource(payloads))
+    result.read()
+    return result.rows
+
+
+def read_rows_then_columns(payloads):
+    result = MySQLResult(PacketSource(payloads))
+    result.read()
+    return columnar.columns_from_rows(result, result.rows)
+
+
+def read_columns(payloads):
+    result = MySQLResult(PacketSource(payloads))
+    result.init_unbuffered_query()
+    return result._read_columns_unbuffered()
+
+
+def measure(func, payloads):
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        func(payloads)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    kept = func(payloads)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return best, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    payloads = payloads_for([text_row(i) for i in range(count)])
+
+    sample = payloads_for([text_row(i) for i in range(1000)])
+    columns = read_columns(sample)
+    assert list(columnar.ColumnRows(columns)) == list(read_rows(sample))
+    assert [c.values for c in columns] == [c.values for c in read_rows_then_columns(sample)]
+
+    readers = (
+        ('rows', read_rows),
+        ('rows -> columns', read_rows_then_columns),
+        ('columns', read_columns),
+    )
+    print(f"{len(COLUMNS)} columns x {count:,} rows")
+    print(f"{'reader':<16} {'seconds':>9} {'rows/s':>12} {'result MB':>10}")
+    for label, func in readers:
+        seconds, size = measure(func, payloads)
+        print(f"{label:<16} {seconds:>9.3f} {count / seconds:>12,.0f} {size / 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""pymysql 압축 프로토콜의 전송 바이트 절감과 CPU 비용을 측정합니다.
+
+분석용 대용량 결과 집합(서버 -> 클라이언트)과 executemany 벌크 INSERT(클라이언트 -> 서버)를
+메모리에서 압축 프레임으로 만들어 비교하므로 DB 서버가 필요 없습니다.
+zstd 행은 zstandard 패키지가 설치되어 있을 때만 출력됩니다.
+
+    python benchmarks/bench_mysql_compression.py [rows]
+"""
+import datetime
+import random
+import sys
+import time
+
+from mysql_fixtures import lenenc, packet
+
+from pymysql import compression
+from pymysql.compression import PacketCompressor
+
+# 서버는 net_buffer_length(기본 16KB) 단위로 버퍼를 비우며 프레임을 만든다
+SERVER_FLUSH_SIZE = 16 * 1024
+# cursors.Cursor.max_stmt_length 기본값
+INSERT_STMT_LENGTH = 1024000
+
+CATEGORIES = ['plastic', 'glass', 'paper', 'can', 'vinyl', 'styrofoam', 'food_waste', 'clothes']
+REGIONS = ['서울 강남구', '서울 마포구', '부산 해운대구', '대구 수성구', '인천 연수구', '광주 북구']
+
+LINKS = (('100Mbps', 100e6), ('1Gbps', 1e9))
+
+
+def make_rows(count):
+    rng = random.Random(0)
+    base = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append((
+            str(i + 1),
+            (base + datetime.timedelta(seconds=i * 37)).strftime('%Y-%m-%d %H:%M:%S'),
+            'user_%06d' % rng.randrange(50000),
+            rng.choice(CATEGORIES),
+            rng.choice(REGIONS),
+            '%.2f' % (rng.random() * 500),
+            str(rng.randrange(1000)),
+        ))
+    return rows
+
+
+def result_stream(rows):
+    """행 패킷을 헤더 포함 그대로 이어 붙인, 서버가 보내는 패킷 스트림"""
+    parts = []
+    for seq, row in enumerate(rows, 1):
+        parts.append(packet(seq, b''.join(lenenc(v.encode('utf8')) for v in row)))
+    return b''.join(parts)
+
+
+def insert_statement(rows):
+    """executemany가 max_stmt_length까지 묶어 보내는 INSERT 문 한 개"""
+    prefix = b'INSERT INTO recycle_log (id, created_at, user_id, category, region, weight, point) VALUES '
+    values = []
+    length = len(prefix)
+    for row in rows:
+        value = ("(%s,'%s','%s','%s','%s',%s,%s)" % row).encode('utf8')
+        if length + len(value) + 1 > INSERT_STMT_LENGTH:
+            break
+        values.append(value)
+        length += len(value) + 1
+    return packet(0, b'\x03' + prefix + b','.join(values))
+
+
+def server_frames(compressor, stream):
+    compressor.reset()
+    return [
+        compressor.pack(stream[i:i + SERVER_FLUSH_SIZE])
+        for i in range(0, len(stream), SERVER_FLUSH_SIZE)
+    ]
+
+
+def read_stream(compressor, wire, count):
+    """Connection._read_bytes와 같은 방식으로 프레임을 풀며 패킷 count개를 읽는다"""
+    view = memoryview(wire)
+    pos = 0
+
+    def read_bytes(n):
+        nonlocal pos
+        while True:
+            data = compressor.take(n)
+            if data is not None:
+                return data
+            length = compressor.read_header(view[pos:pos + compression.HEADER_SIZE])
+            pos += compression.HEADER_SIZE
+            compressor.feed(bytes(view[pos:pos + length]))
+            pos += length
+
+    for _ in range(count):
+        header = read_bytes(4)
+        read_bytes(header[0] | header[1] << 8 | header[2] << 16)
+    return pos
+
+
+def configs():
+    yield 'none', None, None
+    yield 'zlib-1', compression.ZLIB, 1
+    yield 'zlib-6', compression.ZLIB, None
+    if compression.zstandard is not None:
+        yield 'zstd-1', compression.ZSTD, 1
+        yield 'zstd-3', compression.ZSTD, None
+
+
+def best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(title, raw, rows):
+    print(title)
+    header = f"{'codec':<8} {'bytes':>12} {'ratio':>7} {'cpu ms':>9}"
+    for name, _ in LINKS:
+        header += f" {name + ' ms':>12}"
+    print(header)
+    for label, size, cpu in rows:
+        line = f"{label:<8} {size:>12,} {raw / size:>6.2f}x {cpu * 1000:>9.1f}"
+        for _, bandwidth in LINKS:
+            line += f" {(size * 8 / bandwidth + cpu) * 1000:>12.1f}"
+        print(line)
+    print()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows = make_rows(count)
+    stream = result_stream(rows)
+    statement = insert_statement(rows)
+
+    # 결과 집합: 서버가 압축하고 클라이언트는 압축 해제 비용만 부담한다
+    results = []
+    for label, algorithm, level in configs():
+        if algorithm is None:
+            results.append((label, len(stream), 0.0))
+            continue
+        wire = b''.join(server_frames(PacketCompressor(algorithm, level), stream))
+        cpu, consumed = best_of(lambda: read_stream(PacketCompressor(algorithm), wire, count))
+        assert consumed == len(wire)
+        results.append((label, len(wire), cpu))
+    report(f"result set: {count:,} rows, client decompress", len(stream), results)
+
+    # 벌크 INSERT: 클라이언트가 압축 비용을 부담한다
+    results = []
+    for label, algorithm, level in configs():
+        if algorithm is None:
+            results.append((label, len(statement), 0.0))
+            continue
+        compressor = PacketCompressor(algorithm, level)
+        cpu, wire = best_of(lambda: compressor.pack(statement))
+        results.append((label, len(wire), cpu))
+    report(f"executemany INSERT: {len(statement):,} byte statement, client compress",
+           len(statement), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""pymysql 패킷 리더의 결과 집합 읽기 처리량(rows/s)을 측정합니다.
+
+socketpair 한쪽에서 스레드가 텍스트 프로토콜 결과 집합을 보내고, 다른 쪽의 Connection이
+MySQLResult로 읽습니다. DB 서버가 필요 없습니다.
+
+- makefile: 이전 구현(_rfile.read로 헤더/본문을 읽고 bytearray에 모은 뒤 bytes로 복사)
+- recv_into: 수신 버퍼를 재사용하고 memoryview 위에서 바로 행을 디코딩하는 현재 구현
+
+    python benchmarks/bench_mysql_packet_reader.py [rows]
+"""
+import datetime
+import socket
+import struct
+import sys
+import threading
+import time
+
+from mysql_fixtures import column_definition, lenenc, packet_stream, result_payloads
+
+from pymysql.connections import Connection, MySQLResult
+from pymysql.constants import FIELD_TYPE, FLAG
+from pymysql.protocol import MysqlPacket
+
+COLUMNS = (
+    (FIELD_TYPE.LONGLONG, FLAG.NOT_NULL, 63),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.LONG, 0, 63),
+    (FIELD_TYPE.DOUBLE, 0, 63),
+    (FIELD_TYPE.DATETIME, 0, 63),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.LONG, 0, 63),
+)
+
+
+def text_row(i):
+    created = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i * 13)
+    values = (
+        str(i).encode(),
+        b'user_%06d' % (i % 50000),
+        '서울 강남구'.encode(),
+        str(i % 1000).encode(),
+        repr(i / 7).encode(),
+        created.strftime('%Y-%m-%d %H:%M:%S').encode(),
+        b'plastic' if i % 3 else None,
+        str(i * 3).encode(),
+    )
+    return b''.join(b'\xfb' if v is None else lenenc(v) for v in values)
+
+
+def result_stream(count):
+    definitions = [column_definition(i, *column) for i, column in enumerate(COLUMNS)]
+    return packet_stream(result_payloads(definitions, [text_row(i) for i in range(count)]))
+
+
+class MakefileConnection(Connection):
+    """이전 구현: 패킷마다 헤더/본문을 새로 읽고 bytearray -> bytes로 복사한다"""
+
+    def _read_packet(self, packet_type=MysqlPacket):
+        buff = bytearray()
+        while True:
+            packet_header = self._read_bytes(4)
+            btrl, btrh, packet_number = struct.unpack('<HBB', packet_header)
+            bytes_to_read = btrl + (btrh << 16)
+            self._next_seq_id = (packet_number + 1) % 256
+            buff += self._read_bytes(bytes_to_read)
+            if bytes_to_read < 0xFFFFFF:
+                break
+        return packet_type(bytes(buff), self.encoding)
+
+    def _read_bytes(self, num_bytes):
+        self._sock.settimeout(self._read_timeout)
+        return self._rfile.read(num_bytes)
+
+
+class MakefileResult(MySQLResult):
+    """이전 구현: 컬럼마다 read_length_coded_string()으로 bytes를 만든 뒤 decode한다"""
+
+    def _read_row_from_packet(self, packet):
+        row = []
+        for encoding, converter in self.converters:
+            try:
+                data = packet.read_length_coded_string()
+            except IndexError:
+                break
+            if data is not None:
+                if encoding is not None:
+                    data = data.decode(encoding)
+                if converter is not None:
+                    data = converter(data)
+            row.append(data)
+        return tuple(row)
+
+
+def fetch(stream, connection_class, result_class):
+    server, client = socket.socketpair()
+    sender = threading.Thread(target=server.sendall, args=(stream,))
+    conn = connection_class(user='bench', defer_connect=True)
+    conn._sock = client
+    conn._rfile = client.makefile('rb')
+    conn._next_seq_id = 1
+    start = time.perf_counter()
+    sender.start()
+    result = result_class(conn)
+    result.read()
+    elapsed = time.perf_counter() - start
+    sender.join()
+    server.close()
+    client.close()
+    return elapsed, result.rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    stream = result_stream(count)
+    readers = (
+        ('makefile', MakefileConnection, MakefileResult),
+        ('recv_into', Connection, MySQLResult),
+    )
+
+    expected = fetch(result_stream(1000), MakefileConnection, MakefileResult)[1]
+    assert fetch(result_stream(1000), Connection, MySQLResult)[1] == expected
+
+    print(f"{len(COLUMNS)} columns x {count:,} rows, {len(stream) / 1e6:.1f} MB over socketpair")
+    print(f"{'reader':<10} {'seconds':>9} {'rows/s':>12}")
+    for label, connection_class, result_class in readers:
+        best = min(fetch(stream, connection_class, result_class)[0] for _ in range(3))
+        print(f"{label:<10} {best:>9.3f} {count / best:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
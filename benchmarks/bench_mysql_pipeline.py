@@ -0,0 +1,120 @@
+"""pymysql 쿼리 파이프라이닝이 요청 하나에서 여러 쿼리를 보낼 때의 지연 시간을 얼마나 줄이는지 측정합니다.
+
+socketpair 반대편의 가짜 서버가 명령이 도착한 시각부터 RTT만큼 기다린 뒤 응답하므로
+DB 서버 없이 네트워크 왕복 지연을 흉내 냅니다.
+
+- sequential: 쿼리마다 execute()로 요청 -> 응답을 기다린다 (N 왕복)
+- pipeline: execute_pipeline()으로 N개를 한 번에 보내고 결과를 순서대로 읽는다 (약 1 왕복)
+
+    python benchmarks/bench_mysql_pipeline.py [rtt_ms]
+"""
+import queue
+import socket
+import sys
+import threading
+import time
+
+from mysql_fixtures import column_definition, lenenc, packet_stream, result_payloads
+
+from pymysql.connections import Connection
+from pymysql.constants import CLIENT, FIELD_TYPE
+
+QUERY_COUNTS = (1, 5, 10, 20)
+ROUNDS = 20
+
+
+def result_response():
+    """SELECT 한 컬럼, 한 행짜리 결과 집합"""
+    return packet_stream(result_payloads([column_definition(0, FIELD_TYPE.LONGLONG)], [lenenc(b'42')]))
+
+
+class DelayedServer:
+    """명령 패킷을 받은 시각 + rtt에 결과 집합을 돌려주는 가짜 서버"""
+
+    def __init__(self, sock, rtt):
+        self._sock = sock
+        self._rtt = rtt
+        self._arrivals = queue.Queue()
+        self._response = result_response()
+        threading.Thread(target=self._receive, daemon=True).start()
+        threading.Thread(target=self._respond, daemon=True).start()
+
+    def _recv_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def _receive(self):
+        try:
+            while True:
+                header = self._recv_exactly(4)
+                self._recv_exactly(header[0] | header[1] << 8 | header[2] << 16)
+                self._arrivals.put(time.perf_counter())
+        except (EOFError, OSError):
+            self._arrivals.put(None)
+
+    def _respond(self):
+        while True:
+            arrived = self._arrivals.get()
+            if arrived is None:
+                return
+            delay = arrived + self._rtt - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._sock.sendall(self._response)
+
+
+def connect(rtt):
+    server, client = socket.socketpair()
+    DelayedServer(server, rtt)
+    conn = Connection(user='bench', defer_connect=True)
+    conn.client_flag &= ~CLIENT.DEPRECATE_EOF
+    conn._sock = client
+    return conn, server
+
+
+def sequential(cursor, queries):
+    for query in queries:
+        cursor.execute(query)
+        cursor.fetchall()
+
+
+def pipeline(cursor, queries):
+    cursor.execute_pipeline(queries)
+    cursor.fetchall()
+    while cursor.nextset():
+        cursor.fetchall()
+
+
+def main():
+    rtt = (float(sys.argv[1]) if len(sys.argv) > 1 else 1.0) / 1000
+    conn, server = connect(rtt)
+    cursor = conn.cursor()
+
+    print(f"simulated RTT {rtt * 1000:.1f} ms, median of {ROUNDS} rounds")
+    print(f"{'queries':>7} {'sequential ms':>14} {'pipeline ms':>12} {'speedup':>8}")
+    for count in QUERY_COUNTS:
+        queries = ['SELECT %d' % i for i in range(count)]
+        timings = {}
+        for label, func in (('sequential', sequential), ('pipeline', pipeline)):
+            samples = []
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                func(cursor, queries)
+                samples.append(time.perf_counter() - start)
+            timings[label] = sorted(samples)[ROUNDS // 2]
+        print(
+            f"{count:>7} {timings['sequential'] * 1000:>14.2f} "
+            f"{timings['pipeline'] * 1000:>12.2f} "
+            f"{timings['sequential'] / timings['pipeline']:>7.1f}x"
+        )
+    conn._sock.close()
+    server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""pymysql 텍스트 프로토콜 행 디코딩 처리량을 컬럼별 루프와 결과 집합별 생성 디코더로 비교합니다.
+
+결과 집합을 메모리에서 만들어 MySQLResult로 파싱하므로 DB 서버가 필요 없습니다.
+
+    python benchmarks/bench_mysql_text_rows.py [rows]
+"""
+import datetime
+import sys
+import time
+
+from mysql_fixtures import PacketSource, column_definition, lenenc, result_payloads
+
+from pymysql.connections import MySQLResult
+from pymysql.constants import FIELD_TYPE, FLAG
+from pymysql.protocol import text_row_decoder
+
+# (컬럼 타입, flags, charset)
+COLUMNS = (
+    (FIELD_TYPE.LONGLONG, FLAG.NOT_NULL, 63),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.LONG, 0, 63),
+    (FIELD_TYPE.DOUBLE, 0, 63),
+    (FIELD_TYPE.DATETIME, 0, 63),
+    (FIELD_TYPE.VAR_STRING, 0, 45),
+    (FIELD_TYPE.NEWDECIMAL, 0, 63),
+)
+
+
+def text_row(i):
+    created = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i * 13)
+    values = (
+        str(i).encode(),
+        b'user_%06d' % (i % 50000),
+        '서울 강남구'.encode(),
+        str(i % 1000).encode(),
+        repr(i / 7).encode(),
+        created.strftime('%Y-%m-%d %H:%M:%S').encode(),
+        b'plastic' if i % 3 else None,
+        b'%d.%02d' % (i % 500, i % 100),
+    )
+    return b''.join(b'\xfb' if v is None else lenenc(v) for v in values)
+
+
+class ColumnLoopResult(MySQLResult):
+    """생성 디코더가 IndexError를 내면 MySQLResult는 컬럼별 루프로 되돌아간다.
+
+    항상 IndexError를 내게 해서 이전 경로를 그대로 측정한다.
+    """
+
+    def _get_descriptions(self):
+        super()._get_descriptions()
+        self._text_decoder = _always_fallback
+
+
+def _always_fallback(data):
+    raise IndexError
+
+
+def payloads_for(rows):
+    definitions = [column_definition(i, t, f, charset, decimals=2) for i, (t, f, charset) in enumerate(COLUMNS)]
+    return result_payloads(definitions, rows)
+
+
+def parse(payloads, result_class):
+    result = result_class(PacketSource(payloads))
+    result.read()
+    return result.rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    payloads = payloads_for([text_row(i) for i in range(count)])
+
+    sample = payloads_for([text_row(i) for i in range(1000)])
+    assert parse(sample, MySQLResult) == parse(sample, ColumnLoopResult)
+
+    result = MySQLResult(PacketSource(sample))
+    result.read()
+    shape = [tuple(c) for c in result.converters]
+    start = time.perf_counter()
+    text_row_decoder([(c[0], c[1]) for c in shape[::-1]])
+    compile_us = (time.perf_counter() - start) * 1e6
+    start = time.perf_counter()
+    text_row_decoder(shape)
+    cached_us = (time.perf_counter() - start) * 1e6
+    print(f"decoder: compile {compile_us:.0f}us, reuse for the same shape {cached_us:.1f}us")
+
+    print(f"{len(COLUMNS)} columns x {count:,} rows")
+    print(f"{'decoder':<12} {'seconds':>9} {'rows/s':>12}")
+    for label, result_class in (('column loop', ColumnLoopResult), ('generated', MySQLResult)):
+        best = min(_timed(payloads, result_class) for _ in range(3))
+        print(f"{label:<12} {best:>9.3f} {count / best:>12,.0f}")
+
+
+def _timed(payloads, result_class):
+    start = time.perf_counter()
+    parse(payloads, result_class)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
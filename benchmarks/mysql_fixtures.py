@@ -0,0 +1,79 @@
+"""pymysql 벤치마크가 함께 쓰는 결과 집합 패킷 생성 도구입니다.
+
+import하면 mysql_layer를 sys.path에 추가하므로 벤치마크 스크립트는 이 모듈을 pymysql보다 먼저 import합니다.
+"""
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'mysql_layer'))
+
+from pymysql import converters  # noqa: E402
+from pymysql.protocol import MysqlPacket  # noqa: E402
+
+EOF_PACKET = b'\xfe\x00\x00\x02\x00'
+
+
+def lenenc(data):
+    """길이 부호화 문자열. 251바이트 이상이면 0xFC/0xFD/0xFE 접두어와 2/3/8바이트 길이를 씁니다."""
+    length = len(data)
+    if length < 251:
+        return bytes([length]) + data
+    if length < 1 << 16:
+        return b'\xfc' + struct.pack('<H', length) + data
+    if length < 1 << 24:
+        return b'\xfd' + struct.pack('<I', length)[:3] + data
+    return b'\xfe' + struct.pack('<Q', length) + data
+
+
+def packet(seq, payload):
+    """payload에 3바이트 길이와 시퀀스 번호 헤더를 붙입니다."""
+    return struct.pack('<I', len(payload))[:3] + bytes([seq % 256]) + payload
+
+
+def packet_stream(payloads):
+    """payload 목록을 시퀀스 번호 1부터 붙여 서버가 보내는 패킷 스트림으로 만듭니다."""
+    return b''.join(packet(seq, payload) for seq, payload in enumerate(payloads, 1))
+
+
+def column_definition(index, type_code, flags=0, charset=63, decimals=0):
+    return (
+        lenenc(b'def') + lenenc(b'bench') + lenenc(b't') + lenenc(b't')
+        + lenenc(b'c%d' % index) + lenenc(b'c%d' % index)
+        + struct.pack('<BHIBHBxx', 0x0C, charset, 64, type_code, flags, decimals)
+    )
+
+
+def binary_row(formats, values):
+    """바이너리 프로토콜 행 payload. formats는 컬럼별 struct 포맷이며, bytes 값(이미 인코딩된 값)과 None(NULL)은 그대로 씁니다."""
+    bitmap = bytearray((len(values) + 9) // 8)
+    out = b''
+    for index, (fmt, value) in enumerate(zip(formats, values)):
+        if value is None:
+            bit = index + 2
+            bitmap[bit >> 3] |= 1 << (bit & 7)
+        elif isinstance(value, bytes):
+            out += value
+        else:
+            out += struct.pack('<' + fmt, value)
+    return b'\x00' + bytes(bitmap) + out
+
+
+def result_payloads(definitions, rows):
+    """컬럼 수, 컬럼 정의, EOF, 행, EOF 순서의 텍스트/바이너리 결과 집합 payload 목록"""
+    return [bytes([len(definitions)])] + definitions + [EOF_PACKET] + rows + [EOF_PACKET]
+
+
+class PacketSource:
+    """MySQLResult가 읽는 connection 자리에 넣는 메모리 패킷 공급자"""
+
+    use_unicode = True
+    client_flag = 0
+    encoding = 'utf8'
+    decoders = converters.decoders
+
+    def __init__(self, payloads):
+        self._payloads = iter(payloads)
+
+    def _read_packet(self, packet_type=MysqlPacket):
+        return packet_type(next(self._payloads), self.encoding)
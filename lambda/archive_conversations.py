@@ -0,0 +1,155 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+import boto3
+from boto3.dynamodb.conditions import Key, Attr
+from archive_store import get_archive_store, pack_messages, read_archived_messages, ARCHIVE_CHUNK_MESSAGES
+from message_codec import decode_content, make_sort_key
+
+dynamodb = boto3.resource('dynamodb')
+thread_table = dynamodb.Table('Thread')
+convo_table = dynamodb.Table('Conversation')
+
+ARCHIVE_IDLE_DAYS = int(os.getenv('ARCHIVE_IDLE_DAYS', '30'))
+
+
+def get_last_activity(thread):
+    """last_activity가 없는 이전 thread는 created_at(ISO 문자열)을 기준으로 판단합니다."""
+    if 'last_activity' in thread:
+        return int(thread['last_activity'])
+    created_at = thread.get('created_at')
+    if isinstance(created_at, str):
+        return int(datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc).timestamp())
+    return int(created_at or 0)
+
+
+def archived_since_last_activity(thread):
+    """마지막 아카이브 이후 새 활동이 없어 DynamoDB에 남은 메시지가 없는 thread인지 확인합니다."""
+    archive = thread.get('archive')
+    return bool(archive) and int(archive['archived_at']) >= get_last_activity(thread)
+
+
+def find_idle_threads(cutoff):
+    """마지막 활동이 cutoff 이전이고 그 뒤로 아카이브되지 않은 Thread 항목을 스캔합니다."""
+    scan_params = {
+        'FilterExpression': (Attr('last_activity').lt(cutoff) | Attr('last_activity').not_exists())
+                            & (Attr('archive').not_exists() | Attr('archive.archived_at').lt(Attr('last_activity')))
+    }
+    while True:
+        response = thread_table.scan(**scan_params)
+        for thread in response.get('Items', []):
+            if get_last_activity(thread) < cutoff and not archived_since_last_activity(thread):
+                yield thread
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def get_live_messages(thread_id):
+    items = []
+    query_params = {'KeyConditionExpression': Key('thread_id').eq(thread_id)}
+    while True:
+        response = convo_table.query(**query_params)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def archive_thread(store, thread):
+    """thread의 DynamoDB 메시지를 기존 아카이브와 합쳐 blob으로 저장하고, 포인터 기록 후 항목을 삭제합니다."""
+    thread_id = thread['thread_id']
+    live_messages = get_live_messages(thread_id)
+    if not live_messages:
+        return 0
+
+    # 아카이브는 get_message_list와 같은 최신순으로 저장
+    live_messages.sort(key=lambda msg: msg.get('sort_key') or make_sort_key(msg['created_at'], msg['message_id'], msg['role']), reverse=True)
+    previous = thread.get('archive')
+    archived_messages = read_archived_messages(store, previous, 0, int(previous['message_count'])) if previous else []
+    # 이전 실행이 포인터를 바꾼 뒤 삭제 중에 실패했다면 남은 항목은 이미 아카이브에 있으므로 message_id로 걸러냄
+    archived_ids = {msg['message_id'] for msg in archived_messages}
+    new_messages = [
+        {
+            'message_id': msg['message_id'],
+            'role': msg['role'],
+            'content': decode_content(msg),
+            'created_at': msg['created_at'],
+            'assistant_id': msg.get('assistant_id')
+        }
+        for msg in live_messages
+        if msg['message_id'] not in archived_ids
+    ]
+
+    if new_messages:
+        messages = new_messages + archived_messages
+        blob, offsets = pack_messages(messages)
+        archived_at = int(time.time())
+        key = f"conversations/{thread_id}/{archived_at}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        store.put(key, blob)
+
+        # 다른 실행이 먼저 포인터를 바꿨다면 그 아카이브를 덮어쓰지 않음
+        condition = Attr('archive.key').eq(previous['key']) if previous else Attr('archive').not_exists()
+        try:
+            thread_table.update_item(
+                Key={'thread_id': thread_id},
+                UpdateExpression='SET #archive = :archive',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#archive': 'archive'},
+                ExpressionAttributeValues={
+                    ':archive': {
+                        'key': key,
+                        'format': 'jsonl.gz',
+                        'chunk_size': ARCHIVE_CHUNK_MESSAGES,
+                        'chunk_offsets': offsets,
+                        'size': len(blob),
+                        'message_count': len(messages),
+                        'archived_at': archived_at
+                    }
+                }
+            )
+        except thread_table.meta.client.exceptions.ConditionalCheckFailedException:
+            store.delete(key)
+            return 0
+
+    # 포인터가 가리키는 아카이브에 모두 들어 있으므로 삭제가 중간에 실패해도 다시 실행하면 이어서 지워짐.
+    # batch_writer가 25개 단위 BatchWriteItem으로 묶고 미처리 항목을 재시도
+    with convo_table.batch_writer() as batch:
+        for msg in live_messages:
+            batch.delete_item(Key={'thread_id': thread_id, 'message_id': msg['message_id']})
+
+    if new_messages and previous:
+        store.delete(previous['key'])
+
+    return len(live_messages)
+
+
+def lambda_handler(event, context):
+    try:
+        idle_days = int((event or {}).get('idle_days', ARCHIVE_IDLE_DAYS))
+        cutoff = int(time.time()) - idle_days * 86400
+        store = get_archive_store()
+
+        archived_threads = 0
+        archived_messages = 0
+        for thread in find_idle_threads(cutoff):
+            count = archive_thread(store, thread)
+            if count:
+                archived_threads += 1
+                archived_messages += count
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'archived_threads': archived_threads,
+                'archived_messages': archived_messages
+            })
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
@@ -0,0 +1,183 @@
+import gzip
+import json
+import os
+from decimal import Decimal
+import boto3
+
+ARCHIVE_BACKEND = os.getenv('ARCHIVE_BACKEND', 's3')
+ARCHIVE_BUCKET = os.getenv('ARCHIVE_BUCKET')
+ARCHIVE_LOCAL_DIR = os.getenv('ARCHIVE_LOCAL_DIR', '/tmp/conversation-archive')
+# S3 multipart 업로드의 파트 크기 (마지막 파트를 제외하고 5MiB 이상이어야 함)
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+# 압축 단위(청크)당 메시지 수. 청크 단위로 범위 읽기를 하므로 페이지 크기와 비슷하게 유지
+ARCHIVE_CHUNK_MESSAGES = int(os.getenv('ARCHIVE_CHUNK_MESSAGES', '50'))
+
+
+class S3BlobStore:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.client = boto3.client('s3')
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType='application/gzip')
+
+    def get_range(self, key, start, end):
+        """[start, end) 바이트 범위를 읽습니다."""
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+        return response['Body'].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def open_writer(self, key, content_type='application/octet-stream'):
+        return S3MultipartWriter(self.client, self.bucket, key, content_type)
+
+    def get_download_url(self, key, expires_in=3600):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires_in
+        )
+
+
+class S3MultipartWriter:
+    """파트 크기만큼만 메모리에 버퍼링하면서 S3 multipart 업로드로 스트리밍하는 writer"""
+
+    def __init__(self, client, bucket, key, content_type):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )['UploadId']
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= MULTIPART_PART_SIZE:
+            self._upload_part()
+
+    def _upload_part(self):
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self.buffer = bytearray()
+
+    def close(self):
+        if self.buffer or not self.parts:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+class LocalBlobStore:
+    """로컬 파일 시스템에 blob을 저장하는 S3 대체 구현 (테스트/로컬 실행용)"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def get_range(self, key, start, end):
+        with open(self._path(key), 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def open_writer(self, key, content_type='application/octet-stream'):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return LocalFileWriter(path)
+
+    def get_download_url(self, key, expires_in=3600):
+        return 'file://' + os.path.abspath(self._path(key))
+
+
+class LocalFileWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+def get_archive_store(backend=None):
+    backend = backend or ARCHIVE_BACKEND
+    if backend == 'local':
+        return LocalBlobStore(ARCHIVE_LOCAL_DIR)
+    if backend == 's3':
+        if not ARCHIVE_BUCKET:
+            raise ValueError("ARCHIVE_BUCKET is required for the s3 archive backend")
+        return S3BlobStore(ARCHIVE_BUCKET)
+    raise ValueError(f"Unknown archive backend: {backend}")
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError
+
+
+def pack_messages(messages, chunk_size=ARCHIVE_CHUNK_MESSAGES):
+    """메시지를 chunk_size개씩 독립적인 gzip 멤버로 압축한 JSONL blob과 청크 시작 오프셋을 만듭니다.
+
+    gzip 멤버를 이어 붙인 blob은 그 자체로 올바른 gzip 파일이면서 청크 단위 범위 읽기가 가능합니다.
+    """
+    blob = bytearray()
+    offsets = []
+    for i in range(0, len(messages), chunk_size):
+        lines = "".join(
+            json.dumps(msg, ensure_ascii=False, default=_json_default) + "\n"
+            for msg in messages[i:i + chunk_size]
+        )
+        offsets.append(len(blob))
+        blob += gzip.compress(lines.encode('utf-8'))
+    return bytes(blob), offsets
+
+
+def read_archived_messages(store, archive, start, end):
+    """Thread 항목의 archive 포인터가 가리키는 blob에서 [start, end) 위치의 메시지를 범위 읽기로 가져옵니다."""
+    count = int(archive['message_count'])
+    end = min(end, count)
+    if start >= end:
+        return []
+
+    chunk_size = int(archive['chunk_size'])
+    offsets = [int(offset) for offset in archive['chunk_offsets']] + [int(archive['size'])]
+    first_chunk = start // chunk_size
+    last_chunk = (end - 1) // chunk_size
+
+    data = store.get_range(archive['key'], offsets[first_chunk], offsets[last_chunk + 1])
+    messages = [json.loads(line) for line in gzip.decompress(data).decode('utf-8').splitlines()]
+
+    base = first_chunk * chunk_size
+    return messages[start - base:end - base]
@@ -0,0 +1,385 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from boto3.dynamodb.conditions import Key, Attr
+import response_cache
+import processed_requests
+from archive_store import get_archive_store, read_archived_messages
+from metrics import emit_metric
+from message_codec import encode_content, decode_content, make_sort_key
+from circuit_breaker import CircuitOpenError
+from common import dynamodb, thread_table, dynamodb_breaker, openai_breaker
+
+convo_table = dynamodb.Table('Conversation')
+
+# run 폴링과 겹쳐서 DynamoDB 저장을 처리하는 백그라운드 워커 (컨테이너 재사용 시 함께 재사용)
+background_executor = ThreadPoolExecutor(max_workers=4)
+# run_assistant_turn 한 번이 동시에 백그라운드로 넘기는 최대 작업 수 (사용자 메시지 저장, 요약, 집계 갱신)
+TURN_BACKGROUND_JOBS = 3
+
+# 요약을 갱신 중인 thread_id
+summary_in_progress = set()
+summary_lock = threading.Lock()
+
+# Thread 항목에 저장하는 마지막 메시지 미리보기 길이
+THREAD_PREVIEW_LENGTH = 120
+
+PERSIST_MAX_ATTEMPTS = 3
+PERSIST_RETRY_DELAY_SECONDS = 0.2
+
+BASE_INSTRUCTIONS = "Continue assisting the user based on the current thread context."
+
+# Thread 항목에 context_policy가 없는 기존 thread에 적용되는 기본 정책
+DEFAULT_CONTEXT_POLICY = {
+    'last_messages': int(os.getenv('CONTEXT_LAST_MESSAGES', '20')),
+    'summarize': os.getenv('CONTEXT_SUMMARIZE', 'true').lower() == 'true'
+}
+# 요약에서 빠진 메시지가 이 개수 이상 쌓였을 때만 요약을 갱신
+SUMMARY_BATCH_MESSAGES = int(os.getenv('SUMMARY_BATCH_MESSAGES', '10'))
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-4o-mini')
+# 요약 갱신의 OpenAI 호출 제한 시간이자 응답 전에 요약 갱신을 기다리는 최대 시간
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv('SUMMARY_TIMEOUT_SECONDS', '10'))
+
+def get_context_policy(thread):
+    """Thread 항목의 context_policy를 기본값과 합쳐 반환합니다."""
+    policy = dict(DEFAULT_CONTEXT_POLICY)
+    policy.update(thread.get('context_policy') or {})
+    policy['last_messages'] = int(policy['last_messages'])
+    return policy
+
+def build_run_context(thread):
+    """context_policy와 저장된 요약으로 run의 instructions와 truncation_strategy를 만듭니다."""
+    policy = get_context_policy(thread)
+
+    instructions = BASE_INSTRUCTIONS
+    summary = thread.get('summary')
+    if policy['summarize'] and summary:
+        instructions += (
+            "\n\nSummary of the earlier conversation (older messages are not included in the thread context):\n"
+            + summary
+        )
+
+    if policy['last_messages'] > 0:
+        truncation_strategy = {'type': 'last_messages', 'last_messages': policy['last_messages']}
+    else:
+        truncation_strategy = {'type': 'auto'}
+
+    return instructions, truncation_strategy
+
+def get_conversation_messages(thread_id):
+    """Conversation 테이블에서 thread의 전체 메시지를 시간순으로 가져옵니다."""
+    items = []
+    query_params = {
+        'KeyConditionExpression': Key('thread_id').eq(thread_id),
+        'ProjectionExpression': 'message_id, sort_key, #role, content, content_z, content_format, created_at',
+        'ExpressionAttributeNames': {'#role': 'role'}
+    }
+    while True:
+        response = convo_table.query(**query_params)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    items.sort(key=lambda item: item.get('sort_key') or make_sort_key(item['created_at'], item['message_id'], item['role']))
+    return items
+
+def refresh_thread_summary(client, thread):
+    """truncation으로 run에서 빠지는 오래된 메시지를 Thread 항목의 요약에 누적합니다."""
+    policy = get_context_policy(thread)
+    if not policy['summarize'] or policy['last_messages'] <= 0:
+        return
+
+    thread_id = thread['thread_id']
+    summarized_count = int(thread.get('summarized_count', 0))
+    # 파티션 전체를 세지 않고 Thread 항목의 message_count 집계로 갱신 여부를 판단
+    total = int(thread.get('message_count', 0))
+    if total - policy['last_messages'] - summarized_count < SUMMARY_BATCH_MESSAGES:
+        return
+
+    # 아카이브된 메시지는 DynamoDB에 남은 메시지보다 앞선 위치이며, summarized_count도 아카이브를 포함한 위치
+    messages = get_conversation_messages(thread_id)
+    archive = thread.get('archive')
+    archived_count = int(archive['message_count']) if archive else 0
+    fold_until = archived_count + len(messages) - policy['last_messages']
+    if fold_until <= summarized_count:
+        return
+
+    folded = []
+    if summarized_count < archived_count:
+        # 아카이브는 최신순으로 저장되어 있으므로 위치를 뒤집어 읽음
+        folded = read_archived_messages(
+            get_archive_store(),
+            archive,
+            archived_count - min(fold_until, archived_count),
+            archived_count - summarized_count
+        )[::-1]
+    folded += messages[max(summarized_count - archived_count, 0):max(fold_until - archived_count, 0)]
+    transcript = "\n".join(f"{msg['role']}: {decode_content(msg)}" for msg in folded)
+
+    completion = client.with_options(timeout=SUMMARY_TIMEOUT_SECONDS, max_retries=0).chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {
+                'role': 'system',
+                'content': "Summarize the conversation so far for an assistant that will continue it. "
+                           "Keep facts, user preferences and open questions. Be concise."
+            },
+            {
+                'role': 'user',
+                'content': f"Existing summary:\n{thread.get('summary', '')}\n\nNew messages:\n{transcript}"
+            }
+        ]
+    )
+
+    # 다른 요청이 먼저 요약을 갱신했다면 덮어쓰지 않음
+    condition = Attr('summarized_count').not_exists() if 'summarized_count' not in thread else Attr('summarized_count').eq(summarized_count)
+    try:
+        thread_table.update_item(
+            Key={'thread_id': thread_id},
+            UpdateExpression='SET summary = :summary, summarized_count = :count',
+            ConditionExpression=condition,
+            ExpressionAttributeValues={
+                ':summary': completion.choices[0].message.content,
+                ':count': fold_until
+            }
+        )
+    except thread_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+def refresh_thread_summary_safely(client, thread):
+    thread_id = thread['thread_id']
+    # 응답을 기다리게 하지 않으므로 같은 thread의 요약 갱신이 겹쳐 쌓이지 않게 함
+    with summary_lock:
+        if thread_id in summary_in_progress:
+            return
+        summary_in_progress.add(thread_id)
+    try:
+        refresh_thread_summary(client, thread)
+    except Exception as e:
+        print(f"WARNING: Unable to refresh thread summary. {str(e)}")
+    finally:
+        with summary_lock:
+            summary_in_progress.discard(thread_id)
+
+def save_message_to_dynamodb_from_openai_message(message):
+    """OpenAI의 Message 객체를 DynamoDB에 저장"""
+    try:
+        message_id = message.id
+        assistant_id = message.assistant_id
+        role = message.role
+        thread_id = message.thread_id
+        created_at = message.created_at
+
+        content = get_message_text(message)
+
+        with dynamodb_breaker:
+            convo_table.put_item(
+                Item={
+                    'thread_id': thread_id,
+                    'message_id': message_id,
+                    'sort_key': make_sort_key(created_at, message_id, role),
+                    'role': role,
+                    'created_at': created_at,
+                    'assistant_id': assistant_id,
+                    **encode_content(content)
+                }
+            )
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error saving message to DynamoDB: {str(e)}")
+    
+def get_message_text(message):
+    return "\n".join([
+        block.text.value
+        for block in message.content
+        if hasattr(block, 'text') and hasattr(block.text, 'value')
+    ])
+
+def thread_has_context(thread):
+    """thread에 이전 대화(저장된 메시지, 아카이브, 요약)가 있는지 확인합니다."""
+    if thread.get('summary') or thread.get('archive'):
+        return True
+    with dynamodb_breaker:
+        response = convo_table.query(
+            KeyConditionExpression=Key('thread_id').eq(thread['thread_id']),
+            ProjectionExpression='message_id',
+            Limit=1
+        )
+    return bool(response.get('Items'))
+
+def reply_from_cache(client, thread_id, user_message, cached_response, executor):
+    """캐시된 응답을 OpenAI thread와 Conversation 테이블에 기록해 이후 대화의 맥락을 유지합니다."""
+    persist_future = executor.submit(save_message_to_dynamodb_from_openai_message, user_message)
+    with openai_breaker:
+        assistant_message = client.beta.threads.messages.create(
+            thread_id=thread_id,
+            role="assistant",
+            content=cached_response
+        )
+    save_message_to_dynamodb_from_openai_message(assistant_message)
+    persist_future.result()
+
+def put_cached_response_safely(assistant_id, prompt, response):
+    try:
+        response_cache.put_cached_response(assistant_id, prompt, response)
+    except Exception as e:
+        print(f"WARNING: Unable to write response cache. {str(e)}")
+
+def update_thread_aggregates(thread_id, last_text, last_role, added_messages):
+    """thread 목록과 아카이브 판단에 쓰이는 Thread 항목의 집계값(마지막 활동, 미리보기, 메시지 수)을 갱신합니다."""
+    try:
+        thread_table.update_item(
+            Key={'thread_id': thread_id},
+            UpdateExpression='SET last_activity = :now, last_message_preview = :preview, last_message_role = :role '
+                             'ADD message_count :added',
+            ExpressionAttributeValues={
+                ':now': int(time.time()),
+                ':preview': last_text[:THREAD_PREVIEW_LENGTH],
+                ':role': last_role,
+                ':added': added_messages
+            }
+        )
+    except Exception as e:
+        print(f"WARNING: Unable to update thread aggregates. {str(e)}")
+
+def find_latest_user_message(messages):
+    """최신순으로 정렬된 메시지 목록에서 가장 최근의 사용자 메시지를 찾습니다."""
+    for message in messages:
+        if message.role == 'user':
+            return message
+    raise ValueError("User message not found in thread")
+
+def persist_user_message(client, thread_id):
+    """run에 포함된 사용자 메시지를 조회해 DynamoDB에 저장합니다. 실패 시 재시도 후 예외를 전달합니다."""
+    last_error = None
+    for attempt in range(PERSIST_MAX_ATTEMPTS):
+        try:
+            messages = client.beta.threads.messages.list(
+                thread_id=thread_id,
+                order='desc',
+                limit=5
+            )
+            save_message_to_dynamodb_from_openai_message(find_latest_user_message(messages.data))
+            return
+        except Exception as e:
+            last_error = e
+            print(f"WARNING: Persisting user message failed (attempt {attempt + 1}/{PERSIST_MAX_ATTEMPTS}). {str(e)}")
+            if attempt + 1 < PERSIST_MAX_ATTEMPTS:
+                time.sleep(PERSIST_RETRY_DELAY_SECONDS * (2 ** attempt))
+    raise Exception(f"Error persisting user message: {str(last_error)}")
+
+def cancel_pending_run(client, thread_id, run):
+    """도구 출력을 제출하지 않으므로 requires_action에서 멈춘 run을 취소하고 끝날 때까지 기다립니다.
+
+    취소하지 못하면 원래 run을 반환해 호출하는 쪽이 lease를 유지하게 합니다.
+    """
+    try:
+        with openai_breaker:
+            client.beta.threads.runs.cancel(run.id, thread_id=thread_id)
+            return client.beta.threads.runs.poll(run.id, thread_id=thread_id)
+    except Exception as e:
+        print(f"WARNING: Unable to cancel run {run.id} waiting for action. {str(e)}")
+        return run
+
+def run_assistant_turn(client, thread, message_content, request_id=None, executor=None):
+    """사용자 메시지 하나에 대한 assistant 응답을 만들고 대화를 저장합니다.
+
+    (run 상태, 응답 텍스트)를 반환하며, run이 완료되지 않았다면 응답 텍스트는 None입니다.
+    호출하는 쪽에서 thread의 run lock을 잡고 있어야 하며, 상태가 RUN_ACTIVE_STATUSES에 있으면 lock을 풀지 않아야 합니다.
+    request_id가 있으면 이미 처리한 요청일 때 processed_requests.DuplicateRequestError를 발생시킵니다.
+    """
+    thread_id = thread['thread_id']
+    assistant_id = thread['assistant_id']
+    executor = executor or background_executor
+
+    # 응답 캐시는 이전 맥락이 없는 첫 메시지에만 사용
+    cacheable = response_cache.is_enabled() and not thread_has_context(thread)
+    cached_response = response_cache.get_cached_response(assistant_id, message_content) if cacheable else None
+
+    # 재시도된 요청이 메시지를 다시 올리고 run을 또 시작하지 않도록 OpenAI에 쓰기 직전에 기록
+    if request_id:
+        processed_requests.claim(request_id, thread_id)
+    try:
+        if cached_response is not None:
+            with openai_breaker:
+                user_message = client.beta.threads.messages.create(
+                    thread_id=thread_id,
+                    role="user",
+                    content=message_content
+                )
+        else:
+            # 사용자 메시지를 additional_messages로 넘겨 메시지 생성과 run 시작을 한 번의 요청으로 처리
+            instructions, truncation_strategy = build_run_context(thread)
+            with openai_breaker:
+                run = client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=assistant_id,
+                    instructions=instructions,
+                    truncation_strategy=truncation_strategy,
+                    additional_messages=[
+                        {"role": "user", "content": message_content}
+                    ]
+                )
+    except Exception:
+        if request_id:
+            processed_requests.release(request_id)
+        raise
+
+    if cached_response is not None:
+        reply_from_cache(client, thread_id, user_message, cached_response, executor)
+        update_thread_aggregates(thread_id, cached_response, 'assistant', 2)
+        return 'completed', cached_response
+
+    # 사용자 메시지 저장과 요약 갱신은 run 폴링과 동시에 진행하고 응답 전에 완료를 기다림.
+    # Lambda는 응답 후 프로세스를 멈추므로 요약 갱신이 다음 호출까지 걸쳐 있지 않도록
+    # OpenAI 호출 제한 시간과 같은 시간까지만 기다림
+    persist_future = executor.submit(persist_user_message, client, thread_id)
+    summary_future = executor.submit(refresh_thread_summary_safely, client, thread)
+    activity_future = executor.submit(update_thread_aggregates, thread_id, message_content, 'user', 1)
+    try:
+        poll_error = None
+        try:
+            with openai_breaker:
+                run = client.beta.threads.runs.poll(run.id, thread_id=thread_id)
+        except Exception as e:
+            poll_error = e
+        finally:
+            wait([persist_future, activity_future])
+        # run은 이미 시작됐으므로 사용자 메시지 저장 실패는 run 결과를 바꾸지 않고 기록만 남김
+        persist_error = persist_future.exception()
+        if persist_error:
+            print(f"ERROR: User message for thread {thread_id} was not saved to DynamoDB. {str(persist_error)}")
+            emit_metric('UserMessagePersistFailed', 1)
+
+        if poll_error:
+            # run은 이미 시작됐으므로 상태를 알 수 없으면 생성 시점의 상태(진행 중)를 반환해 호출하는 쪽이 lease를 유지하게 함
+            print(f"WARNING: Unable to poll run {run.id} for thread {thread_id}. {str(poll_error)}")
+            return run.status, None
+
+        if run.status == 'requires_action':
+            run = cancel_pending_run(client, thread_id, run)
+
+        if run.status != 'completed':
+            return run.status, None
+
+        with openai_breaker:
+            messages = client.beta.threads.messages.list(
+                thread_id=thread_id,
+                order='desc'
+            )
+
+        latest_message = messages.data[0]
+        latest_text = get_message_text(latest_message)
+        cache_future = executor.submit(put_cached_response_safely, assistant_id, message_content, latest_text) if cacheable else None
+        activity_future = executor.submit(update_thread_aggregates, thread_id, latest_text, 'assistant', 1)
+        try:
+            save_message_to_dynamodb_from_openai_message(latest_message)
+        finally:
+            wait([activity_future] + ([cache_future] if cache_future else []))
+
+        return run.status, latest_text
+    finally:
+        wait([summary_future], timeout=SUMMARY_TIMEOUT_SECONDS)
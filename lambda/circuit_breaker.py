@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import deque
+from metrics import emit_metric
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is temporarily unavailable")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """의존 서비스별 서킷 브레이커. 컨테이너 메모리의 롤링 윈도우로 오류율을 계산합니다.
+
+    오류율이 임계값을 넘으면 open 상태가 되어 호출을 즉시 거부하고, open_seconds 후
+    half-open 상태에서 제한된 수의 시험 호출로 복구 여부를 확인합니다.
+    """
+
+    def __init__(self, name, failure_exceptions=(Exception,), is_failure=None, window_seconds=60, min_calls=5,
+                 failure_rate_threshold=0.5, open_seconds=30, half_open_max_calls=1):
+        self.name = name
+        self.failure_exceptions = failure_exceptions
+        # failure_exceptions에 해당하는 예외를 더 세분화해 판단하는 함수 (예: 오류 코드 확인)
+        self.is_failure = is_failure
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        # (시각, 실패 여부)
+        self.outcomes = deque()
+        self.lock = threading.Lock()
+
+    def _transition(self, state):
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        emit_metric('CircuitBreakerTransition', 1, dimensions={'Dependency': self.name, 'State': state})
+
+    def _prune(self, now):
+        while self.outcomes and self.outcomes[0][0] < now - self.window_seconds:
+            self.outcomes.popleft()
+
+    def retry_after(self):
+        """open 상태라면 다시 시도할 수 있을 때까지 남은 초, 아니면 0을 반환합니다."""
+        with self.lock:
+            if self.state != OPEN:
+                return 0
+            return max(0, math.ceil(self.opened_at + self.open_seconds - time.monotonic()))
+
+    def before_call(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self.opened_at + self.open_seconds - now
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, math.ceil(remaining))
+                self._transition(HALF_OPEN)
+                self.half_open_calls = 0
+            if self.state == HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    raise CircuitOpenError(self.name, 1)
+                self.half_open_calls += 1
+
+    def record(self, failed):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                if failed:
+                    self.opened_at = now
+                    self._transition(OPEN)
+                else:
+                    self.outcomes.clear()
+                    self._transition(CLOSED)
+                return
+
+            self.outcomes.append((now, failed))
+            self._prune(now)
+            failures = sum(1 for _, outcome in self.outcomes if outcome)
+            if (self.state == CLOSED and len(self.outcomes) >= self.min_calls
+                    and failures / len(self.outcomes) >= self.failure_rate_threshold):
+                self.opened_at = now
+                self._transition(OPEN)
+
+    def __enter__(self):
+        self.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 잘못된 요청처럼 의존 서비스 장애가 아닌 예외는 실패로 세지 않음
+        failed = exc_type is not None and issubclass(exc_type, self.failure_exceptions)
+        if failed and self.is_failure is not None:
+            failed = self.is_failure(exc)
+        self.record(failed)
+        return False
@@ -0,0 +1,240 @@
+import json
+import os
+import time
+import uuid
+import boto3
+import openai
+from openai import OpenAI
+import pymysql
+from botocore.exceptions import BotoCoreError, ClientError
+from boto3.dynamodb.conditions import Attr
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+secrets_client = boto3.client('secretsmanager')
+
+dynamodb = boto3.resource('dynamodb')
+thread_table = dynamodb.Table('Thread')
+user_table = dynamodb.Table('User')
+
+# 조건부 쓰기 실패처럼 요청 자체에 대한 응답인 오류는 DynamoDB 장애로 보지 않음
+DYNAMODB_CLIENT_ERROR_CODES = ('ConditionalCheckFailedException', 'ValidationException', 'ResourceNotFoundException')
+
+def is_dynamodb_failure(error):
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') not in DYNAMODB_CLIENT_ERROR_CODES
+    return True
+
+# 의존 서비스별 서킷 브레이커 (상태는 컨테이너 메모리에 유지)
+rds_breaker = CircuitBreaker('rds', failure_exceptions=(pymysql.err.OperationalError, pymysql.err.InterfaceError))
+dynamodb_breaker = CircuitBreaker('dynamodb', failure_exceptions=(BotoCoreError, ClientError), is_failure=is_dynamodb_failure)
+openai_breaker = CircuitBreaker('openai', failure_exceptions=(
+    openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError, openai.RateLimitError
+))
+
+OPENAI_TIMEOUT_SECONDS = float(os.getenv('OPENAI_TIMEOUT_SECONDS', '30'))
+
+# thread당 하나의 run만 진행되도록 Thread 항목에 잡는 lease. 만료 시각이 지나면 다른 요청이 가져갈 수 있음
+RUN_LOCK_TTL_SECONDS = int(os.getenv('RUN_LOCK_TTL_SECONDS', '300'))
+RUN_LOCK_WAIT_SECONDS = float(os.getenv('RUN_LOCK_WAIT_SECONDS', '3'))
+RUN_LOCK_POLL_SECONDS = 0.25
+# 이 상태로 끝난 run은 아직 OpenAI thread를 점유하고 있으므로 lease를 풀지 않음
+RUN_ACTIVE_STATUSES = ('queued', 'in_progress', 'requires_action', 'cancelling')
+
+# 컨테이너 수명 동안 재사용하는 시크릿 캐시 (secret_name -> 파싱된 SecretString)
+secret_cache = {}
+
+def get_secret(secret_name, secret_string):
+    try:
+        secret = secret_cache.get(secret_name)
+        if secret is None:
+            response = secrets_client.get_secret_value(SecretId=secret_name)
+            secret = json.loads(response['SecretString'])
+            secret_cache[secret_name] = secret
+        return secret[secret_string]
+    except Exception as e:
+        raise Exception(f"Unable to retrieve secret: {str(e)}")
+    
+def get_user_from_dynamodb(user_id):
+    """DynamoDB에서 thread_id에 해당하는 user_id를 가져옵니다."""
+    try:
+        with dynamodb_breaker:
+            response = user_table.get_item(
+                Key={'user_id': user_id}
+            )
+        item = response.get('Item')
+        if not item:
+            raise ValueError(f"User ID {user_id} not found in DynamoDB")
+        
+        return user_id
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error retrieving user_id from DynamoDB: {str(e)}")
+    
+def get_thread_from_dynamodb(thread_id):
+    """DynamoDB에서 thread_id에 해당하는 Thread 항목을 가져옵니다."""
+    try:
+        with dynamodb_breaker:
+            response = thread_table.get_item(
+                Key={'thread_id': thread_id}
+            )
+        item = response.get('Item')
+        if not item:
+            raise ValueError(f"Thread ID {thread_id} not found in DynamoDB")
+        
+        if not item.get('assistant_id'):
+            raise ValueError(f"No assistant_id found for thread_id {thread_id}")
+
+        return item
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error retrieving thread from DynamoDB: {str(e)}")
+
+class ThreadBusyError(Exception):
+    def __init__(self, thread_id):
+        super().__init__(f"Thread {thread_id} already has an active run")
+        self.thread_id = thread_id
+
+def acquire_run_lock(thread_id):
+    """Thread 항목에 조건부 쓰기로 run lease를 잡습니다. 잠시 기다려도 얻지 못하면 ThreadBusyError를 발생시킵니다."""
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + RUN_LOCK_WAIT_SECONDS
+    while True:
+        now = int(time.time())
+        try:
+            with dynamodb_breaker:
+                thread_table.update_item(
+                    Key={'thread_id': thread_id},
+                    UpdateExpression='SET run_lock_token = :token, run_lock_expires_at = :expires_at',
+                    ConditionExpression='attribute_exists(thread_id) AND '
+                                        '(attribute_not_exists(run_lock_expires_at) OR run_lock_expires_at < :now)',
+                    ExpressionAttributeValues={
+                        ':token': token,
+                        ':expires_at': now + RUN_LOCK_TTL_SECONDS,
+                        ':now': now
+                    }
+                )
+            return token
+        except thread_table.meta.client.exceptions.ConditionalCheckFailedException:
+            if time.monotonic() >= deadline:
+                raise ThreadBusyError(thread_id)
+            time.sleep(RUN_LOCK_POLL_SECONDS)
+
+def release_run_lock(thread_id, token):
+    """자신이 잡은 lease일 때만 해제합니다. 실패해도 만료 시각이 지나면 자동으로 풀립니다."""
+    try:
+        thread_table.update_item(
+            Key={'thread_id': thread_id},
+            UpdateExpression='REMOVE run_lock_token, run_lock_expires_at',
+            ConditionExpression=Attr('run_lock_token').eq(token)
+        )
+    except thread_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+    except Exception as e:
+        print(f"WARNING: Unable to release run lock for thread {thread_id}. {str(e)}")
+
+def connect_to_rds():
+    try:
+        connection = pymysql.connect(
+            host=os.getenv('RDS_HOST'),
+            user=get_secret(os.getenv('SECRET_MANAGER_NAME'), 'username'),
+            password=get_secret(os.getenv('SECRET_MANAGER_NAME'), 'password'),
+            database=os.getenv('DB_NAME'),
+            connect_timeout=5,
+            # 재사용되는 연결이 이전 트랜잭션의 스냅샷을 읽지 않도록 autocommit 사용
+            autocommit=True
+        )
+        return connection
+    except Exception as e:
+        print(f"ERROR: Unable to connect to MySQL instance. {str(e)}")
+        raise e
+
+# Lambda init 단계에서 미리 준비하고 호출 간에 재사용하는 클라이언트와 연결
+openai_client = None
+rds_connection = None
+rds_last_used = 0.0
+
+# 이 시간(초) 이상 쉬었던 연결만 사용 전에 ping으로 확인
+RDS_PING_IDLE_SECONDS = 60
+
+def init_resources():
+    """시크릿 조회, OpenAI 클라이언트 생성, RDS 연결을 수행합니다."""
+    global openai_client, rds_connection, rds_last_used
+    openai_client = OpenAI(api_key=get_secret('prod/earthmera', 'OPENAI_API_KEY'), timeout=OPENAI_TIMEOUT_SECONDS)
+    # RDS를 쓰지 않는 함수(큐 워커)에는 RDS_HOST가 없으므로 연결하지 않음
+    if os.getenv('RDS_HOST'):
+        rds_connection = connect_to_rds()
+        rds_last_used = time.monotonic()
+
+def get_openai_client():
+    global openai_client
+    if openai_client is None:
+        openai_client = OpenAI(api_key=get_secret('prod/earthmera', 'OPENAI_API_KEY'), timeout=OPENAI_TIMEOUT_SECONDS)
+    return openai_client
+
+def get_rds_connection():
+    """init 단계에서 연 연결을 재사용하고, 끊겼거나 오래 쉬었으면 다시 연결합니다."""
+    global rds_connection, rds_last_used
+    now = time.monotonic()
+    if rds_connection is None or not rds_connection.open:
+        rds_connection = connect_to_rds()
+    elif now - rds_last_used > RDS_PING_IDLE_SECONDS:
+        rds_connection.ping(reconnect=True)
+    rds_last_used = now
+    return rds_connection
+
+def before_snapshot():
+    """스냅샷에 열린 소켓이 남지 않도록 연결을 닫습니다."""
+    global openai_client, rds_connection
+    if rds_connection is not None:
+        try:
+            rds_connection.close()
+        except Exception:
+            pass
+    if openai_client is not None:
+        openai_client.close()
+    rds_connection = None
+    openai_client = None
+
+def after_restore():
+    """스냅샷에서 복원된 뒤 소켓을 다시 엽니다."""
+    try:
+        init_resources()
+    except Exception as e:
+        print(f"WARNING: Unable to re-initialize resources after restore. {str(e)}")
+
+def service_unavailable_response(error):
+    return {
+        'statusCode': 503,
+        'body': json.dumps({'error': str(error)}),
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Retry-After': str(error.retry_after)
+        }
+    }
+
+def too_many_requests_response(error):
+    return {
+        'statusCode': 429,
+        'body': json.dumps({'error': str(error)}),
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Retry-After': str(error.retry_after)
+        }
+    }
+
+def conflict_response(error):
+    return {
+        'statusCode': 409,
+        'body': json.dumps({'error': str(error)}),
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Retry-After': '1'
+        }
+    }
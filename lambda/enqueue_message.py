@@ -0,0 +1,82 @@
+import json
+import time
+import uuid
+from common import (
+    get_rds_connection, get_user_from_dynamodb, get_thread_from_dynamodb,
+    rds_breaker, dynamodb_breaker, service_unavailable_response, too_many_requests_response
+)
+from auth_helper import verify_access_token
+from circuit_breaker import CircuitOpenError
+import rate_limiter
+from rate_limiter import RateLimitExceeded
+from message_queue import get_message_queue
+
+def lambda_handler(event, context):
+    try:
+        auth_header = event['headers'].get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise ValueError('Missing or invalid Authorization header')
+        access_token = auth_header.split(' ')[1]
+
+        with rds_breaker:
+            connection = get_rds_connection()
+            is_valid_token, token_user_id = verify_access_token(access_token, connection)
+        if not is_valid_token:
+            return {
+                'statusCode': 401,
+                'body': json.dumps({'error': 'Unauthorized - Invalid access token'})
+            }
+
+        with dynamodb_breaker:
+            rate_limiter.acquire(token_user_id)
+
+        body = json.loads(event['body'])
+        message_content = body['message']
+        thread_id = event['pathParameters']['thread_id']
+        if not thread_id:
+            raise ValueError("'thread_id' is required")
+
+        get_user_from_dynamodb(token_user_id)
+        get_thread_from_dynamodb(thread_id)
+    except CircuitOpenError as e:
+        return service_unavailable_response(e)
+    except RateLimitExceeded as e:
+        return too_many_requests_response(e)
+    except Exception as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    try:
+        request_id = uuid.uuid4().hex
+        get_message_queue().send(
+            {
+                'request_id': request_id,
+                'thread_id': thread_id,
+                'user_id': token_user_id,
+                'message': message_content,
+                'enqueued_at': int(time.time() * 1000)
+            },
+            group_id=thread_id,
+            deduplication_id=request_id
+        )
+
+        return {
+            'statusCode': 202,
+            'body': json.dumps({
+                'message': 'Message queued successfully',
+                'request_id': request_id,
+                'thread_id': thread_id
+            }),
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            }
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
@@ -0,0 +1,140 @@
+import json
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import boto3
+from boto3.dynamodb.conditions import Key
+from archive_store import get_archive_store, read_archived_messages
+from message_codec import decode_content, CONVERSATION_SORT_INDEX
+
+dynamodb = boto3.resource('dynamodb')
+convo_table = dynamodb.Table('Conversation')
+thread_table = dynamodb.Table('Thread')
+
+EXPORT_PAGE_SIZE = 500
+EXPORT_FORMATS = {
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'ndjson.gz': ('ndjson.gz', 'application/gzip')
+}
+
+# 다음 페이지를 미리 읽어 두는 전용 워커
+prefetch_executor = ThreadPoolExecutor(max_workers=1)
+
+def decimal_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError
+
+def query_conversation_page(thread_id, exclusive_start_key=None):
+    query_params = {
+        'IndexName': CONVERSATION_SORT_INDEX,
+        'KeyConditionExpression': Key('thread_id').eq(thread_id),
+        'ScanIndexForward': False,
+        'Limit': EXPORT_PAGE_SIZE
+    }
+    if exclusive_start_key:
+        query_params['ExclusiveStartKey'] = exclusive_start_key
+    return convo_table.query(**query_params)
+
+def iter_conversation_pages(thread_id):
+    """LastEvaluatedKey로 Conversation 파티션을 순회하며, 현재 페이지를 처리하는 동안 다음 페이지를 미리 읽습니다."""
+    future = prefetch_executor.submit(query_conversation_page, thread_id)
+    while future:
+        response = future.result()
+        last_key = response.get('LastEvaluatedKey')
+        future = prefetch_executor.submit(query_conversation_page, thread_id, last_key) if last_key else None
+        yield response.get('Items', [])
+
+def iter_archived_pages(archive):
+    """아카이브 blob을 청크 단위 범위 읽기로 순회합니다."""
+    store = get_archive_store()
+    chunk_size = int(archive['chunk_size'])
+    for start in range(0, int(archive['message_count']), chunk_size):
+        yield read_archived_messages(store, archive, start, start + chunk_size)
+
+def get_archive_pointer(thread_id):
+    response = thread_table.get_item(
+        Key={'thread_id': thread_id},
+        ProjectionExpression='#archive',
+        ExpressionAttributeNames={'#archive': 'archive'}
+    )
+    return response.get('Item', {}).get('archive')
+
+def write_export(writer, pages, compress):
+    """메시지를 한 줄씩 NDJSON으로 직렬화해 writer에 흘려보냅니다. 전체 목록을 메모리에 만들지 않습니다."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    count = 0
+    for page in pages:
+        lines = "".join(
+            json.dumps({
+                'message_id': msg['message_id'],
+                'role': msg['role'],
+                'content': decode_content(msg),
+                'created_at': msg['created_at']
+            }, ensure_ascii=False, default=decimal_default) + "\n"
+            for msg in page
+        ).encode('utf-8')
+        count += len(page)
+        writer.write(compressor.compress(lines) if compressor else lines)
+    if compressor:
+        writer.write(compressor.flush())
+    return count
+
+def lambda_handler(event, context):
+    try:
+        thread_id = event['pathParameters']['thread_id']
+        if not thread_id:
+            raise ValueError("'thread_id' is required")
+
+        query = event.get('queryStringParameters') or {}
+        export_format = query.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        extension, content_type = EXPORT_FORMATS[export_format]
+
+    except Exception as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    try:
+        store = get_archive_store()
+        key = f"exports/{thread_id}/{int(time.time())}.{extension}"
+
+        def pages():
+            # get_message_list와 같은 순서: DynamoDB의 최신 메시지 다음에 아카이브된 메시지
+            yield from iter_conversation_pages(thread_id)
+            archive = get_archive_pointer(thread_id)
+            if archive:
+                yield from iter_archived_pages(archive)
+
+        writer = store.open_writer(key, content_type)
+        try:
+            message_count = write_export(writer, pages(), compress=export_format.endswith('.gz'))
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Conversation exported successfully',
+                'thread_id': thread_id,
+                'format': export_format,
+                'message_count': message_count,
+                'download_url': store.get_download_url(key)
+            }),
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            }
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
@@ -1,57 +1,29 @@
 import json
-import boto3
-import os
-import pymysql
-from openai import OpenAI
-from datetime import datetime
+import time
 from auth_helper import verify_access_token
+from common import (
+    dynamodb, get_user_from_dynamodb, init_resources, get_openai_client, get_rds_connection,
+    before_snapshot, after_restore
+)
+# 새 thread에 기록되는 기본 context 정책 (assistant_turn에서 run truncation/요약에 사용)
+from assistant_turn import DEFAULT_CONTEXT_POLICY
 
-secrets_client = boto3.client('secretsmanager')
+try:
+    from snapshot_restore_py import register_before_snapshot, register_after_restore
+    register_before_snapshot(before_snapshot)
+    register_after_restore(after_restore)
+except ImportError:
+    pass
 
-dynamodb = boto3.resource('dynamodb')
-user_table = dynamodb.Table('User')
-
-def get_secret(secret_name, secret_string):
-    try:
-        response = secrets_client.get_secret_value(SecretId=secret_name)
-        secret = json.loads(response['SecretString'])
-        return secret[secret_string]
-    except Exception as e:
-        raise Exception(f"Unable to retrieve secret: {str(e)}")
-    
-def get_user_from_dynamodb(user_id):
-    """DynamoDB에서 thread_id에 해당하는 assistant_id를 가져옵니다."""
-    try:
-        response = user_table.get_item(
-            Key={'user_id': user_id}
-        )
-        item = response.get('Item')
-        if not item:
-            raise ValueError(f"User ID {user_id} not found in DynamoDB")
-        
-        return user_id
-
-    except Exception as e:
-        raise Exception(f"Error retrieving user_id from DynamoDB: {str(e)}")
-    
-def connect_to_rds():
-    try:
-        connection = pymysql.connect(
-            host=os.getenv('RDS_HOST'),
-            user=get_secret(os.getenv('SECRET_MANAGER_NAME'), 'username'),
-            password=get_secret(os.getenv('SECRET_MANAGER_NAME'), 'password'),
-            database=os.getenv('DB_NAME'),
-            connect_timeout=5
-        )
-        return connection
-    except Exception as e:
-        print(f"ERROR: Unable to connect to MySQL instance. {str(e)}")
-        raise e
-    
+# init 단계에서 실패해도 첫 요청에서 다시 시도하도록 예외를 삼킴
+try:
+    init_resources()
+except Exception as e:
+    print(f"WARNING: Init-phase prewarming failed. {str(e)}")
 
 def lambda_handler(event, context):
     try:
-        connection = connect_to_rds()
+        connection = get_rds_connection()
 
         auth_header = event['headers'].get('Authorization')
         if not auth_header or not auth_header.startswith('Bearer '):
@@ -75,12 +47,13 @@ def lambda_handler(event, context):
 
 
     try:
-        client = OpenAI(api_key=get_secret('prod/earthmera', 'OPENAI_API_KEY'))
+        client = get_openai_client()
         assistant_id = "asst_iq0TlYEMvruN29nxKPtttiJt"
         thread = client.beta.threads.create()
 
         thread_id = thread.id
-        created_at = datetime.utcnow().isoformat()
+        # Conversation의 created_at과 같은 epoch 초 단위로 저장
+        created_at = int(time.time())
 
         # DynamoDB에 thread 저장
         table = dynamodb.Table('Thread')
@@ -89,6 +62,11 @@ def lambda_handler(event, context):
                 'thread_id': thread_id,
                 'assistant_id': assistant_id,
                 'created_at': created_at,
+                'context_policy': DEFAULT_CONTEXT_POLICY,
+                # user_id-last_activity-index GSI로 사용자별 thread 목록을 조회
+                'user_id': token_user_id,
+                'last_activity': created_at,
+                'message_count': 0,
             }
         )
 
@@ -1,9 +1,18 @@
 import json
+import time
 import boto3
 from decimal import Decimal
+from archive_store import get_archive_store, read_archived_messages
+from message_codec import decode_content, make_sort_key, CONVERSATION_SORT_INDEX
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('Conversation')
+thread_table = dynamodb.Table('Thread')
+
+SYNC_MAX_PAGE_SIZE = 100
+# long-poll 모드에서 새 메시지를 기다리는 최대 시간과 조회 간격(초)
+LONG_POLL_MAX_SECONDS = 20
+LONG_POLL_INTERVAL_SECONDS = 1
 
 def decimal_default(obj):
     if isinstance(obj, Decimal):
@@ -23,6 +32,75 @@ def get_entry_count_by_thread_id(thread_id):
         print(f"Error: {e}")
         return None
 
+def get_archive_pointer(thread_id):
+    """아카이브된 thread라면 Thread 항목의 archive 포인터를 반환합니다."""
+    response = thread_table.get_item(
+        Key={'thread_id': thread_id},
+        ProjectionExpression='#archive',
+        ExpressionAttributeNames={'#archive': 'archive'}
+    )
+    return response.get('Item', {}).get('archive')
+
+def parse_watermark(since):
+    """since 값을 sort_key 하한으로 바꿉니다. sort_key 문자열 또는 created_at(epoch 초)을 받습니다.
+
+    sort_key(응답의 watermark)는 그 메시지 다음부터 조회합니다. created_at은 초 단위라 같은 초에
+    저장된 메시지를 구분할 수 없으므로 그 초의 메시지부터 다시 돌려주며, 클라이언트는 message_id로
+    중복을 걸러내고 다음 요청부터는 watermark를 보내야 합니다.
+    """
+    if isinstance(since, str) and '#' in since:
+        return since, False
+    return f"{int(since) * 1000:013d}", True
+
+def query_messages_since(thread_id, watermark, inclusive, limit):
+    key_condition = boto3.dynamodb.conditions.Key('thread_id').eq(thread_id)
+    sort_condition = boto3.dynamodb.conditions.Key('sort_key')
+    key_condition &= sort_condition.gte(watermark) if inclusive else sort_condition.gt(watermark)
+    return table.query(
+        IndexName=CONVERSATION_SORT_INDEX,
+        KeyConditionExpression=key_condition,
+        ScanIndexForward=True,
+        Limit=limit
+    )
+
+def sync_messages(thread_id, since, page_size, wait_seconds, context):
+    """watermark 이후의 새 메시지만 오래된 순으로 반환합니다. wait_seconds가 있으면 새 메시지를 잠시 기다립니다."""
+    watermark, inclusive = parse_watermark(since)
+    deadline = time.monotonic() + min(wait_seconds, LONG_POLL_MAX_SECONDS)
+    if context is not None:
+        # Lambda 제한 시간 안에 응답할 수 있도록 여유를 둠
+        deadline = min(deadline, time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 2)
+
+    while True:
+        response = query_messages_since(thread_id, watermark, inclusive, page_size)
+        messages = response.get('Items', [])
+        if messages or time.monotonic() + LONG_POLL_INTERVAL_SECONDS > deadline:
+            break
+        time.sleep(LONG_POLL_INTERVAL_SECONDS)
+
+    message_list = [
+        {
+            'message_id': msg['message_id'],
+            'role': msg['role'],
+            'content': decode_content(msg),
+            'created_at': msg['created_at']
+        }
+        for msg in messages
+    ]
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message_list': message_list,
+            'watermark': messages[-1]['sort_key'] if messages else since,
+            'has_more': 'LastEvaluatedKey' in response
+        }, default=decimal_default),
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        }
+    }
+
 def lambda_handler(event, context):
     try:
         thread_id = event['pathParameters']['thread_id']
@@ -35,38 +113,72 @@ def lambda_handler(event, context):
         if not thread_id:
             raise ValueError("'thread_id' is required")
 
-        query_params = {
-            'KeyConditionExpression': boto3.dynamodb.conditions.Key('thread_id').eq(thread_id),
-            'Limit': page_size * page_number,
-            'ScanIndexForward': False
-        }
-
-        response = table.query(**query_params)
-        
-        messages = response.get('Items', [])
+        # since가 있으면 클라이언트가 가진 마지막 메시지 이후만 범위 쿼리로 조회
+        if body.get('since') is not None:
+            return sync_messages(
+                thread_id,
+                body['since'],
+                min(page_size, SYNC_MAX_PAGE_SIZE),
+                float(body.get('wait', 0)),
+                context
+            )
 
         start_index = (page_number - 1) * page_size
         end_index = start_index + page_size
-        paged_messages = messages[start_index:end_index]
+
+        # DynamoDB에 남아 있는 최신 메시지 다음에 아카이브된 이전 메시지가 이어짐
+        live_count = get_entry_count_by_thread_id(thread_id)
+        archive = get_archive_pointer(thread_id)
+        archived_count = int(archive['message_count']) if archive else 0
+
+        paged_messages = []
+        if start_index < live_count:
+            # message_id가 아닌 시간순 sort_key 인덱스로 최신 메시지부터 조회
+            query_params = {
+                'IndexName': CONVERSATION_SORT_INDEX,
+                'KeyConditionExpression': boto3.dynamodb.conditions.Key('thread_id').eq(thread_id),
+                'Limit': page_size * page_number,
+                'ScanIndexForward': False
+            }
+
+            response = table.query(**query_params)
+            
+            messages = response.get('Items', [])
+            paged_messages = messages[start_index:end_index]
+
+        if archive and end_index > live_count:
+            paged_messages += read_archived_messages(
+                get_archive_store(),
+                archive,
+                max(start_index - live_count, 0),
+                end_index - live_count
+            )
 
         message_list = [
             {
                 'message_id': msg['message_id'],
                 'role': msg['role'],
-                'content': msg['content'],
+                'content': decode_content(msg),
                 'created_at': msg['created_at']
             }
             for msg in paged_messages
         ]
 
-        total_pages = (get_entry_count_by_thread_id(thread_id) + page_size - 1) // page_size
+        total_pages = (live_count + archived_count + page_size - 1) // page_size
+
+        # 첫 페이지의 가장 최신 메시지가 이후 since 동기화의 시작점
+        watermark = None
+        if page_number == 1 and paged_messages:
+            newest = paged_messages[0]
+            watermark = newest.get('sort_key') or make_sort_key(newest['created_at'], newest['message_id'], newest['role'])
 
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message_list': message_list,
                 'total_pages': total_pages,
-                'current_page': page_number
+                'current_page': page_number,
+                'watermark': watermark
             }, default=decimal_default),
             'headers': {
                 'Content-Type': 'application/json',
@@ -0,0 +1,112 @@
+import base64
+import json
+from decimal import Decimal
+import boto3
+from boto3.dynamodb.conditions import Key
+from common import (
+    get_rds_connection, rds_breaker, dynamodb_breaker, service_unavailable_response
+)
+from auth_helper import verify_access_token
+from circuit_breaker import CircuitOpenError
+
+dynamodb = boto3.resource('dynamodb')
+thread_table = dynamodb.Table('Thread')
+
+THREAD_USER_INDEX = 'user_id-last_activity-index'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def decimal_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError
+
+def encode_cursor(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, default=decimal_default).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def lambda_handler(event, context):
+    try:
+        auth_header = event['headers'].get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise ValueError('Missing or invalid Authorization header')
+        access_token = auth_header.split(' ')[1]
+
+        with rds_breaker:
+            connection = get_rds_connection()
+            is_valid_token, token_user_id = verify_access_token(access_token, connection)
+        if not is_valid_token:
+            return {
+                'statusCode': 401,
+                'body': json.dumps({'error': 'Unauthorized - Invalid access token'})
+            }
+
+        query = event.get('queryStringParameters') or {}
+        page_size = min(int(query.get('pageSize', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        exclusive_start_key = decode_cursor(query.get('cursor'))
+        if exclusive_start_key and exclusive_start_key.get('user_id') != token_user_id:
+            raise ValueError("Invalid cursor")
+    except CircuitOpenError as e:
+        return service_unavailable_response(e)
+    except Exception as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
+
+    try:
+        # 최근 활동 순으로 사용자의 thread를 인덱스 쿼리 한 번으로 조회
+        query_params = {
+            'IndexName': THREAD_USER_INDEX,
+            'KeyConditionExpression': Key('user_id').eq(token_user_id),
+            'ScanIndexForward': False,
+            'Limit': page_size
+        }
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
+
+        with dynamodb_breaker:
+            response = thread_table.query(**query_params)
+
+        thread_list = [
+            {
+                'thread_id': item['thread_id'],
+                'assistant_id': item.get('assistant_id'),
+                'created_at': item.get('created_at'),
+                'last_activity': item.get('last_activity'),
+                'message_count': item.get('message_count', 0),
+                'last_message_preview': item.get('last_message_preview'),
+                'last_message_role': item.get('last_message_role')
+            }
+            for item in response.get('Items', [])
+        ]
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'thread_list': thread_list,
+                'next_cursor': encode_cursor(response.get('LastEvaluatedKey'))
+            }, default=decimal_default),
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            }
+        }
+
+    except CircuitOpenError as e:
+        return service_unavailable_response(e)
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'error': str(e)})
+        }
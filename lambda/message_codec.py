@@ -0,0 +1,53 @@
+import os
+import zlib
+
+# 이 크기(바이트)를 넘는 content는 압축해 Binary 속성으로 저장
+CONTENT_COMPRESSION_THRESHOLD = int(os.getenv('CONTENT_COMPRESSION_THRESHOLD', '1024'))
+CONTENT_COMPRESSION_LEVEL = 6
+
+FORMAT_ZLIB = 'zlib'
+
+# Conversation 테이블의 시간순 정렬용 GSI (thread_id HASH, sort_key RANGE)
+CONVERSATION_SORT_INDEX = 'thread_id-sort_key-index'
+
+# Query/GetItem의 ProjectionExpression에 content 대신 사용할 속성 목록
+CONTENT_ATTRIBUTES = ('content', 'content_z', 'content_format')
+
+
+def encode_content(content):
+    """content를 Conversation 항목에 저장할 속성으로 변환합니다.
+
+    임계값을 넘고 압축 효과가 있으면 content_z(Binary)와 content_format 표시를 사용합니다.
+    """
+    raw = content.encode('utf-8')
+    if len(raw) > CONTENT_COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(raw, CONTENT_COMPRESSION_LEVEL)
+        if len(compressed) < len(raw):
+            return {'content_z': compressed, 'content_format': FORMAT_ZLIB}
+    return {'content': content}
+
+
+# 같은 초에 만들어진 메시지의 순서 (한 턴 안에서는 사용자 메시지가 assistant 응답보다 먼저)
+ROLE_ORDER = {'user': 0, 'assistant': 1}
+
+
+def make_sort_key(created_at, message_id, role):
+    """시간순으로 정렬되는 sort_key를 만듭니다: 13자리 epoch 밀리초 + '#' + 역할 순서 + '#' + message_id.
+
+    created_at은 epoch 초(OpenAI 메시지)라 밀리초 자리는 항상 000입니다. 같은 초의 메시지는
+    무작위인 message_id보다 먼저 역할 순서로 정렬해 사용자 메시지와 그 응답이 뒤바뀌지 않게 합니다.
+    """
+    return f"{int(created_at) * 1000:013d}#{ROLE_ORDER.get(role, len(ROLE_ORDER))}#{message_id}"
+
+
+def decode_content(item):
+    """Conversation 항목에서 content 문자열을 복원합니다."""
+    content_format = item.get('content_format')
+    if content_format is None:
+        return item.get('content', '')
+    if content_format == FORMAT_ZLIB:
+        data = item['content_z']
+        # boto3 resource는 Binary 래퍼를, client는 bytes를 반환
+        data = getattr(data, 'value', data)
+        return zlib.decompress(data).decode('utf-8')
+    raise ValueError(f"Unknown content format: {content_format}")
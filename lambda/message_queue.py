@@ -0,0 +1,85 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+import boto3
+
+MESSAGE_QUEUE_BACKEND = os.getenv('MESSAGE_QUEUE_BACKEND', 'sqs')
+MESSAGE_QUEUE_URL = os.getenv('MESSAGE_QUEUE_URL')
+
+
+class SQSMessageQueue:
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self.client = boto3.client('sqs')
+        self.fifo = queue_url.endswith('.fifo')
+
+    def send(self, body, group_id=None, deduplication_id=None):
+        params = {'QueueUrl': self.queue_url, 'MessageBody': json.dumps(body)}
+        # FIFO 큐에서는 thread 단위로 순서를 보장
+        if self.fifo:
+            params['MessageGroupId'] = group_id
+            params['MessageDeduplicationId'] = deduplication_id
+        return self.client.send_message(**params)['MessageId']
+
+
+class InMemoryMessageQueue:
+    """SQS 이벤트와 같은 형식의 레코드를 돌려주는 메모리 큐 (테스트/로컬 실행용)"""
+
+    def __init__(self):
+        self.messages = deque()
+        self.in_flight = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def send(self, body, group_id=None, deduplication_id=None):
+        with self.lock:
+            message_id = f"local-{next(self.ids)}"
+            self.messages.append({
+                'messageId': message_id,
+                'body': json.dumps(body),
+                'attributes': {'SentTimestamp': str(int(time.time() * 1000))}
+            })
+            return message_id
+
+    def receive(self, max_messages=10):
+        with self.lock:
+            records = []
+            while self.messages and len(records) < max_messages:
+                record = self.messages.popleft()
+                self.in_flight[record['messageId']] = record
+                records.append(record)
+            return records
+
+    def delete(self, message_id):
+        with self.lock:
+            self.in_flight.pop(message_id, None)
+
+    def release(self, message_id):
+        """처리에 실패한 메시지를 다시 큐에 넣습니다 (SQS visibility timeout 만료에 해당)."""
+        with self.lock:
+            record = self.in_flight.pop(message_id, None)
+            if record:
+                self.messages.append(record)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+in_memory_queue = None
+
+
+def get_message_queue(backend=None):
+    global in_memory_queue
+    backend = backend or MESSAGE_QUEUE_BACKEND
+    if backend == 'memory':
+        if in_memory_queue is None:
+            in_memory_queue = InMemoryMessageQueue()
+        return in_memory_queue
+    if backend == 'sqs':
+        if not MESSAGE_QUEUE_URL:
+            raise ValueError("MESSAGE_QUEUE_URL is required for the sqs queue backend")
+        return SQSMessageQueue(MESSAGE_QUEUE_URL)
+    raise ValueError(f"Unknown message queue backend: {backend}")
@@ -0,0 +1,22 @@
+import json
+import os
+import time
+
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'AIAssistant')
+
+
+def emit_metric(name, value, unit='Count', dimensions=None):
+    """CloudWatch Embedded Metric Format(EMF)으로 메트릭을 로그에 기록합니다."""
+    dimensions = dimensions or {}
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [list(dimensions.keys())],
+                'Metrics': [{'Name': name, 'Unit': unit}]
+            }]
+        },
+        name: value,
+        **dimensions
+    }))
@@ -0,0 +1,122 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from common import (
+    get_openai_client, get_thread_from_dynamodb, acquire_run_lock, release_run_lock, RUN_ACTIVE_STATUSES
+)
+from assistant_turn import run_assistant_turn, TURN_BACKGROUND_JOBS
+from processed_requests import DuplicateRequestError
+from message_queue import get_message_queue
+from metrics import emit_metric
+
+# 서로 다른 thread를 동시에 처리하는 워커 수. 같은 thread의 메시지는 순서대로 처리
+WORKER_MAX_THREADS = int(os.getenv('WORKER_MAX_THREADS', '4'))
+
+worker_executor = ThreadPoolExecutor(max_workers=WORKER_MAX_THREADS)
+# 워커마다 run 하나의 백그라운드 작업을 동시에 처리할 수 있도록 따로 둔 풀
+turn_executor = ThreadPoolExecutor(max_workers=WORKER_MAX_THREADS * TURN_BACKGROUND_JOBS)
+
+def group_records_by_thread(records):
+    """레코드를 thread_id별로 묶습니다. 각 thread 안에서는 수신 순서를 유지합니다.
+
+    본문을 읽을 수 없는 레코드는 그 레코드만 실패로 돌립니다. FIFO 큐에서는 순서를 지키기 위해
+    같은 MessageGroupId의 뒤따르는 레코드도 함께 실패로 돌립니다.
+    (thread_id별 묶음, 실패한 messageId 목록)을 반환합니다.
+    """
+    groups = OrderedDict()
+    failed_ids = []
+    blocked_groups = set()
+    for record in records:
+        group_id = record.get('attributes', {}).get('MessageGroupId')
+        if group_id is not None and group_id in blocked_groups:
+            failed_ids.append(record['messageId'])
+            continue
+        try:
+            body = json.loads(record['body'])
+            thread_id = body['thread_id']
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"ERROR: Unable to read message {record['messageId']}. {str(e)}")
+            failed_ids.append(record['messageId'])
+            if group_id is not None:
+                blocked_groups.add(group_id)
+            continue
+        groups.setdefault(thread_id, []).append((record, body))
+    return groups, failed_ids
+
+def record_queue_lag(record, body):
+    sent_at = int(record.get('attributes', {}).get('SentTimestamp') or body.get('enqueued_at') or 0)
+    if sent_at:
+        emit_metric('QueueLag', int(time.time() * 1000) - sent_at, unit='Milliseconds')
+
+def process_thread_records(thread_id, items):
+    """한 thread의 메시지를 순서대로 처리하고 실패한 messageId 목록을 반환합니다.
+
+    하나가 실패하면 순서를 지키기 위해 뒤따르는 메시지도 함께 실패로 돌려 재시도하게 합니다.
+    이미 run을 시작한 요청이 재시도로 다시 들어오면 처리하지 않고 건너뜁니다.
+    """
+    client = get_openai_client()
+    for index, (record, body) in enumerate(items):
+        record_queue_lag(record, body)
+        try:
+            thread = get_thread_from_dynamodb(thread_id)
+            run_lock_token = acquire_run_lock(thread_id)
+            status = None
+            try:
+                status, _ = run_assistant_turn(
+                    client, thread, body['message'], request_id=body.get('request_id'), executor=turn_executor
+                )
+            finally:
+                if status not in RUN_ACTIVE_STATUSES:
+                    release_run_lock(thread_id, run_lock_token)
+            if status != 'completed':
+                print(f"WARNING: Run for request {body.get('request_id')} finished with status {status}")
+        except DuplicateRequestError:
+            print(f"WARNING: Skipping already processed request {body.get('request_id')}")
+        except Exception as e:
+            print(f"ERROR: Unable to process request {body.get('request_id')} for thread {thread_id}. {str(e)}")
+            return [failed_record['messageId'] for failed_record, _ in items[index:]]
+    return []
+
+def process_records(records):
+    started_at = time.monotonic()
+    groups, failed_ids = group_records_by_thread(records)
+    futures = [
+        worker_executor.submit(process_thread_records, thread_id, items)
+        for thread_id, items in groups.items()
+    ]
+    failed_ids += [message_id for future in futures for message_id in future.result()]
+
+    elapsed = time.monotonic() - started_at
+    processed = len(records) - len(failed_ids)
+    emit_metric('WorkerBatchSize', len(records))
+    emit_metric('WorkerFailedMessages', len(failed_ids))
+    if elapsed > 0:
+        emit_metric('WorkerThroughput', processed / elapsed, unit='Count/Second')
+    return failed_ids
+
+def drain_queue(queue=None, batch_size=10):
+    """큐에서 직접 배치를 가져와 처리합니다 (메모리 큐를 사용하는 로컬 실행/테스트용)."""
+    queue = queue or get_message_queue()
+    processed = 0
+    while True:
+        records = queue.receive(batch_size)
+        if not records:
+            return processed
+        failed_ids = set(process_records(records))
+        for record in records:
+            if record['messageId'] in failed_ids:
+                queue.release(record['messageId'])
+            else:
+                queue.delete(record['messageId'])
+                processed += 1
+        if failed_ids:
+            return processed
+
+def lambda_handler(event, context):
+    """SQS 이벤트 소스에서 호출되며, 실패한 메시지만 batchItemFailures로 돌려줍니다."""
+    failed_ids = process_records(event.get('Records', []))
+    return {
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed_ids]
+    }
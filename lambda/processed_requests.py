@@ -0,0 +1,40 @@
+import os
+import time
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+# SQS 메시지 보존 기간(최대 14일) 동안은 같은 request_id의 재시도를 걸러낼 수 있도록 유지
+PROCESSED_REQUEST_TTL_SECONDS = int(os.getenv('PROCESSED_REQUEST_TTL_SECONDS', str(14 * 86400)))
+
+dynamodb = boto3.resource('dynamodb')
+# request_id(HASH) 테이블, expires_at 속성에 DynamoDB TTL 설정
+request_table = dynamodb.Table(os.getenv('PROCESSED_REQUEST_TABLE', 'ProcessedRequest'))
+
+
+class DuplicateRequestError(Exception):
+    def __init__(self, request_id):
+        super().__init__(f"Request {request_id} was already processed")
+        self.request_id = request_id
+
+
+def claim(request_id, thread_id):
+    """조건부 쓰기로 request_id를 기록합니다. 이미 기록되어 있으면 DuplicateRequestError를 발생시킵니다."""
+    try:
+        request_table.put_item(
+            Item={
+                'request_id': request_id,
+                'thread_id': thread_id,
+                'expires_at': int(time.time()) + PROCESSED_REQUEST_TTL_SECONDS
+            },
+            ConditionExpression=Attr('request_id').not_exists()
+        )
+    except request_table.meta.client.exceptions.ConditionalCheckFailedException:
+        raise DuplicateRequestError(request_id)
+
+
+def release(request_id):
+    """OpenAI에 아무것도 쓰지 못한 요청의 기록을 지워 재시도할 수 있게 합니다."""
+    try:
+        request_table.delete_item(Key={'request_id': request_id})
+    except Exception as e:
+        print(f"WARNING: Unable to release request {request_id}. {str(e)}")
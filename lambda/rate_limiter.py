@@ -0,0 +1,114 @@
+import math
+import os
+import threading
+import time
+from decimal import Decimal
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+RATE_LIMIT_CAPACITY = int(os.getenv('RATE_LIMIT_CAPACITY', '20'))
+RATE_LIMIT_REFILL_PER_SECOND = float(os.getenv('RATE_LIMIT_REFILL_PER_SECOND', '0.2'))
+# DynamoDB에서 한 번에 예약해 컨테이너에 보관하는 토큰 수
+RATE_LIMIT_RESERVE_BATCH = int(os.getenv('RATE_LIMIT_RESERVE_BATCH', '3'))
+# 로컬 예약 토큰의 유효 시간. 지나면 남은 토큰은 버려짐
+RATE_LIMIT_RESERVATION_SECONDS = float(os.getenv('RATE_LIMIT_RESERVATION_SECONDS', '10'))
+RATE_LIMIT_MAX_ATTEMPTS = 5
+
+dynamodb = boto3.resource('dynamodb')
+# user_id(HASH) 테이블, expires_at 속성에 DynamoDB TTL 설정
+bucket_table = dynamodb.Table(os.getenv('RATE_LIMIT_TABLE', 'RateLimit'))
+
+# user_id -> [남은 예약 토큰 수, 만료 시각]
+local_reservations = {}
+lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, user_id, retry_after):
+        super().__init__(f"Rate limit exceeded for user {user_id}")
+        self.user_id = user_id
+        self.retry_after = retry_after
+
+
+def _bucket_update(user_id, update_expression, condition_expression, values, now):
+    bucket_table.update_item(
+        Key={'user_id': user_id},
+        UpdateExpression=update_expression + ', expires_at = :expires_at',
+        ConditionExpression=condition_expression,
+        ExpressionAttributeValues={
+            **values,
+            ':expires_at': int(now + RATE_LIMIT_CAPACITY / RATE_LIMIT_REFILL_PER_SECOND + 3600)
+        },
+        ReturnValuesOnConditionCheckFailure='ALL_OLD'
+    )
+
+
+def reserve_tokens(user_id, count):
+    """DynamoDB 토큰 버킷에서 최대 count개의 토큰을 조건부 UpdateItem 한 번으로 가져옵니다.
+
+    버킷은 토큰 수 대신 버킷이 다시 가득 차는 시각(full_at)으로 저장합니다 (GCRA).
+    토큰 n개를 쓰면 full_at이 n / 보충 속도만큼 늦춰지므로 보충과 차감이 full_at에 대한
+    덧셈 하나가 되고, 다른 컨테이너와 동시에 가져가도 토큰이 남아 있는 한 조건이 깨지지 않습니다.
+    """
+    interval = 1 / RATE_LIMIT_REFILL_PER_SECOND
+    window = RATE_LIMIT_CAPACITY * interval
+    full_at = None
+    for _ in range(RATE_LIMIT_MAX_ATTEMPTS):
+        now = time.time()
+        if full_at is None or full_at <= now:
+            available = RATE_LIMIT_CAPACITY
+        else:
+            available = int((now + window - full_at) / interval + 1e-9)
+        if available < 1:
+            raise RateLimitExceeded(user_id, math.ceil(full_at + interval - window - now))
+
+        taken = min(count, available)
+        try:
+            if full_at is None or full_at <= now:
+                # 가득 찬 버킷 (처음 쓰거나 이전 형식의 항목 포함)
+                _bucket_update(
+                    user_id,
+                    'SET full_at = :full_at',
+                    'attribute_not_exists(full_at) OR full_at <= :now',
+                    {':full_at': Decimal(str(round(now + taken * interval, 6))), ':now': Decimal(str(round(now, 6)))},
+                    now
+                )
+            else:
+                increment = taken * interval
+                _bucket_update(
+                    user_id,
+                    'SET full_at = full_at + :increment',
+                    'full_at > :now AND full_at <= :limit',
+                    {
+                        ':increment': Decimal(str(round(increment, 6))),
+                        ':now': Decimal(str(round(now, 6))),
+                        ':limit': Decimal(str(round(now + window - increment, 6)))
+                    },
+                    now
+                )
+            return taken
+        except bucket_table.meta.client.exceptions.ConditionalCheckFailedException as e:
+            # 다른 컨테이너가 먼저 토큰을 가져갔으므로 실패 응답에 담긴 현재 full_at으로 다시 계산
+            old = e.response.get('Item', {}).get('full_at')
+            full_at = float(old['N']) if old else None
+
+    raise RateLimitExceeded(user_id, 1)
+
+
+def acquire(user_id):
+    """요청 하나에 필요한 토큰을 가져옵니다. 로컬 예약분이 있으면 DynamoDB 쓰기 없이 처리합니다."""
+    with lock:
+        reservation = local_reservations.get(user_id)
+        if reservation and reservation[0] > 0 and reservation[1] > time.monotonic():
+            reservation[0] -= 1
+            return
+
+    try:
+        reserved = reserve_tokens(user_id, RATE_LIMIT_RESERVE_BATCH)
+    except (BotoCoreError, ClientError) as e:
+        # 버킷 테이블 장애로 요청을 거절하지 않도록 제한 없이 통과시킴
+        print(f"WARNING: Unable to reserve rate limit tokens for user {user_id}. {str(e)}")
+        return
+
+    with lock:
+        local_reservations[user_id] = [reserved - 1, time.monotonic() + RATE_LIMIT_RESERVATION_SECONDS]
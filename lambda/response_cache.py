@@ -0,0 +1,93 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import boto3
+from metrics import emit_metric
+
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '86400'))
+RESPONSE_CACHE_LRU_SIZE = int(os.getenv('RESPONSE_CACHE_LRU_SIZE', '256'))
+
+dynamodb = boto3.resource('dynamodb')
+# cache_key(HASH) 테이블, expires_at 속성에 DynamoDB TTL 설정
+cache_table = dynamodb.Table(os.getenv('RESPONSE_CACHE_TABLE', 'ResponseCache'))
+
+# 컨테이너 메모리의 LRU: cache_key -> (response, expires_at)
+local_cache = OrderedDict()
+# 백그라운드 워커 스레드에서도 갱신되므로 local_cache 접근은 lock으로 보호
+lock = threading.Lock()
+
+
+def is_enabled():
+    return RESPONSE_CACHE_ENABLED
+
+
+def normalize_prompt(prompt):
+    """대소문자, 유니코드 표기, 공백 차이를 무시하도록 프롬프트를 정규화합니다."""
+    prompt = unicodedata.normalize('NFKC', prompt).casefold()
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def make_cache_key(assistant_id, prompt):
+    digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    return f"{assistant_id}#{digest}"
+
+
+def _remember(cache_key, response, expires_at):
+    with lock:
+        local_cache[cache_key] = (response, expires_at)
+        local_cache.move_to_end(cache_key)
+        while len(local_cache) > RESPONSE_CACHE_LRU_SIZE:
+            local_cache.popitem(last=False)
+
+
+def _recall(cache_key, now):
+    """만료되지 않은 LRU 항목의 응답을 반환하고, 만료된 항목은 지웁니다."""
+    with lock:
+        entry = local_cache.get(cache_key)
+        if entry and entry[1] > now:
+            local_cache.move_to_end(cache_key)
+            return entry[0]
+        local_cache.pop(cache_key, None)
+        return None
+
+
+def get_cached_response(assistant_id, prompt):
+    """캐시된 응답을 LRU, DynamoDB 순서로 조회합니다. 없으면 None을 반환합니다."""
+    cache_key = make_cache_key(assistant_id, prompt)
+    now = int(time.time())
+
+    response = _recall(cache_key, now)
+    if response is None:
+        try:
+            item = cache_table.get_item(Key={'cache_key': cache_key}).get('Item')
+        except Exception as e:
+            print(f"WARNING: Unable to read response cache. {str(e)}")
+            item = None
+        # TTL 삭제는 지연될 수 있으므로 만료 시각을 직접 확인
+        if item and int(item['expires_at']) > now:
+            response = item['response']
+            _remember(cache_key, response, int(item['expires_at']))
+
+    # ResponseCacheHit의 평균값이 assistant별 적중률
+    emit_metric('ResponseCacheHit', 1 if response is not None else 0, dimensions={'AssistantId': assistant_id})
+    return response
+
+
+def put_cached_response(assistant_id, prompt, response):
+    """응답을 DynamoDB와 LRU에 저장합니다."""
+    cache_key = make_cache_key(assistant_id, prompt)
+    expires_at = int(time.time()) + RESPONSE_CACHE_TTL_SECONDS
+    cache_table.put_item(
+        Item={
+            'cache_key': cache_key,
+            'assistant_id': assistant_id,
+            'response': response,
+            'expires_at': expires_at
+        }
+    )
+    _remember(cache_key, response, expires_at)
@@ -113,14 +113,34 @@ def ed25519_password(password, scramble):
     return R + S
 
 
-# sha256_password
+# Multi-step auth exchanges are written as generators ("steps") so that the
+# blocking and the asyncio connection drive the same state machine.  A steps
+# generator yields the payload of the next packet to send, or None to only
+# read the next packet, and is sent back the server's reply (already checked
+# for errors).  The reply to the last step is the result of the exchange.
+
+
+def run_steps(conn, steps):
+    """Drive steps over a blocking connection; return the last reply."""
+    pkt = None
+    try:
+        data = next(steps)
+        while True:
+            if data is not None:
+                conn.write_packet(data)
+            pkt = conn._read_packet()
+            pkt.check_error()
+            data = steps.send(pkt)
+    except StopIteration:
+        return pkt
 
 
-def _roundtrip(conn, send_data):
-    conn.write_packet(send_data)
-    pkt = conn._read_packet()
-    pkt.check_error()
-    return pkt
+def send_step(data):
+    """Steps of a plugin that answers with a single packet."""
+    yield data
+
+
+# sha256_password
 
 
 def _xor_password(password, salt):
@@ -157,12 +177,13 @@ def sha2_rsa_encrypt(password, salt, public_key):
     )
 
 
-def sha256_password_auth(conn, pkt):
+def sha256_password_steps(conn, pkt):
     if conn._secure:
         if DEBUG:
             print("sha256: Sending plain password")
         data = conn.password + b"\0"
-        return _roundtrip(conn, data)
+        yield data
+        return
 
     if pkt.is_auth_switch_request():
         conn.salt = pkt.read_all()
@@ -170,10 +191,10 @@ def sha256_password_auth(conn, pkt):
             # Request server public key
             if DEBUG:
                 print("sha256: Requesting server public key")
-            pkt = _roundtrip(conn, b"\1")
+            pkt = yield b"\1"
 
     if pkt.is_extra_auth_data():
-        conn.server_public_key = pkt._data[1:]
+        conn.server_public_key = pkt.get_all_data()[1:]
         if DEBUG:
             print("Received public key:\n", conn.server_public_key.decode("ascii"))
 
@@ -185,7 +206,11 @@ def sha256_password_auth(conn, pkt):
     else:
         data = b""
 
-    return _roundtrip(conn, data)
+    yield data
+
+
+def sha256_password_auth(conn, pkt):
+    return run_steps(conn, sha256_password_steps(conn, pkt))
 
 
 def scramble_caching_sha2(password, nonce):
@@ -208,10 +233,11 @@ def scramble_caching_sha2(password, nonce):
     return bytes(res)
 
 
-def caching_sha2_password_auth(conn, pkt):
+def caching_sha2_password_steps(conn, pkt):
     # No password fast path
     if not conn.password:
-        return _roundtrip(conn, b"")
+        yield b""
+        return
 
     if pkt.is_auth_switch_request():
         # Try from fast auth
@@ -219,12 +245,12 @@ def caching_sha2_password_auth(conn, pkt):
             print("caching sha2: Trying fast path")
         conn.salt = pkt.read_all()
         scrambled = scramble_caching_sha2(conn.password, conn.salt)
-        pkt = _roundtrip(conn, scrambled)
+        pkt = yield scrambled
     # else: fast auth is tried in initial handshake
 
     if not pkt.is_extra_auth_data():
         raise OperationalError(
-            "caching sha2: Unknown packet for fast auth: %s" % pkt._data[:1]
+            "caching sha2: Unknown packet for fast auth: %s" % pkt.get_bytes(0)
         )
 
     # magic numbers:
@@ -238,9 +264,8 @@ def caching_sha2_password_auth(conn, pkt):
     if n == 3:
         if DEBUG:
             print("caching sha2: succeeded by fast path.")
-        pkt = conn._read_packet()
-        pkt.check_error()  # pkt must be OK packet
-        return pkt
+        yield None  # OK packet
+        return
 
     if n != 4:
         raise OperationalError("caching sha2: Unknown result for fast auth: %s" % n)
@@ -251,18 +276,23 @@ def caching_sha2_password_auth(conn, pkt):
     if conn._secure:
         if DEBUG:
             print("caching sha2: Sending plain password via secure connection")
-        return _roundtrip(conn, conn.password + b"\0")
+        yield conn.password + b"\0"
+        return
 
     if not conn.server_public_key:
-        pkt = _roundtrip(conn, b"\x02")  # Request public key
+        pkt = yield b"\x02"  # Request public key
         if not pkt.is_extra_auth_data():
             raise OperationalError(
-                "caching sha2: Unknown packet for public key: %s" % pkt._data[:1]
+                "caching sha2: Unknown packet for public key: %s" % pkt.get_bytes(0)
             )
 
-        conn.server_public_key = pkt._data[1:]
+        conn.server_public_key = pkt.get_all_data()[1:]
         if DEBUG:
             print(conn.server_public_key.decode("ascii"))
 
     data = sha2_rsa_encrypt(conn.password, conn.salt, conn.server_public_key)
-    pkt = _roundtrip(conn, data)
+    yield data
+
+
+def caching_sha2_password_auth(conn, pkt):
+    return run_steps(conn, caching_sha2_password_steps(conn, pkt))
@@ -0,0 +1,1024 @@
+"""
+asyncio support for PyMySQL.
+
+:class:`AsyncConnection` speaks the same protocol as
+:class:`~pymysql.connections.Connection` over ``asyncio`` streams.  Only the
+I/O is asynchronous: packets are read from the stream ahead of time and then
+handed to the regular :class:`~pymysql.connections.MySQLResult`, protocol
+packet classes and converters, so results decode exactly like the blocking
+client.
+
+Usage::
+
+    conn = await pymysql.aio.connect(host="db", user="app", password="...")
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT id, name FROM users WHERE id = %s", (1,))
+        row = await cur.fetchone()
+
+    async with conn.cursor(pymysql.aio.AsyncSSCursor) as cur:
+        await cur.execute("SELECT id FROM big_table")
+        async for row in cur:
+            ...
+
+Limitations: ``LOAD DATA LOCAL``, custom ``auth_plugin_map`` handlers and the
+``dialog`` auth plugin are not supported, and TLS needs Python 3.11+
+(``StreamWriter.start_tls``).
+"""
+
+import asyncio
+import collections
+import socket
+import struct
+import warnings
+
+from . import compression, err, prepared
+from .charset import charset_by_name
+from .connections import (
+    DEBUG,
+    MAX_PACKET_LEN,
+    Connection,
+    MySQLResult,
+    _pipeline_batches,
+)
+from .constants import CLIENT, COMMAND, CR, ER
+from .cursors import (
+    RE_INSERT_VALUES,
+    ColumnarCursor,
+    ColumnarCursorMixin,
+    Cursor,
+    DictCursorMixin,
+    SSCursor,
+)
+from .protocol import MysqlPacket, dump_packet
+
+
+class AsyncConnection(Connection):
+    """
+    Connection to a MySQL server over asyncio streams.
+
+    Accepts the same arguments as :class:`~pymysql.connections.Connection`.
+    The constructor never connects; use :func:`connect` or
+    ``await conn.connect()``.
+
+    Every method that talks to the server is a coroutine.  Methods that only
+    touch local state (``escape``, ``literal``, ``insert_id``, ...) are
+    inherited unchanged.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.pop("defer_connect", None)
+        kwargs.setdefault("cursorclass", AsyncCursor)
+        if kwargs.get("local_infile"):
+            raise err.NotSupportedError("local_infile is not supported with asyncio")
+        self._reader = None
+        # Raw payloads read from the stream but not yet parsed.  The
+        # synchronous _read_packet() below consumes them, which is what lets
+        # MySQLResult and the handshake parser run unchanged.
+        self._packets = collections.deque()
+        super().__init__(defer_connect=True, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        del exc_info
+        if not self._closed:
+            self.close()
+
+    def _force_close(self):
+        """Close connection without QUIT message."""
+        # _sock holds the StreamWriter; Connection.close() writes COM_QUIT
+        # into it and the transport flushes it while closing.
+        super()._force_close()
+        self._reader = None
+        self._packets.clear()
+
+    async def connect(self):
+        self._closed = False
+        try:
+            if self.unix_socket:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.unix_socket),
+                    self.connect_timeout,
+                )
+                self.host_info = "Localhost via UNIX socket"
+                self._secure = True
+            else:
+                kwargs = {}
+                if self.bind_address is not None:
+                    kwargs["local_addr"] = (self.bind_address, 0)
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, **kwargs),
+                    self.connect_timeout,
+                )
+                self.host_info = "socket %s:%d" % (self.host, self.port)
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+            self._reader = reader
+            self._sock = writer
+            self._packets.clear()
+            self._next_seq_id = 0
+            self._compressor = None
+            self._prepared_statements.clear()
+
+            await self._fetch_packets(1)
+            self._get_server_information()
+            await self._request_authentication()
+            self._start_compression()
+
+            await self.set_character_set(self.charset, self.collation)
+
+            if self.sql_mode is not None:
+                async with self.cursor(AsyncCursor) as c:
+                    await c.execute("SET sql_mode=%s", (self.sql_mode,))
+
+            if self.init_command is not None:
+                async with self.cursor(AsyncCursor) as c:
+                    await c.execute(self.init_command)
+
+            if self.autocommit_mode is not None:
+                await self.autocommit(self.autocommit_mode)
+        except BaseException as e:
+            self._force_close()
+
+            if isinstance(e, (OSError, IOError, asyncio.TimeoutError)):
+                exc = err.OperationalError(
+                    CR.CR_CONN_HOST_ERROR,
+                    f"Can't connect to MySQL server on {self.host!r} ({e})",
+                )
+                exc.original_exception = e
+                raise exc from e
+            raise
+
+    # Transport
+
+    async def _recv_bytes(self, num_bytes):
+        compressor = self._compressor
+        if compressor is None:
+            return await self._recv_raw_bytes(num_bytes)
+        while True:
+            data = compressor.take(num_bytes)
+            if data is not None:
+                return data
+            header = await self._recv_raw_bytes(compression.HEADER_SIZE)
+            payload = await self._recv_raw_bytes(compressor.read_header(header))
+            try:
+                compressor.feed(payload)
+            except err.InternalError:
+                self._force_close()
+                raise
+
+    async def _recv_raw_bytes(self, num_bytes):
+        try:
+            return await asyncio.wait_for(
+                self._reader.readexactly(num_bytes), self._read_timeout
+            )
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, OSError) as e:
+            self._force_close()
+            raise err.OperationalError(
+                CR.CR_SERVER_LOST,
+                f"Lost connection to MySQL server during query ({e!r})",
+            )
+        except BaseException:
+            # Don't convert unknown exception (e.g. cancellation) to MySQLError.
+            self._force_close()
+            raise
+
+    async def _recv_packet_data(self):
+        """Read one logical packet payload, joining 16MB continuation packets."""
+        if self._reader is None:
+            raise err.InterfaceError(0, "")
+        buff = bytearray()
+        while True:
+            packet_header = await self._recv_bytes(4)
+            btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
+            bytes_to_read = btrl + (btrh << 16)
+            if packet_number != self._next_seq_id and self._compressor is None:
+                self._force_close()
+                if packet_number == 0:
+                    # MariaDB sends error packet with seqno==0 when shutdown
+                    raise err.OperationalError(
+                        CR.CR_SERVER_LOST,
+                        "Lost connection to MySQL server during query",
+                    )
+                raise err.InternalError(
+                    "Packet sequence number wrong - got %d expected %d"
+                    % (packet_number, self._next_seq_id)
+                )
+            self._next_seq_id = (packet_number + 1) % 256
+
+            recv_data = await self._recv_bytes(bytes_to_read)
+            if DEBUG:
+                dump_packet(recv_data)
+            buff += recv_data
+            if bytes_to_read < MAX_PACKET_LEN:
+                break
+        return bytes(buff)
+
+    async def _fetch_packets(self, count):
+        for _ in range(count):
+            self._packets.append(await self._recv_packet_data())
+
+    def _is_terminator(self, data):
+        """True for the packet that ends a row stream: EOF (or OK) or ERR."""
+        if data[0] == 0xFF:
+            return True
+        if self.client_flag & CLIENT.DEPRECATE_EOF:
+            return data[0] == 0xFE and len(data) < MAX_PACKET_LEN
+        return data[0] == 0xFE and len(data) < 9
+
+    def _with_eof(self, count):
+        """Packets in a block of count column definitions, EOF included."""
+        if self.client_flag & CLIENT.DEPRECATE_EOF:
+            return count
+        return count + 1
+
+    async def _fetch_rows(self):
+        """Buffer row packets up to and including the EOF (or ERR) packet."""
+        while True:
+            data = await self._recv_packet_data()
+            self._packets.append(data)
+            if self._is_terminator(data):
+                return
+
+    async def _fetch_row_packets(self, limit):
+        """Buffer up to limit row packets (all of them if None), stopping
+        after the EOF (or ERR) packet."""
+        if limit is None:
+            await self._fetch_rows()
+            return
+        for _ in range(limit):
+            data = await self._recv_packet_data()
+            self._packets.append(data)
+            if self._is_terminator(data):
+                return
+
+    async def _fetch_result(self, unbuffered=False):
+        """Buffer the packets MySQLResult needs to parse the next result.
+
+        That is the whole result for a buffered read, or just the header and
+        column definitions for an unbuffered one.
+        """
+        data = await self._recv_packet_data()
+        self._packets.append(data)
+        if data[0] in (0x00, 0xFF, 0xFB):
+            # OK, ERR or LOAD DATA LOCAL request; nothing else follows.
+            return
+        field_count = MysqlPacket(data, self.encoding).read_length_encoded_integer()
+        await self._fetch_packets(self._with_eof(field_count))
+        if not unbuffered:
+            await self._fetch_rows()
+
+    def _read_packet(self, packet_type=MysqlPacket):
+        """Parse the next buffered packet.
+
+        :raise InternalError: If no packet was buffered (a bug in this module).
+        """
+        try:
+            data = self._packets.popleft()
+        except IndexError:
+            raise err.InternalError("No packet buffered for the asyncio connection")
+        packet = packet_type(data, self.encoding)
+        if packet.is_error_packet():
+            if self._result is not None and self._result.unbuffered_active is True:
+                self._result.unbuffered_active = False
+            packet.raise_for_error()
+        return packet
+
+    async def _read_one_packet(self, packet_type=MysqlPacket):
+        await self._fetch_packets(1)
+        return self._read_packet(packet_type)
+
+    def _write_bytes(self, data):
+        if self._sock is None or self._sock.is_closing():
+            self._force_close()
+            raise err.OperationalError(
+                CR.CR_SERVER_GONE_ERROR, "MySQL server has gone away"
+            )
+        if self._compressor is not None:
+            data = self._compressor.pack(data)
+        self._sock.write(data)
+
+    async def _drain(self):
+        try:
+            await asyncio.wait_for(self._sock.drain(), self._write_timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            self._force_close()
+            raise err.OperationalError(
+                CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
+            )
+
+    async def _execute_command(self, command, sql):
+        """
+        :raise InterfaceError: If the connection is closed.
+        :raise ValueError: If no username was specified.
+        """
+        if not self._sock:
+            raise err.InterfaceError(0, "")
+
+        # If the last query was unbuffered, make sure it finishes before
+        # sending new commands
+        if self._result is not None:
+            if self._result.unbuffered_active:
+                warnings.warn("Previous unbuffered result was left incomplete")
+                await self._finish_unbuffered_query(self._result)
+            while self._result.has_next:
+                await self.next_result()
+            self._result = None
+
+        self._packets.clear()
+        Connection._execute_command(self, command, sql)
+        await self._drain()
+
+    async def _roundtrip(self, data):
+        self.write_packet(data)
+        await self._drain()
+        pkt = await self._read_one_packet()
+        pkt.check_error()
+        return pkt
+
+    # Commands
+
+    async def autocommit(self, value):
+        self.autocommit_mode = bool(value)
+        current = self.get_autocommit()
+        if value != current:
+            await self._send_autocommit_mode()
+
+    async def _command_ok(self, command, arg):
+        await self._execute_command(command, arg)
+        await self._fetch_packets(1)
+        return self._read_ok_packet()
+
+    async def _send_autocommit_mode(self):
+        """Set whether or not to commit after every execute()."""
+        await self._command_ok(
+            COMMAND.COM_QUERY, "SET AUTOCOMMIT = %s" % self.escape(self.autocommit_mode)
+        )
+
+    async def begin(self):
+        """Begin transaction."""
+        await self._command_ok(COMMAND.COM_QUERY, "BEGIN")
+
+    async def commit(self):
+        """Commit changes to stable storage."""
+        await self._command_ok(COMMAND.COM_QUERY, "COMMIT")
+
+    async def rollback(self):
+        """Roll back the current transaction."""
+        await self._command_ok(COMMAND.COM_QUERY, "ROLLBACK")
+
+    async def show_warnings(self):
+        """Send the "SHOW WARNINGS" SQL command."""
+        await self._execute_command(COMMAND.COM_QUERY, "SHOW WARNINGS")
+        await self._fetch_result()
+        result = MySQLResult(self)
+        result.read()
+        return result.rows
+
+    async def select_db(self, db):
+        """
+        Set current db.
+
+        :param db: The name of the db.
+        """
+        await self._command_ok(COMMAND.COM_INIT_DB, db)
+
+    async def query(self, sql, unbuffered=False):
+        if isinstance(sql, str):
+            sql = sql.encode(self.encoding, "surrogateescape")
+        await self._execute_command(COMMAND.COM_QUERY, sql)
+        self._affected_rows = await self._read_query_result(unbuffered=unbuffered)
+        return self._affected_rows
+
+    async def query_pipeline(self, sqls):
+        """Send independent queries back to back, then read their results.
+
+        See :meth:`pymysql.connections.Connection.query_pipeline`.
+        """
+        sqls = self._encode_pipeline(sqls)
+        if self._result is not None:
+            while self._result.has_next:
+                await self.next_result()
+            self._result = None
+        self._packets.clear()
+        outcomes = []
+        for batch in _pipeline_batches(sqls, self.pipeline_window):
+            for sql in batch:
+                self._send_command(COMMAND.COM_QUERY, sql)
+            # Not drained first: the transport keeps writing while replies
+            # are read, and waiting for the write buffer to empty could wait
+            # on a server blocked sending replies nobody reads.
+            for _ in batch:
+                outcomes.append(await self._read_pipeline_result())
+        return outcomes
+
+    async def _read_pipeline_result(self):
+        self._next_seq_id = 1
+        results = []
+        try:
+            await self._read_query_result()
+            results.append(self._result)
+            while self._result.has_next:
+                await self.next_result()
+                results.append(self._result)
+        except err.MySQLError as e:
+            if not self._sock:
+                raise
+            return e
+        return results
+
+    async def next_result(self, unbuffered=False):
+        binary = self._result is not None and self._result.binary
+        self._affected_rows = await self._read_query_result(
+            unbuffered=unbuffered, binary=binary
+        )
+        return self._affected_rows
+
+    async def execute_prepared(self, sql, params=(), unbuffered=False):
+        """See :meth:`pymysql.connections.Connection.execute_prepared`."""
+        if isinstance(sql, str):
+            sql = sql.encode(self.encoding, "surrogateescape")
+        stmt = await self._prepare(sql)
+        try:
+            await self._send_execute(stmt, params, unbuffered)
+        except err.OperationalError as e:
+            if e.args[0] != ER.UNKNOWN_STMT_HANDLER:
+                raise
+            self._prepared_statements.pop(sql, None)
+            stmt = await self._prepare(sql)
+            await self._send_execute(stmt, params, unbuffered)
+        return self._affected_rows
+
+    async def _send_execute(self, stmt, params, unbuffered):
+        payload = prepared.build_execute_payload(stmt, params, self.encoding)
+        await self._execute_command(COMMAND.COM_STMT_EXECUTE, payload)
+        self._affected_rows = await self._read_query_result(
+            unbuffered=unbuffered, binary=True
+        )
+
+    async def _prepare(self, sql):
+        cache = self._prepared_statements
+        stmt = cache.get(sql)
+        if stmt is not None:
+            cache.move_to_end(sql)
+            return stmt
+
+        while len(cache) >= self.prepared_statement_cache_size:
+            _, evicted = cache.popitem(last=False)
+            await self._close_statement(evicted)
+
+        await self._execute_command(COMMAND.COM_STMT_PREPARE, sql)
+        packet = await self._read_one_packet()
+        packet.advance(1)  # status: always 0x00
+        statement_id, column_count, param_count = packet.read_struct("<IHH")
+        for count in (param_count, column_count):
+            if count:
+                await self._fetch_packets(self._with_eof(count))
+        self._skip_definitions(param_count)
+        self._skip_definitions(column_count)
+
+        stmt = prepared.PreparedStatement(sql, statement_id, param_count, column_count)
+        cache[sql] = stmt
+        return stmt
+
+    async def _close_statement(self, stmt):
+        await self._execute_command(
+            COMMAND.COM_STMT_CLOSE, struct.pack("<I", stmt.statement_id)
+        )
+
+    async def kill(self, thread_id):
+        arg = struct.pack("<I", thread_id)
+        return await self._command_ok(COMMAND.COM_PROCESS_KILL, arg)
+
+    async def ping(self, reconnect=True):
+        """
+        Check if the server is alive.
+
+        :param reconnect: If the connection is closed, reconnect.
+        :type reconnect: boolean
+
+        :raise Error: If the connection is closed and reconnect=False.
+        """
+        if self._sock is None:
+            if reconnect:
+                await self.connect()
+                reconnect = False
+            else:
+                raise err.Error("Already closed")
+        try:
+            await self._command_ok(COMMAND.COM_PING, "")
+        except Exception:
+            if reconnect:
+                await self.connect()
+                await self.ping(False)
+            else:
+                raise
+
+    async def set_charset(self, charset):
+        """Deprecated. Use set_character_set() instead."""
+        await self.set_character_set(charset)
+
+    async def set_character_set(self, charset, collation=None):
+        """
+        Set charaset (and collation)
+
+        Send "SET NAMES charset [COLLATE collation]" query.
+        Update Connection.encoding based on charset.
+        """
+        # Make sure charset is supported.
+        encoding = charset_by_name(charset).encoding
+
+        if collation:
+            query = f"SET NAMES {charset} COLLATE {collation}"
+        else:
+            query = f"SET NAMES {charset}"
+        await self._execute_command(COMMAND.COM_QUERY, query)
+        await self._read_one_packet()
+        self.charset = charset
+        self.encoding = encoding
+        self.collation = collation
+
+    async def _read_query_result(self, unbuffered=False, binary=False):
+        self._result = None
+        await self._fetch_result(unbuffered=unbuffered)
+        if unbuffered:
+            try:
+                result = MySQLResult(self, binary)
+                result.init_unbuffered_query()
+            except:
+                result.unbuffered_active = False
+                result.connection = None
+                raise
+        else:
+            result = MySQLResult(self, binary)
+            result.read()
+        self._result = result
+        if result.server_status is not None:
+            self.server_status = result.server_status
+        return result.affected_rows
+
+    async def _read_unbuffered_row(self, result):
+        if not result.unbuffered_active:
+            return None
+        await self._fetch_packets(1)
+        return result._read_rowdata_packet_unbuffered()
+
+    async def _finish_unbuffered_query(self, result):
+        # Rows are dropped as they arrive; only the terminator is handed to
+        # MySQLResult so it can record warnings and has_next.
+        while result.unbuffered_active:
+            data = await self._recv_packet_data()
+            if self._is_terminator(data):
+                self._packets.append(data)
+                result._finish_unbuffered_query()
+
+    # Authentication
+
+    async def _request_authentication(self):
+        data_init = self._handshake_response_header()
+
+        if self.ssl and self.server_capabilities & CLIENT.SSL:
+            self.write_packet(data_init)
+            await self._drain()
+            if not hasattr(self._sock, "start_tls"):
+                raise err.NotSupportedError("TLS with asyncio requires Python 3.11+")
+            await self._sock.start_tls(self.ctx, server_hostname=self.host)
+            self._secure = True
+
+        self.write_packet(self._handshake_response(data_init))
+        await self._drain()
+        auth_packet = await self._read_one_packet()
+
+        if auth_packet.is_auth_switch_request():
+            auth_packet.read_uint8()  # 0xfe packet identifier
+            plugin_name = auth_packet.read_string()
+            if (
+                self.server_capabilities & CLIENT.PLUGIN_AUTH
+                and plugin_name is not None
+            ):
+                await self._process_auth(plugin_name, auth_packet)
+            else:
+                raise err.OperationalError("received unknown auth switch request")
+        elif auth_packet.is_extra_auth_data():
+            await self._run_auth_steps(self._extra_auth_steps(auth_packet))
+
+    async def _process_auth(self, plugin_name, auth_packet):
+        if self._get_auth_plugin_handler(plugin_name):
+            raise err.NotSupportedError(
+                "auth_plugin_map is not supported with asyncio connections"
+            )
+        steps = self._auth_switch_steps(plugin_name, auth_packet)
+        if steps is None:
+            raise err.OperationalError(
+                CR.CR_AUTH_PLUGIN_CANNOT_LOAD,
+                "Authentication plugin '%s' not configured" % plugin_name,
+            )
+        return await self._run_auth_steps(steps)
+
+    async def _run_auth_steps(self, steps):
+        """Drive auth steps like :func:`pymysql._auth.run_steps`."""
+        pkt = None
+        try:
+            data = next(steps)
+            while True:
+                if data is not None:
+                    pkt = await self._roundtrip(data)
+                else:
+                    pkt = await self._read_one_packet()
+                    pkt.check_error()
+                data = steps.send(pkt)
+        except StopIteration:
+            return pkt
+
+
+async def connect(**kwargs):
+    """Open an :class:`AsyncConnection`; takes the same arguments as ``pymysql.connect``."""
+    conn = AsyncConnection(**kwargs)
+    await conn.connect()
+    return conn
+
+
+class AsyncCursor(Cursor):
+    """
+    Buffered cursor for :class:`AsyncConnection`.
+
+    ``execute``, ``executemany``, ``callproc``, ``nextset``, ``close`` and the
+    fetch methods are coroutines.  Rows are decoded when the query completes,
+    so fetching never waits on the network.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        del exc_info
+        await self.close()
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with asyncio cursors")
+
+    def __iter__(self):
+        raise TypeError("use 'async for' with asyncio cursors")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        row = await self.fetchone()
+        if row is None:
+            raise StopAsyncIteration
+        return row
+
+    async def close(self):
+        """
+        Closing a cursor just exhausts all remaining data.
+        """
+        conn = self.connection
+        if conn is None:
+            return
+        try:
+            while await self.nextset():
+                pass
+        finally:
+            self.connection = None
+
+    async def _nextset(self, unbuffered=False):
+        """Get the next query set."""
+        if self._pipeline:
+            self._next_pipeline_result()
+            return True
+        conn = self._get_db()
+        current_result = self._result
+        if current_result is None or current_result is not conn._result:
+            return None
+        if not current_result.has_next:
+            return None
+        self._result = None
+        self._clear_result()
+        await conn.next_result(unbuffered=unbuffered)
+        await self._get_result()
+        return True
+
+    async def nextset(self):
+        return await self._nextset(False)
+
+    async def execute(self, query, args=None):
+        """Execute a query.
+
+        See :meth:`pymysql.cursors.Cursor.execute`.
+        """
+        while await self.nextset():
+            pass
+
+        query = self.mogrify(query, args)
+
+        result = await self._query(query)
+        self._executed = query
+        return result
+
+    async def executemany(self, query, args):
+        """Run several data against one query.
+
+        See :meth:`pymysql.cursors.Cursor.executemany`.
+        """
+        if not args:
+            return
+
+        m = RE_INSERT_VALUES.match(query)
+        if m:
+            q_prefix = m.group(1) % ()
+            q_values = m.group(2).rstrip()
+            q_postfix = m.group(3) or ""
+            assert q_values[0] == "(" and q_values[-1] == ")"
+            rows = 0
+            for sql in self._iter_execute_many(
+                q_prefix,
+                q_values,
+                q_postfix,
+                args,
+                self.max_stmt_length,
+                self._get_db().encoding,
+            ):
+                rows += await self.execute(sql)
+            self.rowcount = rows
+            return rows
+
+        rows = 0
+        for arg in args:
+            rows += await self.execute(query, arg)
+        self.rowcount = rows
+        return rows
+
+    async def execute_pipeline(self, queries):
+        """Execute independent queries in a single network round trip.
+
+        See :meth:`pymysql.cursors.Cursor.execute_pipeline`.
+        """
+        while await self.nextset():
+            pass
+
+        sqls = self._mogrify_pipeline(queries)
+        if not sqls:
+            return 0
+        self._clear_result()
+        outcomes = await self._get_db().query_pipeline(sqls)
+        return self._load_pipeline(sqls, outcomes)
+
+    async def callproc(self, procname, args=()):
+        """Execute stored procedure procname with args.
+
+        See :meth:`pymysql.cursors.Cursor.callproc`.
+        """
+        conn = self._get_db()
+        if args:
+            fmt = f"@_{procname}_%d=%s"
+            await self._query(
+                "SET %s"
+                % ",".join(
+                    fmt % (index, conn.escape(arg)) for index, arg in enumerate(args)
+                )
+            )
+            await self.nextset()
+
+        q = "CALL {}({})".format(
+            procname,
+            ",".join(["@_%s_%d" % (procname, i) for i in range(len(args))]),
+        )
+        await self._query(q)
+        self._executed = q
+        return args
+
+    async def fetchone(self):
+        """Fetch the next row."""
+        return Cursor.fetchone(self)
+
+    async def fetchmany(self, size=None):
+        """Fetch several rows."""
+        return Cursor.fetchmany(self, size)
+
+    async def fetchall(self):
+        """Fetch all the rows."""
+        return Cursor.fetchall(self)
+
+    async def fetch_columns(self, size=None, as_numpy=False):
+        """Fetch rows column by column.
+
+        See :meth:`pymysql.cursors.Cursor.fetch_columns`.
+        """
+        return Cursor.fetch_columns(self, size, as_numpy)
+
+    async def fetchall_columnar(self, as_numpy=False):
+        """Fetch all remaining rows column by column."""
+        return await self.fetch_columns(None, as_numpy)
+
+    async def scroll(self, value, mode="relative"):
+        Cursor.scroll(self, value, mode)
+
+    async def _query(self, q):
+        conn = self._get_db()
+        self._clear_result()
+        await conn.query(q)
+        await self._get_result()
+        return self.rowcount
+
+    async def _get_result(self):
+        self._do_get_result()
+
+
+class AsyncDictCursor(DictCursorMixin, AsyncCursor):
+    """An asyncio cursor which returns results as a dictionary"""
+
+
+class AsyncSSCursor(AsyncCursor):
+    """
+    Unbuffered asyncio cursor; rows are read from the server as they are
+    fetched.  Use ``async for row in cursor`` to stream a large result.
+
+    See :class:`pymysql.cursors.SSCursor` for the limitations.
+    """
+
+    async def close(self):
+        conn = self.connection
+        if conn is None:
+            return
+
+        if self._result is not None and self._result is conn._result:
+            await conn._finish_unbuffered_query(self._result)
+
+        try:
+            while await self.nextset():
+                pass
+        finally:
+            self.connection = None
+
+    async def _query(self, q):
+        conn = self._get_db()
+        self._clear_result()
+        await conn.query(q, unbuffered=True)
+        await self._get_result()
+        return self.rowcount
+
+    async def nextset(self):
+        return await self._nextset(unbuffered=True)
+
+    async def execute_pipeline(self, queries):
+        """Not supported: pipelined results are always read buffered."""
+        raise err.NotSupportedError("Unbuffered cursors can't pipeline queries")
+
+    async def fetch_columns(self, size=None, as_numpy=False):
+        """Read rows from the server straight into columns.
+
+        See :meth:`pymysql.cursors.SSCursor.fetch_columns`.
+        """
+        self._check_executed()
+        result = self._result
+        if result is not None and result.unbuffered_active:
+            await self.connection._fetch_row_packets(size)
+        return SSCursor.fetch_columns(self, size, as_numpy)
+
+    async def read_next(self):
+        """Read next row."""
+        return self._conv_row(await self.connection._read_unbuffered_row(self._result))
+
+    async def fetchone(self):
+        """Fetch next row."""
+        self._check_executed()
+        row = await self.read_next()
+        if row is None:
+            self.warning_count = self._result.warning_count
+            return None
+        self.rownumber += 1
+        return row
+
+    async def fetchall(self):
+        """Fetch all remaining rows into a list."""
+        rows = []
+        async for row in self:
+            rows.append(row)
+        return rows
+
+    async def fetchmany(self, size=None):
+        """Fetch many."""
+        self._check_executed()
+        if size is None:
+            size = self.arraysize
+
+        rows = []
+        for i in range(size):
+            row = await self.read_next()
+            if row is None:
+                self.warning_count = self._result.warning_count
+                break
+            rows.append(row)
+            self.rownumber += 1
+        if not rows:
+            return ()
+        return rows
+
+    async def scroll(self, value, mode="relative"):
+        self._check_executed()
+
+        if mode == "relative":
+            if value < 0:
+                raise err.NotSupportedError(
+                    "Backwards scrolling not supported by this cursor"
+                )
+
+            for _ in range(value):
+                await self.read_next()
+            self.rownumber += value
+        elif mode == "absolute":
+            if value < self.rownumber:
+                raise err.NotSupportedError(
+                    "Backwards scrolling not supported by this cursor"
+                )
+
+            end = value - self.rownumber
+            for _ in range(end):
+                await self.read_next()
+            self.rownumber = value
+        else:
+            raise err.ProgrammingError("unknown scroll mode %s" % mode)
+
+
+class AsyncSSDictCursor(DictCursorMixin, AsyncSSCursor):
+    """An unbuffered asyncio cursor, which returns results as a dictionary"""
+
+
+class AsyncColumnarCursor(ColumnarCursorMixin, AsyncCursor):
+    """An asyncio cursor which reads results column by column
+
+    See :class:`pymysql.cursors.ColumnarCursor`.
+    """
+
+    async def fetchall(self):
+        """Fetch all the rows."""
+        return ColumnarCursor.fetchall(self)
+
+    async def fetch_columns(self, size=None, as_numpy=False):
+        """Fetch rows column by column."""
+        return ColumnarCursor.fetch_columns(self, size, as_numpy)
+
+    async def _query(self, q):
+        conn = self._get_db()
+        self._clear_result()
+        await conn.query(q, unbuffered=True)
+        await self._get_result()
+        return self.rowcount
+
+    async def nextset(self):
+        return await self._nextset(unbuffered=True)
+
+    async def _get_result(self):
+        result = self._get_db()._result
+        if result.unbuffered_active:
+            await self.connection._fetch_rows()
+        self._do_get_result()
+
+
+class AsyncPreparedCursorMixin:
+    """asyncio counterpart of :class:`pymysql.cursors.PreparedCursorMixin`."""
+
+    _unbuffered = False
+
+    async def execute(self, query, args=None):
+        """Execute a query as a prepared statement."""
+        while await self.nextset():
+            pass
+
+        conn = self._get_db()
+        if args is None:
+            sql, params = query, ()
+        else:
+            sql, names = prepared.convert_placeholders(query)
+            params = prepared.bind_args(names, args)
+
+        self._clear_result()
+        await conn.execute_prepared(sql, params, unbuffered=self._unbuffered)
+        await self._get_result()
+        self._executed = query
+        return self.rowcount
+
+    async def executemany(self, query, args):
+        """Execute the prepared statement once per item of args."""
+        if not args:
+            return
+        rows = 0
+        for arg in args:
+            rows += await self.execute(query, arg)
+        self.rowcount = rows
+        return rows
+
+
+class AsyncPreparedCursor(AsyncPreparedCursorMixin, AsyncCursor):
+    """An asyncio cursor which uses server-side prepared statements"""
+
+
+class AsyncSSPreparedCursor(AsyncPreparedCursorMixin, AsyncSSCursor):
+    """An unbuffered asyncio cursor which uses server-side prepared statements"""
+
+    _unbuffered = True
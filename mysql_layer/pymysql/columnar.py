@@ -0,0 +1,287 @@
+"""
+Columnar fetching.
+
+:meth:`Cursor.fetch_columns() <pymysql.cursors.Cursor.fetch_columns>` returns
+a result set as one :class:`Column` per result column instead of one tuple per
+row.  Integer and floating point columns are packed into ``array.array``
+(8 bytes per value instead of a Python object each), every other type is a
+list of the usual converted values.  With ``as_numpy=True`` the containers are
+returned as NumPy arrays, which requires the numpy package.
+
+Text protocol rows are decoded straight into the column containers by a
+function generated for the result's column list, like the row decoder in
+:func:`pymysql.protocol.text_row_decoder`.
+"""
+
+import array
+import functools
+
+from .constants import FIELD_TYPE, FLAG
+from .protocol import NULL_COLUMN, _long_length, _text_value_expr
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+INTEGER_TYPES = frozenset(
+    {
+        FIELD_TYPE.TINY,
+        FIELD_TYPE.SHORT,
+        FIELD_TYPE.INT24,
+        FIELD_TYPE.LONG,
+        FIELD_TYPE.LONGLONG,
+        FIELD_TYPE.YEAR,
+    }
+)
+FLOAT_TYPES = frozenset({FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE})
+
+
+class Column:
+    """
+    Values of one result column.
+
+    :ivar name: Column name, as in ``cursor.description``.
+    :ivar values: ``array.array`` for integer (typecode ``"q"``, or ``"Q"``
+        for BIGINT UNSIGNED) and floating point (``"d"``) columns, a list for
+        every other type.  NumPy arrays when fetched with ``as_numpy=True``.
+    :ivar mask: None if the column has no NULL, otherwise a bytearray (a
+        NumPy bool array with ``as_numpy=True``) holding 1 for each NULL.
+        NULLs are stored as 0 in arrays and as None in lists.
+    """
+
+    __slots__ = ("name", "values", "mask")
+
+    def __init__(self, name, values, mask=None):
+        self.name = name
+        self.values = values
+        self.mask = mask
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return "Column(%r, %d values%s)" % (
+            self.name,
+            len(self.values),
+            "" if self.mask is None else ", with NULLs",
+        )
+
+
+def column_typecodes(fields, converters, binary=False):
+    """Return the ``array`` typecode of each column, or None for a list.
+
+    Text protocol columns are packed only while they use the default int or
+    float decoder; a custom decoder in ``conv`` keeps them as lists.
+    """
+    typecodes = []
+    for field, (encoding, converter) in zip(fields, converters):
+        if field.type_code in INTEGER_TYPES and (binary or converter is int):
+            if field.type_code == FIELD_TYPE.LONGLONG and field.flags & FLAG.UNSIGNED:
+                typecodes.append("Q")
+            else:
+                typecodes.append("q")
+        elif field.type_code in FLOAT_TYPES and (binary or converter is float):
+            typecodes.append("d")
+        else:
+            typecodes.append(None)
+    return tuple(typecodes)
+
+
+def _pad_row(columns, nulls, fills, row):
+    # A row shorter than the column list; see PyMySQL/PyMySQL#434.
+    for values, null, fill in zip(columns, nulls, fills):
+        if len(values) == row:
+            values.append(fill)
+            null.append(row)
+
+
+def _compile_text_column_decoder(converters, typecodes):
+    namespace = {"_long_length": _long_length, "_pad_row": _pad_row}
+    lines = ["def decode(payloads, columns, nulls, fills):"]
+    for index in range(len(converters)):
+        lines += [
+            f"    append{index} = columns[{index}].append",
+            f"    null{index} = nulls[{index}].append",
+        ]
+    lines += ["    row = -1", "    for data in payloads:", "        row += 1"]
+    lines += ["        pos = 0", "        try:"]
+    for index, ((encoding, converter), typecode) in enumerate(
+        zip(converters, typecodes)
+    ):
+        value = _text_value_expr(index, encoding, converter, namespace)
+        fill = "None" if typecode is None else "0"
+        lines += [
+            "            n = data[pos]",
+            "            if n < %d:" % NULL_COLUMN,
+            "                pos += 1",
+            f"                append{index}({value})",
+            "                pos += n",
+            "            elif n == %d:" % NULL_COLUMN,
+            "                pos += 1",
+            f"                append{index}({fill})",
+            f"                null{index}(row)",
+            "            else:",
+            "                n, pos = _long_length(data, pos)",
+            f"                append{index}({value})",
+            "                pos += n",
+        ]
+    lines += [
+        "        except IndexError:",
+        "            _pad_row(columns, nulls, fills, row)",
+    ]
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+_cached_text_column_decoder = functools.lru_cache(maxsize=128)(
+    _compile_text_column_decoder
+)
+
+
+def text_column_decoder(converters, typecodes):
+    """Return a function decoding text protocol row payloads into columns.
+
+    ``decode(payloads, columns, nulls, fills)`` appends each column value of
+    every payload to ``columns[i]`` and the index of each NULL row to
+    ``nulls[i]``, storing ``fills[i]`` in its place.  Missing trailing
+    columns are NULL.
+
+    :param converters: ``(encoding, converter)`` for each column, as built by
+        MySQLResult.
+    :param typecodes: As returned by :func:`column_typecodes`.
+    """
+    converters = tuple(converters)
+    try:
+        return _cached_text_column_decoder(converters, typecodes)
+    except TypeError:
+        # A custom converter that isn't hashable.
+        return _compile_text_column_decoder(converters, typecodes)
+
+
+def _append_rows(rows, columns, nulls, fills):
+    appends = [values.append for values in columns]
+    width = len(columns)
+    for row_index, row in enumerate(rows):
+        for index, value in enumerate(row):
+            if value is None:
+                appends[index](fills[index])
+                nulls[index].append(row_index)
+            else:
+                appends[index](value)
+        if len(row) < width:
+            _pad_row(columns, nulls, fills, row_index)
+
+
+def _build(result, fill):
+    typecodes = column_typecodes(result.fields, result.converters, result.binary)
+    columns = [[] if t is None else array.array(t) for t in typecodes]
+    nulls = [[] for _ in typecodes]
+    fills = tuple(None if t is None else 0 for t in typecodes)
+    fill(typecodes, columns, nulls, fills)
+    built = []
+    for field, values, null in zip(result.fields, columns, nulls):
+        mask = None
+        if null:
+            mask = bytearray(len(values))
+            for row in null:
+                mask[row] = 1
+        built.append(Column(field.name, values, mask))
+    return built
+
+
+def read_columns(result, payloads):
+    """Decode row packet payloads of a result set into a list of Column.
+
+    :param result: MySQLResult whose column definitions were read.
+    :param payloads: Iterable of row packet payloads.  Each payload is only
+        used until the next one is requested.
+    """
+
+    def fill(typecodes, columns, nulls, fills):
+        if result.binary:
+            decoded = map(result._binary_decoder.decode, payloads)
+            _append_rows(decoded, columns, nulls, fills)
+        else:
+            decode = text_column_decoder(result.converters, typecodes)
+            decode(payloads, columns, nulls, fills)
+
+    return _build(result, fill)
+
+
+def columns_from_rows(result, rows):
+    """Transpose row tuples already decoded for a result set into Columns."""
+
+    def fill(typecodes, columns, nulls, fills):
+        _append_rows(rows, columns, nulls, fills)
+
+    return _build(result, fill)
+
+
+def slice_columns(columns, start, stop):
+    """Return Columns holding rows ``start:stop`` of columns."""
+    if start == 0 and columns and stop >= len(columns[0]):
+        return columns
+    sliced = []
+    for column in columns:
+        mask = column.mask
+        if mask is not None:
+            mask = mask[start:stop]
+            if 1 not in mask:
+                mask = None
+        sliced.append(Column(column.name, column.values[start:stop], mask))
+    return sliced
+
+
+def to_numpy(columns):
+    """Return columns with NumPy arrays as values and masks.
+
+    Arrays are wrapped without copying; lists become ``object`` arrays.
+
+    :raise ValueError: If numpy is not installed.
+    """
+    if numpy is None:
+        raise ValueError("as_numpy=True requires the numpy package")
+    converted = []
+    for column in columns:
+        values = column.values
+        if isinstance(values, array.array):
+            values = numpy.frombuffer(values, dtype=values.typecode)
+        else:
+            values = numpy.array(values, dtype=object)
+        mask = column.mask
+        if mask is not None:
+            mask = numpy.frombuffer(mask, dtype=bool)
+        converted.append(Column(column.name, values, mask))
+    return converted
+
+
+class ColumnRows:
+    """Read-only sequence of row tuples backed by a list of Column.
+
+    Rows are built when they are accessed.
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, columns):
+        self._columns = [(column.values, column.mask) for column in columns]
+        self._length = len(columns[0]) if columns else 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return self._row(index)
+
+    def _row(self, index):
+        return tuple(
+            None if mask is not None and mask[index] else values[index]
+            for values, mask in self._columns
+        )
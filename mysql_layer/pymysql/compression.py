@@ -0,0 +1,183 @@
+"""
+Compressed client/server protocol.
+
+Once CLIENT.COMPRESS (zlib) or CLIENT.ZSTD_COMPRESSION_ALGORITHM is negotiated,
+everything after authentication travels in compressed frames::
+
+    int<3>  length of the frame payload
+    int<1>  compressed sequence id
+    int<3>  length of the payload before compression, 0 if it was sent as is
+
+The frame payload is a slice of the ordinary packet stream, packet headers
+included, so the packet layer above is unchanged.
+
+https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_basic_compression.html
+"""
+
+import struct
+import zlib
+
+from . import err
+from .constants import CLIENT
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+HEADER_SIZE = 7
+MAX_FRAME_LEN = 2**24 - 1
+
+#: Payloads shorter than this are not worth compressing (libmysqlclient uses
+#: the same threshold).
+MIN_COMPRESS_LENGTH = 50
+
+DEFAULT_ZSTD_LEVEL = 3
+
+
+def check_algorithm(compress):
+    """Validate the ``compress`` argument of Connection.
+
+    :raise ValueError: For an unknown algorithm, or zstd without the
+        zstandard package.
+    """
+    if compress in (None, False, True, ZLIB):
+        return
+    if compress == ZSTD:
+        if zstandard is None:
+            raise ValueError("compress='zstd' requires the zstandard package")
+        return
+    raise ValueError(f"compress should be True, {ZLIB!r} or {ZSTD!r}")
+
+
+def negotiate(compress, server_capabilities):
+    """Pick the algorithm to request from the server, or None.
+
+    ``compress=True`` prefers zstd when both sides support it.  A server that
+    offers neither algorithm gets an uncompressed connection.
+    """
+    if not compress:
+        return None
+    if (
+        compress in (True, ZSTD)
+        and zstandard is not None
+        and server_capabilities & CLIENT.ZSTD_COMPRESSION_ALGORITHM
+    ):
+        return ZSTD
+    if compress in (True, ZLIB) and server_capabilities & CLIENT.COMPRESS:
+        return ZLIB
+    return None
+
+
+class PacketCompressor:
+    """
+    Frames outgoing bytes and unframes incoming ones for one connection.
+
+    No I/O is done here: the connection writes what :meth:`pack` returns,
+    and feeds frames it read to :meth:`feed` until :meth:`take` can return
+    the bytes it asked for.
+
+    :param algorithm: ``"zlib"`` or ``"zstd"``.
+    :param level: Compression level. (default: zlib's default, or 3 for zstd)
+    :param min_length: Chunks shorter than this are sent uncompressed.
+    """
+
+    def __init__(self, algorithm, level=None, min_length=MIN_COMPRESS_LENGTH):
+        self.algorithm = algorithm
+        self.min_length = min_length
+        self.sequence_id = 0
+        self._buffer = b""
+        self._position = 0
+        self._uncompressed_length = 0
+        if algorithm == ZLIB:
+            level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+            self._compress = lambda data: zlib.compress(data, level)
+            self._decompress = lambda data, size: zlib.decompress(data, bufsize=size)
+        elif algorithm == ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            level = DEFAULT_ZSTD_LEVEL if level is None else level
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+            decompressor = zstandard.ZstdDecompressor()
+            self._decompress = lambda data, size: decompressor.decompress(
+                data, max_output_size=size
+            )
+        else:
+            raise ValueError(f"Unknown compression algorithm: {algorithm!r}")
+        self.level = level
+
+    def reset(self):
+        """Restart the compressed sequence; called at the start of a command."""
+        self.sequence_id = 0
+
+    def pack(self, data):
+        """Return data wrapped in one or more compressed frames."""
+        frames = []
+        for start in range(0, len(data), MAX_FRAME_LEN):
+            chunk = data[start : start + MAX_FRAME_LEN]
+            payload, original_length = chunk, 0
+            if len(chunk) >= self.min_length:
+                compressed = self._compress(chunk)
+                if len(compressed) < len(chunk):
+                    payload, original_length = compressed, len(chunk)
+            frames.append(
+                struct.pack(
+                    "<HBBHB",
+                    len(payload) & 0xFFFF,
+                    len(payload) >> 16,
+                    self.sequence_id,
+                    original_length & 0xFFFF,
+                    original_length >> 16,
+                )
+            )
+            frames.append(payload)
+            self.sequence_id = (self.sequence_id + 1) % 256
+        return b"".join(frames)
+
+    def read_header(self, header):
+        """Parse a frame header and return the length of its payload."""
+        low, high, sequence_id, ulow, uhigh = struct.unpack("<HBBHB", header)
+        # Servers don't check compressed sequence ids; follow theirs so that
+        # our next frame continues from it.
+        self.sequence_id = (sequence_id + 1) % 256
+        self._uncompressed_length = ulow + (uhigh << 16)
+        return low + (high << 16)
+
+    def feed(self, payload):
+        """Add the payload of the frame whose header was just read.
+
+        :raise InternalError: If the payload does not decompress to the
+            announced length.
+        """
+        length = self._uncompressed_length
+        if length:
+            try:
+                payload = self._decompress(payload, length)
+            except Exception as e:
+                raise err.InternalError(f"Invalid compressed packet ({e})")
+            if len(payload) != length:
+                raise err.InternalError(
+                    "Compressed packet length mismatch - got %d expected %d"
+                    % (len(payload), length)
+                )
+        else:
+            # The caller's buffer is reused for the next read.
+            payload = bytes(payload)
+        if self._position < len(self._buffer):
+            self._buffer = self._buffer[self._position :] + payload
+        else:
+            self._buffer = payload
+        self._position = 0
+
+    def take(self, num_bytes):
+        """Return the next num_bytes of the packet stream, or None if they
+        have not all been fed yet."""
+        end = self._position + num_bytes
+        if end > len(self._buffer):
+            return None
+        data = self._buffer[self._position : end]
+        self._position = end
+        return data
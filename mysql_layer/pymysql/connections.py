@@ -2,8 +2,11 @@
 # http://dev.mysql.com/doc/internals/en/client-server-protocol.html
 # Error codes:
 # https://dev.mysql.com/doc/refman/5.5/en/error-handling.html
+import collections
 import errno
 import os
+import re
+import selectors
 import socket
 import struct
 import sys
@@ -14,7 +17,7 @@ from . import _auth
 
 from .charset import charset_by_name, charset_by_id
 from .constants import CLIENT, COMMAND, CR, ER, FIELD_TYPE, SERVER_STATUS
-from . import converters
+from . import columnar, compression, converters, prepared
 from .cursors import Cursor
 from .optionfile import Parser
 from .protocol import (
@@ -24,6 +27,11 @@ from .protocol import (
     OKPacketWrapper,
     EOFPacketWrapper,
     LoadLocalPacketWrapper,
+    BinaryRowDecoder,
+    NULL_COLUMN,
+    UNSIGNED_SHORT_COLUMN,
+    UNSIGNED_INT24_COLUMN,
+    text_row_decoder,
 )
 from . import err, VERSION_STRING
 
@@ -35,6 +43,12 @@ except ImportError:
     ssl = None
     SSL_ENABLED = False
 
+# Raised by non-blocking sends and receives that would have to wait.
+if ssl is not None:
+    _WOULD_BLOCK = (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError)
+else:
+    _WOULD_BLOCK = (BlockingIOError,)
+
 try:
     import getpass
 
@@ -63,11 +77,37 @@ DEFAULT_CHARSET = "utf8mb4"
 
 MAX_PACKET_LEN = 2**24 - 1
 
+# Initial size of the receive buffer; it grows to fit larger packets and
+# shrinks back once they have been read.
+RECV_BUFFER_SIZE = 64 * 1024
+
+# The server asks for the file of LOAD DATA LOCAL in the middle of reading
+# commands, so such statements can't share a pipeline with others.
+RE_LOAD_LOCAL = re.compile(
+    rb"\s*LOAD\s+(?:DATA|XML)\s+(?:(?:LOW_PRIORITY|CONCURRENT)\s+)?LOCAL\b",
+    re.IGNORECASE,
+)
+
 
 def _pack_int24(n):
     return struct.pack("<I", n)[:3]
 
 
+def _pipeline_batches(sqls, window):
+    """Split encoded queries into batches of about window bytes each."""
+    batch = []
+    size = 0
+    for sql in sqls:
+        if batch and size + len(sql) > window:
+            yield batch
+            batch = []
+            size = 0
+        batch.append(sql)
+        size += len(sql) + 5
+    if batch:
+        yield batch
+
+
 # https://dev.mysql.com/doc/internals/en/integer.html#packet-Protocol::LengthEncodedInteger
 def _lenenc_int(i):
     if i < 0:
@@ -151,7 +191,13 @@ class Connection:
         (if no authenticate method) for returning a string from the user. (experimental)
     :param server_public_key: SHA256 authentication plugin public key value. (default: None)
     :param binary_prefix: Add _binary prefix on bytes and bytearray. (default: False)
-    :param compress: Not supported.
+    :param prepared_statement_cache_size: Number of server-side prepared statements
+        kept open per connection by :class:`~pymysql.cursors.PreparedCursor`.
+        The least recently used one is closed when the cache is full. (default: 32)
+    :param compress: Compress traffic after authentication: True picks zstd when the
+        server offers it and the zstandard package is installed, zlib otherwise;
+        "zlib" or "zstd" asks for one algorithm. The connection stays uncompressed
+        if the server supports neither. (default: None)
     :param named_pipe: Not supported.
     :param db: **DEPRECATED** Alias for database.
     :param passwd: **DEPRECATED** Alias for password.
@@ -165,6 +211,11 @@ class Connection:
     _closed = False
     _secure = False
 
+    #: Max bytes of queries :meth:`query_pipeline` sends before decoding
+    #: their results.  Replies that arrive while sending are received into
+    #: the receive buffer, so a larger window costs memory, not a deadlock.
+    pipeline_window = 64 * 1024
+
     def __init__(
         self,
         *,
@@ -196,6 +247,7 @@ class Connection:
         binary_prefix=False,
         program_name=None,
         server_public_key=None,
+        prepared_statement_cache_size=32,
         ssl=None,
         ssl_ca=None,
         ssl_cert=None,
@@ -204,7 +256,7 @@ class Connection:
         ssl_key_password=None,
         ssl_verify_cert=None,
         ssl_verify_identity=None,
-        compress=None,  # not supported
+        compress=None,
         named_pipe=None,  # not supported
         passwd=None,  # deprecated
         db=None,  # deprecated
@@ -222,10 +274,11 @@ class Connection:
             # )
             password = passwd
 
-        if compress or named_pipe:
-            raise NotImplementedError(
-                "compress and named_pipe arguments are not supported"
-            )
+        if named_pipe:
+            raise NotImplementedError("named_pipe argument is not supported")
+        compression.check_algorithm(compress)
+        self._compress = compress
+        self._compressor = None
 
         self._local_infile = bool(local_infile)
         if self._local_infile:
@@ -328,6 +381,9 @@ class Connection:
 
         self._result = None
         self._affected_rows = 0
+        self._recv_buffer = bytearray()
+        self._recv_view = memoryview(self._recv_buffer)
+        self._recv_start = self._recv_end = 0
         self.host_info = "Not connected"
 
         # specified autocommit mode. None means use server default.
@@ -345,6 +401,11 @@ class Connection:
         self._auth_plugin_map = auth_plugin_map or {}
         self._binary_prefix = binary_prefix
         self.server_public_key = server_public_key
+        if prepared_statement_cache_size < 1:
+            raise ValueError("prepared_statement_cache_size should be >= 1")
+        self.prepared_statement_cache_size = prepared_statement_cache_size
+        # sql (bytes) -> PreparedStatement, least recently used first.
+        self._prepared_statements = collections.OrderedDict()
 
         self._connect_attrs = {
             "_client_name": "pymysql",
@@ -416,6 +477,8 @@ class Connection:
         if self._sock is None:
             return
         send_data = struct.pack("<iB", 1, COMMAND.COM_QUIT)
+        if self._compressor is not None:
+            self._compressor.reset()
         try:
             self._write_bytes(send_data)
         except Exception:
@@ -436,7 +499,7 @@ class Connection:
             except:  # noqa
                 pass
         self._sock = None
-        self._rfile = None
+        self._compressor = None
 
     __del__ = _force_close
 
@@ -563,10 +626,185 @@ class Connection:
         self._affected_rows = self._read_query_result(unbuffered=unbuffered)
         return self._affected_rows
 
+    def query_pipeline(self, sqls):
+        """Send independent queries back to back, then read their results in
+        order, so that they cost about one network round trip in total.
+
+        The queries are not a transaction and not a multi-statement: the
+        server runs each one on its own, and one failing doesn't stop the
+        ones after it.  Results are always read buffered.
+
+        :param sqls: Queries (str or bytes), already escaped.
+        :return: For each query, the list of its MySQLResult (one per result
+            set) or the MySQLError the server returned for it.
+        :rtype: list
+
+        :raise ProgrammingError: If an unbuffered result is still being read.
+        :raise NotSupportedError: For a ``LOAD DATA LOCAL`` statement.
+        """
+        sqls = self._encode_pipeline(sqls)
+        if self._result is not None:
+            while self._result.has_next:
+                self.next_result()
+            self._result = None
+        outcomes = []
+        for batch in _pipeline_batches(sqls, self.pipeline_window):
+            self._send_pipeline(batch)
+            for _ in batch:
+                outcomes.append(self._read_pipeline_result())
+        return outcomes
+
+    def _encode_pipeline(self, sqls):
+        if not self._sock:
+            raise err.InterfaceError(0, "")
+        if self._result is not None and self._result.unbuffered_active:
+            raise err.ProgrammingError(
+                "Can't pipeline queries while an unbuffered result is being read"
+            )
+        encoded = []
+        for sql in sqls:
+            if isinstance(sql, str):
+                sql = sql.encode(self.encoding, "surrogateescape")
+            if RE_LOAD_LOCAL.match(sql):
+                raise err.NotSupportedError("LOAD DATA LOCAL can't be pipelined")
+            encoded.append(sql)
+        return encoded
+
+    def _send_pipeline(self, sqls):
+        """Write a COM_QUERY for each of sqls, receiving replies meanwhile.
+
+        The server answers the first queries while the rest are still being
+        written.  If nothing read those replies, the server would block
+        writing them once the socket buffers are full and stop reading the
+        queries this is blocked writing.
+        """
+        compressor = self._compressor
+        chunks = []
+        for sql in sqls:
+            for packet in self._command_packets(COMMAND.COM_QUERY, sql):
+                if compressor is not None:
+                    packet = compressor.pack(packet)
+                chunks.append(packet)
+        view = memoryview(b"".join(chunks))
+
+        sock = self._sock
+        sock.setblocking(False)
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+                while view:
+                    events = selector.select(self._write_timeout)
+                    if not events:
+                        raise TimeoutError("timed out")
+                    ready = events[0][1]
+                    if ready & selectors.EVENT_READ:
+                        self._recv_available()
+                    if ready & selectors.EVENT_WRITE:
+                        try:
+                            view = view[sock.send(view) :]
+                        except _WOULD_BLOCK:
+                            pass
+        except OSError as e:
+            self._force_close()
+            raise err.OperationalError(
+                CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
+            )
+        finally:
+            if self._sock is not None:
+                sock.settimeout(self._write_timeout)
+
+    def _read_pipeline_result(self):
+        self._next_seq_id = 1
+        results = []
+        try:
+            self._read_query_result()
+            results.append(self._result)
+            while self._result.has_next:
+                self.next_result()
+                results.append(self._result)
+        except err.MySQLError as e:
+            if not self._sock:
+                # The connection is gone, not just this query.
+                raise
+            return e
+        return results
+
     def next_result(self, unbuffered=False):
-        self._affected_rows = self._read_query_result(unbuffered=unbuffered)
+        # Every result of a prepared statement uses the binary protocol.
+        binary = self._result is not None and self._result.binary
+        self._affected_rows = self._read_query_result(
+            unbuffered=unbuffered, binary=binary
+        )
+        return self._affected_rows
+
+    def execute_prepared(self, sql, params=(), unbuffered=False):
+        """Execute sql (with ``?`` markers) as a server-side prepared statement.
+
+        The statement is prepared on first use and kept in a per-connection
+        LRU cache, so later executions only send COM_STMT_EXECUTE.
+        """
+        if isinstance(sql, str):
+            sql = sql.encode(self.encoding, "surrogateescape")
+        stmt = self._prepare(sql)
+        try:
+            self._send_execute(stmt, params, unbuffered)
+        except err.OperationalError as e:
+            if e.args[0] != ER.UNKNOWN_STMT_HANDLER:
+                raise
+            # The server lost the handle (e.g. it was deallocated behind our
+            # back); prepare it again once.
+            self._prepared_statements.pop(sql, None)
+            stmt = self._prepare(sql)
+            self._send_execute(stmt, params, unbuffered)
         return self._affected_rows
 
+    def _send_execute(self, stmt, params, unbuffered):
+        payload = prepared.build_execute_payload(stmt, params, self.encoding)
+        self._execute_command(COMMAND.COM_STMT_EXECUTE, payload)
+        self._affected_rows = self._read_query_result(
+            unbuffered=unbuffered, binary=True
+        )
+
+    def _prepare(self, sql):
+        """Return the cached PreparedStatement for sql, preparing it if needed."""
+        cache = self._prepared_statements
+        stmt = cache.get(sql)
+        if stmt is not None:
+            cache.move_to_end(sql)
+            return stmt
+
+        while len(cache) >= self.prepared_statement_cache_size:
+            _, evicted = cache.popitem(last=False)
+            self._close_statement(evicted)
+
+        self._execute_command(COMMAND.COM_STMT_PREPARE, sql)
+        packet = self._read_packet()
+        packet.advance(1)  # status: always 0x00
+        statement_id, column_count, param_count = packet.read_struct("<IHH")
+        # Parameter and column definitions: the column metadata is sent
+        # again with every result set, so these are skipped.
+        self._skip_definitions(param_count)
+        self._skip_definitions(column_count)
+
+        stmt = prepared.PreparedStatement(sql, statement_id, param_count, column_count)
+        cache[sql] = stmt
+        return stmt
+
+    def _skip_definitions(self, count):
+        if not count:
+            return
+        for _ in range(count):
+            self._read_packet()
+        if not self.client_flag & CLIENT.DEPRECATE_EOF:
+            eof_packet = self._read_packet()
+            assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
+
+    def _close_statement(self, stmt):
+        # COM_STMT_CLOSE has no response.
+        self._execute_command(
+            COMMAND.COM_STMT_CLOSE, struct.pack("<I", stmt.statement_id)
+        )
+
     def affected_rows(self):
         return self._affected_rows
 
@@ -662,11 +900,16 @@ class Connection:
                 sock.settimeout(None)
 
             self._sock = sock
-            self._rfile = sock.makefile("rb")
+            self._recv_start = self._recv_end = 0
             self._next_seq_id = 0
+            self._compressor = None
+            # Statement handles belong to the old session; they are prepared
+            # again on next use.
+            self._prepared_statements.clear()
 
             self._get_server_information()
             self._request_authentication()
+            self._start_compression()
 
             # Send "SET NAMES" query on init for:
             # - Ensure charaset (and collation) is set to the server.
@@ -696,7 +939,6 @@ class Connection:
             if self.autocommit_mode is not None:
                 self.autocommit(self.autocommit_mode)
         except BaseException as e:
-            self._rfile = None
             if sock is not None:
                 try:
                     sock.close()
@@ -739,14 +981,14 @@ class Connection:
         :raise OperationalError: If the connection to the MySQL server is lost.
         :raise InternalError: If the packet sequence number is wrong.
         """
-        buff = bytearray()
+        buff = None
         while True:
             packet_header = self._read_bytes(4)
             # if DEBUG: dump_packet(packet_header)
 
             btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
             bytes_to_read = btrl + (btrh << 16)
-            if packet_number != self._next_seq_id:
+            if packet_number != self._next_seq_id and self._compressor is None:
                 self._force_close()
                 if packet_number == 0:
                     # MariaDB sends error packet with seqno==0 when shutdown
@@ -758,17 +1000,26 @@ class Connection:
                     "Packet sequence number wrong - got %d expected %d"
                     % (packet_number, self._next_seq_id)
                 )
-            self._next_seq_id = (self._next_seq_id + 1) % 256
+            # Servers don't check packet sequence ids inside compressed frames
+            # and need not keep them in step; follow whatever they send.
+            self._next_seq_id = (packet_number + 1) % 256
 
             recv_data = self._read_bytes(bytes_to_read)
             if DEBUG:
                 dump_packet(recv_data)
-            buff += recv_data
             # https://dev.mysql.com/doc/internals/en/sending-more-than-16mbyte.html
             if bytes_to_read < MAX_PACKET_LEN:
+                if buff is not None:
+                    buff += recv_data
+                    recv_data = bytes(buff)
                 break
+            if buff is None:
+                buff = bytearray()
+            buff += recv_data
 
-        packet = packet_type(bytes(buff), self.encoding)
+        # Unless the packet was split, recv_data is a view into the receive
+        # buffer: rows are decoded straight from it without copying.
+        packet = packet_type(recv_data, self.encoding)
         if packet.is_error_packet():
             if self._result is not None and self._result.unbuffered_active is True:
                 self._result.unbuffered_active = False
@@ -776,11 +1027,84 @@ class Connection:
         return packet
 
     def _read_bytes(self, num_bytes):
-        self._sock.settimeout(self._read_timeout)
+        compressor = self._compressor
+        if compressor is None:
+            return self._read_raw_bytes(num_bytes)
         while True:
+            data = compressor.take(num_bytes)
+            if data is not None:
+                return data
+            header = self._read_raw_bytes(compression.HEADER_SIZE)
+            payload = self._read_raw_bytes(compressor.read_header(header))
             try:
-                data = self._rfile.read(num_bytes)
-                break
+                compressor.feed(payload)
+            except err.InternalError:
+                self._force_close()
+                raise
+
+    def _read_raw_bytes(self, num_bytes):
+        """Return the next num_bytes from the socket as a memoryview.
+
+        The view points into the receive buffer and is only valid until the
+        next read.
+        """
+        start = self._recv_start
+        end = start + num_bytes
+        if end > self._recv_end:
+            self._fill_recv_buffer(num_bytes)
+            start = self._recv_start
+            end = start + num_bytes
+        self._recv_start = end
+        return self._recv_view[start:end]
+
+    def _reserve_recv_buffer(self, num_bytes):
+        """Make room for num_bytes unread bytes, at least as many as are
+        already buffered, in the receive buffer."""
+        view = self._recv_view
+        start, end = self._recv_start, self._recv_end
+        pending = end - start
+        if start + num_bytes > len(view):
+            size = RECV_BUFFER_SIZE
+            while size < num_bytes:
+                size *= 2
+            if size != len(view):
+                # Packets handed out earlier may still reference the old
+                # buffer, so it is replaced rather than resized.
+                self._recv_buffer = bytearray(size)
+                new_view = memoryview(self._recv_buffer)
+                new_view[:pending] = view[start:end]
+                self._recv_view = view = new_view
+            else:
+                view[:pending] = view[start:end]
+            self._recv_start, self._recv_end = 0, pending
+
+    def _recv_available(self):
+        """Receive whatever the non-blocking socket has ready."""
+        if self._recv_end == len(self._recv_view):
+            self._reserve_recv_buffer(
+                self._recv_end - self._recv_start + RECV_BUFFER_SIZE
+            )
+        try:
+            received = self._sock.recv_into(self._recv_view[self._recv_end :])
+        except _WOULD_BLOCK:
+            return
+        if not received:
+            self._force_close()
+            raise err.OperationalError(
+                CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
+            )
+        self._recv_end += received
+
+    def _fill_recv_buffer(self, num_bytes):
+        """Receive until at least num_bytes unread bytes are buffered."""
+        self._reserve_recv_buffer(num_bytes)
+        view = self._recv_view
+        start, end = self._recv_start, self._recv_end
+
+        self._sock.settimeout(self._read_timeout)
+        while end - start < num_bytes:
+            try:
+                received = self._sock.recv_into(view[end:])
             except OSError as e:
                 if e.errno == errno.EINTR:
                     continue
@@ -793,14 +1117,17 @@ class Connection:
                 # Don't convert unknown exception to MySQLError.
                 self._force_close()
                 raise
-        if len(data) < num_bytes:
-            self._force_close()
-            raise err.OperationalError(
-                CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
-            )
-        return data
+            if not received:
+                self._force_close()
+                raise err.OperationalError(
+                    CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
+                )
+            end += received
+        self._recv_start, self._recv_end = start, end
 
     def _write_bytes(self, data):
+        if self._compressor is not None:
+            data = self._compressor.pack(data)
         self._sock.settimeout(self._write_timeout)
         try:
             self._sock.sendall(data)
@@ -810,18 +1137,18 @@ class Connection:
                 CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
             )
 
-    def _read_query_result(self, unbuffered=False):
+    def _read_query_result(self, unbuffered=False, binary=False):
         self._result = None
         if unbuffered:
             try:
-                result = MySQLResult(self)
+                result = MySQLResult(self, binary)
                 result.init_unbuffered_query()
             except:
                 result.unbuffered_active = False
                 result.connection = None
                 raise
         else:
-            result = MySQLResult(self)
+            result = MySQLResult(self, binary)
             result.read()
         self._result = result
         if result.server_status is not None:
@@ -852,6 +1179,15 @@ class Connection:
                 self.next_result()
             self._result = None
 
+        self._send_command(command, sql)
+
+    def _send_command(self, command, sql):
+        """Write the packets of one command; its response is not read."""
+        for packet in self._command_packets(command, sql):
+            self._write_bytes(packet)
+
+    def _command_packets(self, command, sql):
+        """Yield the packets of one command, not yet compressed."""
         if isinstance(sql, str):
             sql = sql.encode(self.encoding)
 
@@ -861,10 +1197,12 @@ class Connection:
         # calling self..write_packet()
         prelude = struct.pack("<iB", packet_size, command)
         packet = prelude + sql[: packet_size - 1]
-        self._write_bytes(packet)
+        if self._compressor is not None:
+            self._compressor.reset()
         if DEBUG:
             dump_packet(packet)
         self._next_seq_id = 1
+        yield packet
 
         if packet_size < MAX_PACKET_LEN:
             return
@@ -872,15 +1210,67 @@ class Connection:
         sql = sql[packet_size - 1 :]
         while True:
             packet_size = min(MAX_PACKET_LEN, len(sql))
-            self.write_packet(sql[:packet_size])
+            header = _pack_int24(packet_size) + bytes([self._next_seq_id])
+            yield header + sql[:packet_size]
+            self._next_seq_id = (self._next_seq_id + 1) % 256
             sql = sql[packet_size:]
             if not sql and packet_size < MAX_PACKET_LEN:
                 break
 
     def _request_authentication(self):
         # https://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::HandshakeResponse
+        data_init = self._handshake_response_header()
+
+        if self.ssl and self.server_capabilities & CLIENT.SSL:
+            self.write_packet(data_init)
+
+            self._sock = self.ctx.wrap_socket(self._sock, server_hostname=self.host)
+            self._secure = True
+
+        self.write_packet(self._handshake_response(data_init))
+        auth_packet = self._read_packet()
+
+        # if authentication method isn't accepted the first byte
+        # will have the octet 254
+        if auth_packet.is_auth_switch_request():
+            if DEBUG:
+                print("received auth switch")
+            # https://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::AuthSwitchRequest
+            auth_packet.read_uint8()  # 0xfe packet identifier
+            plugin_name = auth_packet.read_string()
+            if (
+                self.server_capabilities & CLIENT.PLUGIN_AUTH
+                and plugin_name is not None
+            ):
+                auth_packet = self._process_auth(plugin_name, auth_packet)
+            else:
+                raise err.OperationalError("received unknown auth switch request")
+        elif auth_packet.is_extra_auth_data():
+            if DEBUG:
+                print("received extra data")
+            # https://dev.mysql.com/doc/internals/en/successful-authentication.html
+            auth_packet = _auth.run_steps(self, self._extra_auth_steps(auth_packet))
+
+        if DEBUG:
+            print("Succeed to auth")
+
+    def _handshake_response_header(self):
+        """Build the fixed part of the HandshakeResponse (also the SSLRequest)."""
         if int(self.server_version.split(".", 1)[0]) >= 5:
-            self.client_flag |= CLIENT.MULTI_RESULTS
+            self.client_flag |= CLIENT.MULTI_RESULTS | CLIENT.PS_MULTI_RESULTS
+        self.client_flag &= ~(CLIENT.COMPRESS | CLIENT.ZSTD_COMPRESSION_ALGORITHM)
+        algorithm = compression.negotiate(self._compress, self.server_capabilities)
+        if algorithm == compression.ZSTD:
+            self.client_flag |= CLIENT.ZSTD_COMPRESSION_ALGORITHM
+        elif algorithm == compression.ZLIB:
+            self.client_flag |= CLIENT.COMPRESS
+
+        # Servers that don't announce DEPRECATE_EOF keep sending EOF packets.
+        # Decided per handshake since a reconnect may reach another server.
+        if self.server_capabilities & CLIENT.DEPRECATE_EOF:
+            self.client_flag |= CLIENT.DEPRECATE_EOF
+        else:
+            self.client_flag &= ~CLIENT.DEPRECATE_EOF
 
         if self.user is None:
             raise ValueError("Did not specify a username")
@@ -889,17 +1279,12 @@ class Connection:
         if isinstance(self.user, str):
             self.user = self.user.encode(self.encoding)
 
-        data_init = struct.pack(
+        return struct.pack(
             "<iIB23s", self.client_flag, MAX_PACKET_LEN, charset_id, b""
         )
 
-        if self.ssl and self.server_capabilities & CLIENT.SSL:
-            self.write_packet(data_init)
-
-            self._sock = self.ctx.wrap_socket(self._sock, server_hostname=self.host)
-            self._rfile = self._sock.makefile("rb")
-            self._secure = True
-
+    def _handshake_response(self, data_init):
+        """Build the full HandshakeResponse packet for the announced auth plugin."""
         data = data_init + self.user + b"\0"
 
         authresp = b""
@@ -953,39 +1338,17 @@ class Connection:
                 connect_attrs += _lenenc_int(len(v)) + v
             data += _lenenc_int(len(connect_attrs)) + connect_attrs
 
-        self.write_packet(data)
-        auth_packet = self._read_packet()
+        if self.client_flag & CLIENT.ZSTD_COMPRESSION_ALGORITHM:
+            data += struct.pack("B", compression.DEFAULT_ZSTD_LEVEL)
 
-        # if authentication method isn't accepted the first byte
-        # will have the octet 254
-        if auth_packet.is_auth_switch_request():
-            if DEBUG:
-                print("received auth switch")
-            # https://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::AuthSwitchRequest
-            auth_packet.read_uint8()  # 0xfe packet identifier
-            plugin_name = auth_packet.read_string()
-            if (
-                self.server_capabilities & CLIENT.PLUGIN_AUTH
-                and plugin_name is not None
-            ):
-                auth_packet = self._process_auth(plugin_name, auth_packet)
-            else:
-                raise err.OperationalError("received unknown auth switch request")
-        elif auth_packet.is_extra_auth_data():
-            if DEBUG:
-                print("received extra data")
-            # https://dev.mysql.com/doc/internals/en/successful-authentication.html
-            if self._auth_plugin_name == "caching_sha2_password":
-                auth_packet = _auth.caching_sha2_password_auth(self, auth_packet)
-            elif self._auth_plugin_name == "sha256_password":
-                auth_packet = _auth.sha256_password_auth(self, auth_packet)
-            else:
-                raise err.OperationalError(
-                    "Received extra packet for auth method %r", self._auth_plugin_name
-                )
+        return data
 
-        if DEBUG:
-            print("Succeed to auth")
+    def _start_compression(self):
+        """Switch to compressed frames once authentication succeeded."""
+        if self.client_flag & CLIENT.ZSTD_COMPRESSION_ALGORITHM:
+            self._compressor = compression.PacketCompressor(compression.ZSTD)
+        elif self.client_flag & CLIENT.COMPRESS:
+            self._compressor = compression.PacketCompressor(compression.ZLIB)
 
     def _process_auth(self, plugin_name, auth_packet):
         handler = self._get_auth_plugin_handler(plugin_name)
@@ -999,23 +1362,10 @@ class Connection:
                         f"Authentication plugin '{plugin_name}'"
                         f" not loaded: - {type(handler)!r} missing authenticate method",
                     )
-        if plugin_name == b"caching_sha2_password":
-            return _auth.caching_sha2_password_auth(self, auth_packet)
-        elif plugin_name == b"sha256_password":
-            return _auth.sha256_password_auth(self, auth_packet)
-        elif plugin_name == b"mysql_native_password":
-            data = _auth.scramble_native_password(self.password, auth_packet.read_all())
-        elif plugin_name == b"client_ed25519":
-            data = _auth.ed25519_password(self.password, auth_packet.read_all())
-        elif plugin_name == b"mysql_old_password":
-            data = (
-                _auth.scramble_old_password(self.password, auth_packet.read_all())
-                + b"\0"
-            )
-        elif plugin_name == b"mysql_clear_password":
-            # https://dev.mysql.com/doc/internals/en/clear-text-authentication.html
-            data = self.password + b"\0"
-        elif plugin_name == b"dialog":
+        steps = self._auth_switch_steps(plugin_name, auth_packet)
+        if steps is not None:
+            return _auth.run_steps(self, steps)
+        if plugin_name == b"dialog":
             pkt = auth_packet
             while True:
                 flag = pkt.read_uint8()
@@ -1052,16 +1402,44 @@ class Connection:
                 if pkt.is_ok_packet() or last:
                     break
             return pkt
-        else:
-            raise err.OperationalError(
-                CR.CR_AUTH_PLUGIN_CANNOT_LOAD,
-                "Authentication plugin '%s' not configured" % plugin_name,
-            )
+        raise err.OperationalError(
+            CR.CR_AUTH_PLUGIN_CANNOT_LOAD,
+            "Authentication plugin '%s' not configured" % plugin_name,
+        )
 
-        self.write_packet(data)
-        pkt = self._read_packet()
-        pkt.check_error()
-        return pkt
+    def _auth_switch_steps(self, plugin_name, auth_packet):
+        """Return the auth steps (see :func:`_auth.run_steps`) answering an
+        auth switch to a built-in plugin, or None for any other plugin."""
+        if plugin_name == b"caching_sha2_password":
+            return _auth.caching_sha2_password_steps(self, auth_packet)
+        elif plugin_name == b"sha256_password":
+            return _auth.sha256_password_steps(self, auth_packet)
+        elif plugin_name == b"mysql_native_password":
+            data = _auth.scramble_native_password(self.password, auth_packet.read_all())
+        elif plugin_name == b"client_ed25519":
+            data = _auth.ed25519_password(self.password, auth_packet.read_all())
+        elif plugin_name == b"mysql_old_password":
+            data = (
+                _auth.scramble_old_password(self.password, auth_packet.read_all())
+                + b"\0"
+            )
+        elif plugin_name == b"mysql_clear_password":
+            # https://dev.mysql.com/doc/internals/en/clear-text-authentication.html
+            data = self.password + b"\0"
+        else:
+            return None
+        return _auth.send_step(data)
+
+    def _extra_auth_steps(self, auth_packet):
+        """Return the auth steps continuing the handshake's plugin after the
+        server sent extra auth data."""
+        if self._auth_plugin_name == "caching_sha2_password":
+            return _auth.caching_sha2_password_steps(self, auth_packet)
+        elif self._auth_plugin_name == "sha256_password":
+            return _auth.sha256_password_steps(self, auth_packet)
+        raise err.OperationalError(
+            "Received extra packet for auth method %r", self._auth_plugin_name
+        )
 
     def _get_auth_plugin_handler(self, plugin_name):
         plugin_class = self._auth_plugin_map.get(plugin_name)
@@ -1174,11 +1552,14 @@ class Connection:
 
 
 class MySQLResult:
-    def __init__(self, connection):
+    def __init__(self, connection, binary=False):
         """
         :type connection: Connection
+        :param binary: Rows use the binary protocol (prepared statements).
         """
         self.connection = connection
+        self.binary = binary
+        self._deprecate_eof = bool(connection.client_flag & CLIENT.DEPRECATE_EOF)
         self.affected_rows = None
         self.insert_id = None
         self.server_status = None
@@ -1265,14 +1646,14 @@ class MySQLResult:
         self._read_ok_packet(ok_packet)
 
     def _check_packet_is_eof(self, packet):
-        if not packet.is_eof_packet():
+        if self._deprecate_eof:
+            if not packet.is_eof_ok_packet():
+                return False
+            wp = OKPacketWrapper(packet)
+        elif packet.is_eof_packet():
+            wp = EOFPacketWrapper(packet)
+        else:
             return False
-        # TODO: Support CLIENT.DEPRECATE_EOF
-        # 1) Add DEPRECATE_EOF to CAPABILITIES
-        # 2) Mask CAPABILITIES with server_capabilities
-        # 3) if server_capabilities & CLIENT.DEPRECATE_EOF:
-        #    use OKPacketWrapper instead of EOFPacketWrapper
-        wp = EOFPacketWrapper(packet)
         self.warning_count = wp.warning_count
         self.has_next = wp.has_next
         return True
@@ -1300,6 +1681,24 @@ class MySQLResult:
         self.rows = (row,)  # rows should tuple of row for MySQL-python compatibility.
         return row
 
+    def _read_columns_unbuffered(self, size=None):
+        """Decode up to size remaining rows (all of them by default) into a
+        list of :class:`~pymysql.columnar.Column`, without building row
+        tuples."""
+        return columnar.read_columns(self, self._iter_unbuffered_payloads(size))
+
+    def _iter_unbuffered_payloads(self, size):
+        count = 0
+        while self.unbuffered_active and (size is None or count < size):
+            packet = self.connection._read_packet()
+            if self._check_packet_is_eof(packet):
+                self.unbuffered_active = False
+                self.connection = None
+                self.rows = None
+                return
+            yield packet.get_buffer()
+            count += 1
+
     def _finish_unbuffered_query(self):
         # After much reading on the MySQL protocol, it appears that there is,
         # in fact, no way to stop MySQL from sending all the data after
@@ -1337,22 +1736,49 @@ class MySQLResult:
         self.rows = tuple(rows)
 
     def _read_row_from_packet(self, packet):
+        data = packet.get_buffer()
+        if self.binary:
+            return self._binary_decoder.decode(data)
+        try:
+            return self._text_decoder(data)
+        except IndexError:
+            # Fewer columns than expected; decode the ones that are there.
+            pass
         row = []
+        pos = 0
+        end = len(data)
         for encoding, converter in self.converters:
-            try:
-                data = packet.read_length_coded_string()
-            except IndexError:
+            if pos >= end:
                 # No more columns in this row
                 # See https://github.com/PyMySQL/PyMySQL/pull/434
                 break
-            if data is not None:
-                if encoding is not None:
-                    data = data.decode(encoding)
-                if DEBUG:
-                    print("DEBUG: DATA = ", data)
-                if converter is not None:
-                    data = converter(data)
-            row.append(data)
+            length = data[pos]
+            pos += 1
+            if length >= NULL_COLUMN:
+                if length == NULL_COLUMN:
+                    row.append(None)
+                    continue
+                if length == UNSIGNED_SHORT_COLUMN:
+                    length = data[pos] | data[pos + 1] << 8
+                    pos += 2
+                elif length == UNSIGNED_INT24_COLUMN:
+                    length = data[pos] | data[pos + 1] << 8 | data[pos + 2] << 16
+                    pos += 3
+                else:
+                    length = struct.unpack_from("<Q", data, pos)[0]
+                    pos += 8
+            # Decode straight from the receive buffer: the only objects
+            # allocated per column are the values themselves.
+            if encoding is not None:
+                value = str(data[pos : pos + length], encoding)
+            else:
+                value = bytes(data[pos : pos + length])
+            pos += length
+            if DEBUG:
+                print("DEBUG: DATA = ", value)
+            if converter is not None:
+                value = converter(value)
+            row.append(value)
         return tuple(row)
 
     def _get_descriptions(self):
@@ -1394,9 +1820,14 @@ class MySQLResult:
                 print(f"DEBUG: field={field}, converter={converter}")
             self.converters.append((encoding, converter))
 
-        eof_packet = self.connection._read_packet()
-        assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
+        if not self._deprecate_eof:
+            eof_packet = self.connection._read_packet()
+            assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
         self.description = tuple(description)
+        if self.binary:
+            self._binary_decoder = BinaryRowDecoder(self.fields, self.converters)
+        else:
+            self._text_decoder = text_row_decoder(self.converters)
 
 
 class LoadLocalFile:
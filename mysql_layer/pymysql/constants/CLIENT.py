@@ -35,4 +35,7 @@ CAPABILITIES = (
 # Not done yet
 HANDLE_EXPIRED_PASSWORDS = 1 << 22
 SESSION_TRACK = 1 << 23
+
+# Requested only when the server announces it.
 DEPRECATE_EOF = 1 << 24
+ZSTD_COMPRESSION_ALGORITHM = 1 << 26
@@ -1,6 +1,7 @@
+import collections
 import re
 import warnings
-from . import err
+from . import columnar, err, prepared
 
 
 #: Regular expression for :meth:`Cursor.executemany`.
@@ -41,6 +42,7 @@ class Cursor:
         self._executed = None
         self._result = None
         self._rows = None
+        self._pipeline = None
 
     def close(self):
         """
@@ -82,6 +84,9 @@ class Cursor:
 
     def _nextset(self, unbuffered=False):
         """Get the next query set."""
+        if self._pipeline:
+            self._next_pipeline_result()
+            return True
         conn = self._get_db()
         current_result = self._result
         if current_result is None or current_result is not conn._result:
@@ -191,9 +196,79 @@ class Cursor:
         self.rowcount = sum(self.execute(query, arg) for arg in args)
         return self.rowcount
 
+    def execute_pipeline(self, queries):
+        """Execute independent queries in a single network round trip.
+
+        :param queries: Queries to execute, each either a str or a
+            ``(query, args)`` pair as for :meth:`execute`.
+        :type queries: list
+
+        :return: Number of affected rows of the first query, or 0 if
+            ``queries`` is empty.
+        :rtype: int
+
+        The queries are sent back to back and their results are read in
+        order, so a chatty sequence of short queries costs about one round
+        trip instead of one per query.  The cursor starts on the first
+        query's result; :meth:`nextset` moves to the result of the next one,
+        as for a multi-statement query.
+
+        The queries are not a transaction: each one runs on its own, and one
+        failing does not stop the ones after it.  The error of the first
+        query that failed is raised once every result has been read, with
+        the position of that query in its ``pipeline_index`` attribute.
+
+        See :meth:`pymysql.connections.Connection.query_pipeline`.
+        """
+        while self.nextset():
+            pass
+
+        sqls = self._mogrify_pipeline(queries)
+        if not sqls:
+            return 0
+        self._clear_result()
+        return self._load_pipeline(sqls, self._get_db().query_pipeline(sqls))
+
+    def _mogrify_pipeline(self, queries):
+        return [
+            self.mogrify(query) if isinstance(query, str) else self.mogrify(*query)
+            for query in queries
+        ]
+
+    def _load_pipeline(self, sqls, outcomes):
+        results = collections.deque()
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, err.MySQLError):
+                outcome.pipeline_index = index
+                raise outcome
+            results.extend(outcome)
+        self._pipeline = results
+        self._next_pipeline_result()
+        self._executed = ";\n".join(sqls)
+        return self.rowcount
+
+    def _next_pipeline_result(self):
+        pipeline = self._pipeline
+        result = pipeline.popleft()
+        self._clear_result()
+        self._pipeline = pipeline
+        self._do_get_result(result)
+
     def _do_execute_many(
         self, prefix, values, postfix, args, max_stmt_length, encoding
     ):
+        rows = 0
+        for sql in self._iter_execute_many(
+            prefix, values, postfix, args, max_stmt_length, encoding
+        ):
+            rows += self.execute(sql)
+        self.rowcount = rows
+        return rows
+
+    def _iter_execute_many(
+        self, prefix, values, postfix, args, max_stmt_length, encoding
+    ):
+        """Yield multi-row statements no longer than max_stmt_length."""
         conn = self._get_db()
         escape = self._escape_args
         if isinstance(prefix, str):
@@ -206,20 +281,17 @@ class Cursor:
         if isinstance(v, str):
             v = v.encode(encoding, "surrogateescape")
         sql += v
-        rows = 0
         for arg in args:
             v = values % escape(arg, conn)
             if isinstance(v, str):
                 v = v.encode(encoding, "surrogateescape")
             if len(sql) + len(v) + len(postfix) + 1 > max_stmt_length:
-                rows += self.execute(sql + postfix)
+                yield sql + postfix
                 sql = bytearray(prefix)
             else:
                 sql += b","
             sql += v
-        rows += self.execute(sql + postfix)
-        self.rowcount = rows
-        return rows
+        yield sql + postfix
 
     def callproc(self, procname, args=()):
         """Execute stored procedure procname with args.
@@ -303,6 +375,38 @@ class Cursor:
         self.rownumber = len(self._rows)
         return result
 
+    def fetch_columns(self, size=None, as_numpy=False):
+        """Fetch the next size rows (all remaining rows by default) column
+        by column.
+
+        :param size: Maximum number of rows to fetch. (default: all)
+        :param as_numpy: Return NumPy arrays instead of ``array.array`` and
+            lists. Requires numpy.
+
+        :return: One :class:`~pymysql.columnar.Column` per result column,
+            or an empty list if the statement returned no result set.
+        :rtype: list
+
+        Rows of this cursor were already decoded into tuples by execute();
+        use :class:`ColumnarCursor` or :class:`SSCursor` to decode them
+        straight into columns.
+        """
+        self._check_executed()
+        if self._rows is None:
+            return []
+        end = len(self._rows) if size is None else self.rownumber + size
+        rows = self._result.rows[self.rownumber : end]
+        self.rownumber = min(end, len(self._rows))
+        columns = columnar.columns_from_rows(self._result, rows)
+        return columnar.to_numpy(columns) if as_numpy else columns
+
+    def fetchall_columnar(self, as_numpy=False):
+        """Fetch all remaining rows column by column.
+
+        See :meth:`fetch_columns`.
+        """
+        return self.fetch_columns(None, as_numpy)
+
     def scroll(self, value, mode="relative"):
         self._check_executed()
         if mode == "relative":
@@ -332,11 +436,14 @@ class Cursor:
         self.description = None
         self.lastrowid = None
         self._rows = None
+        self._pipeline = None
 
-    def _do_get_result(self):
+    def _do_get_result(self, result=None):
         conn = self._get_db()
+        if result is None:
+            result = conn._result
 
-        self._result = result = conn._result
+        self._result = result
 
         self.rowcount = result.affected_rows
         self.warning_count = result.warning_count
@@ -382,8 +489,8 @@ class DictCursorMixin:
     # You can override this to use OrderedDict or other dict-like types.
     dict_type = dict
 
-    def _do_get_result(self):
-        super()._do_get_result()
+    def _do_get_result(self, result=None):
+        super()._do_get_result(result)
         fields = []
         if self.description:
             for f in self._result.fields:
@@ -451,6 +558,10 @@ class SSCursor(Cursor):
     def nextset(self):
         return self._nextset(unbuffered=True)
 
+    def execute_pipeline(self, queries):
+        """Not supported: pipelined results are always read buffered."""
+        raise err.NotSupportedError("Unbuffered cursors can't pipeline queries")
+
     def read_next(self):
         """Read next row."""
         return self._conv_row(self._result._read_rowdata_packet_unbuffered())
@@ -481,6 +592,23 @@ class SSCursor(Cursor):
         """
         return iter(self.fetchone, None)
 
+    def fetch_columns(self, size=None, as_numpy=False):
+        """Read the next size rows (all remaining rows by default) from the
+        server straight into columns.
+
+        See :meth:`Cursor.fetch_columns`. Once the result is exhausted, the
+        columns are empty.
+        """
+        self._check_executed()
+        result = self._result
+        if result is None or not self.description:
+            return []
+        columns = result._read_columns_unbuffered(size)
+        self.rownumber += len(columns[0])
+        if not result.unbuffered_active:
+            self.warning_count = result.warning_count
+        return columnar.to_numpy(columns) if as_numpy else columns
+
     def fetchmany(self, size=None):
         """Fetch many."""
         self._check_executed()
@@ -529,3 +657,146 @@ class SSCursor(Cursor):
 
 class SSDictCursor(DictCursorMixin, SSCursor):
     """An unbuffered cursor, which returns results as a dictionary"""
+
+
+class ColumnarCursorMixin:
+    """
+    Read each result set column by column when the query completes.
+
+    Rows are decoded straight into :class:`~pymysql.columnar.Column`
+    containers, without a tuple per row, and ``fetch_columns()`` hands out
+    slices of them.  fetchone(), fetchmany() and fetchall() still work; they
+    build the row tuples when called.
+    """
+
+    _columns = None
+
+    def _clear_result(self):
+        super()._clear_result()
+        self._columns = None
+
+    def _do_get_result(self, result=None):
+        super()._do_get_result(result)
+        result = self._result
+        if not result.unbuffered_active:
+            if result.rows is not None:
+                # Read buffered, e.g. by execute_pipeline().
+                self._columns = columnar.columns_from_rows(result, result.rows)
+            return
+        try:
+            self._columns = result._read_columns_unbuffered()
+        except:
+            if result.unbuffered_active:
+                result._finish_unbuffered_query()
+            raise
+        self._rows = columnar.ColumnRows(self._columns)
+        self.rowcount = len(self._rows)
+        self.warning_count = result.warning_count
+
+
+class ColumnarCursor(ColumnarCursorMixin, Cursor):
+    """A buffered cursor which reads results column by column"""
+
+    def fetchall(self):
+        """Fetch all the rows."""
+        self._check_executed()
+        if self._rows is None:
+            return []
+        result = self._rows[self.rownumber :]
+        self.rownumber = len(self._rows)
+        return result
+
+    def fetch_columns(self, size=None, as_numpy=False):
+        """Fetch the next size rows (all remaining rows by default) column
+        by column.
+
+        See :meth:`Cursor.fetch_columns`. Fetching everything at once returns
+        the columns read by execute() without copying them.
+        """
+        self._check_executed()
+        if self._columns is None:
+            return []
+        start = self.rownumber
+        end = self.rowcount if size is None else min(start + size, self.rowcount)
+        self.rownumber = end
+        columns = columnar.slice_columns(self._columns, start, end)
+        return columnar.to_numpy(columns) if as_numpy else columns
+
+    def _query(self, q):
+        conn = self._get_db()
+        self._clear_result()
+        conn.query(q, unbuffered=True)
+        self._do_get_result()
+        return self.rowcount
+
+    def nextset(self):
+        return self._nextset(unbuffered=True)
+
+
+class PreparedCursorMixin:
+    """
+    Execute statements as server-side prepared statements.
+
+    Queries keep the pyformat placeholders (``%s`` or ``%(name)s``); they are
+    rewritten to ``?`` markers and the arguments are sent in binary form, so
+    nothing is escaped or interpolated on the client.  Each connection keeps
+    the most recently used statements prepared (see
+    ``prepared_statement_cache_size``), so a repeated query is parsed by the
+    server only once.
+
+    Only plain values (None, bool, int, float, str, bytes, Decimal, date,
+    datetime, time, timedelta) can be bound.  Rows come back through the
+    binary protocol as native Python values; custom decoders in ``conv`` are
+    only applied to string-like columns.
+    """
+
+    _unbuffered = False
+
+    def execute(self, query, args=None):
+        """Execute a query as a prepared statement.
+
+        :param query: Query to execute.
+        :type query: str
+
+        :param args: Parameters used with query. (optional)
+        :type args: tuple, list or dict
+
+        :return: Number of affected rows.
+        :rtype: int
+        """
+        while self.nextset():
+            pass
+
+        conn = self._get_db()
+        if args is None:
+            sql, params = query, ()
+        else:
+            sql, names = prepared.convert_placeholders(query)
+            params = prepared.bind_args(names, args)
+
+        self._clear_result()
+        conn.execute_prepared(sql, params, unbuffered=self._unbuffered)
+        self._do_get_result()
+        self._executed = query
+        return self.rowcount
+
+    def executemany(self, query, args):
+        """Execute the prepared statement once per item of args.
+
+        :return: Number of rows affected, if any.
+        :rtype: int or None
+        """
+        if not args:
+            return
+        self.rowcount = sum(self.execute(query, arg) for arg in args)
+        return self.rowcount
+
+
+class PreparedCursor(PreparedCursorMixin, Cursor):
+    """A cursor which uses server-side prepared statements"""
+
+
+class SSPreparedCursor(PreparedCursorMixin, SSCursor):
+    """An unbuffered cursor which uses server-side prepared statements"""
+
+    _unbuffered = True
@@ -0,0 +1,363 @@
+"""
+Thread-safe pool of :class:`~pymysql.connections.Connection` objects.
+
+Opening a connection costs a TCP connect, the handshake, authentication and
+``SET NAMES``.  A pool keeps authenticated connections around and hands them
+out again, so that cost is only paid when the pool has to grow.
+
+Usage::
+
+    pool = pymysql.pool.ConnectionPool(
+        minsize=1, maxsize=8, host="db", user="app", password="..."
+    )
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+
+There is no background thread; idle eviction and lifetime checks run when a
+connection is borrowed or returned, or when :meth:`ConnectionPool.prune` is
+called.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+from . import err
+from .connections import Connection
+
+
+class PoolError(err.InterfaceError):
+    """Exception raised when the pool is misused (closed pool, foreign connection)."""
+
+
+class PoolTimeoutError(err.OperationalError):
+    """Exception raised when no connection became available within the borrow timeout."""
+
+
+class _PoolEntry:
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.created_at = now
+        self.last_used = now
+
+
+_DEFAULT = object()
+
+
+class ConnectionPool:
+    """
+    A bounded pool of connections to a single MySQL server.
+
+    :param minsize: Number of connections opened up front and kept through
+        idle eviction. (default: 0)
+    :param maxsize: Maximum number of open connections, idle or borrowed.
+        (default: 10)
+    :param timeout: Seconds to wait for a connection when the pool is
+        exhausted. None means wait forever. (default: None)
+    :param max_idle_time: Idle connections above minsize are closed after this
+        many seconds. None disables idle eviction. (default: None)
+    :param max_lifetime: Connections are closed instead of reused once they are
+        this many seconds old. None disables the limit. (default: None)
+    :param ping_after: A connection that sat idle for at least this many
+        seconds is pinged before it is handed out. 0 pings on every borrow,
+        None never pings. (default: 60)
+    :param reset_on_return: Roll back any open transaction when a connection is
+        returned. (default: True)
+    :param connection_factory: Callable used to open connections.
+        (default: :class:`~pymysql.connections.Connection`)
+
+    Remaining keyword arguments are passed to ``connection_factory``.
+    """
+
+    def __init__(
+        self,
+        *,
+        minsize=0,
+        maxsize=10,
+        timeout=None,
+        max_idle_time=None,
+        max_lifetime=None,
+        ping_after=60,
+        reset_on_return=True,
+        connection_factory=Connection,
+        **connect_kwargs,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize should be >= 1")
+        if not (0 <= minsize <= maxsize):
+            raise ValueError("minsize should be >= 0 and <= maxsize")
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout should be >= 0")
+
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.reset_on_return = reset_on_return
+        self._connection_factory = connection_factory
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        # LIFO: the most recently returned connection is borrowed first, so
+        # surplus connections age at the left end and get evicted.
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        self._hits = 0
+        self._waits = 0
+        self._creations = 0
+        self._evictions = 0
+        self._timeouts = 0
+        self._ping_failures = 0
+
+        try:
+            for _ in range(minsize):
+                with self._cond:
+                    self._size += 1
+                entry = self._create()
+                with self._cond:
+                    self._idle.append(entry)
+        except BaseException:
+            # The caller never gets the pool, so nobody else can close these.
+            self._closed = True
+            self._close_entries(self._idle)
+            self._idle.clear()
+            self._size = 0
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        del exc_info
+        self.close()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def size(self):
+        """Number of open connections, idle or borrowed."""
+        return self._size
+
+    def stats(self):
+        """Return a snapshot of pool counters as a dict."""
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "hits": self._hits,
+                "waits": self._waits,
+                "creations": self._creations,
+                "evictions": self._evictions,
+                "timeouts": self._timeouts,
+                "ping_failures": self._ping_failures,
+            }
+
+    def acquire(self, timeout=_DEFAULT):
+        """
+        Borrow a connection from the pool.
+
+        :param timeout: Overrides the pool's borrow timeout for this call.
+
+        :raise PoolError: If the pool is closed.
+        :raise PoolTimeoutError: If no connection became available in time.
+        """
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            stale = []
+            try:
+                entry = self._checkout(deadline, stale)
+            finally:
+                self._close_entries(stale)
+            if entry is None:
+                # A slot was reserved for us; open the connection outside the lock.
+                entry = self._create()
+            elif not self._check_alive(entry):
+                continue
+            with self._cond:
+                if self._closed:
+                    self._size -= 1
+                    closed = True
+                else:
+                    self._in_use[id(entry.connection)] = entry
+                    closed = False
+            if closed:
+                self._close_entries([entry])
+                raise PoolError("Pool is closed")
+            return entry.connection
+
+    def release(self, conn):
+        """
+        Return a borrowed connection to the pool.
+
+        :raise PoolError: If the connection was not borrowed from this pool.
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None or entry.connection is not conn:
+            raise PoolError("Connection does not belong to this pool")
+
+        reusable = conn.open
+        if reusable and self.reset_on_return:
+            try:
+                conn.rollback()
+            except err.MySQLError:
+                reusable = False
+
+        now = time.monotonic()
+        with self._cond:
+            if reusable and not self._closed and not self._expired(entry, now):
+                entry.last_used = now
+                self._idle.append(entry)
+                entry = None
+            else:
+                self._size -= 1
+                if reusable:
+                    self._evictions += 1
+            self._cond.notify()
+        if entry is not None:
+            self._close_entries([entry])
+
+    @contextlib.contextmanager
+    def connection(self, timeout=_DEFAULT):
+        """Borrow a connection for the duration of a ``with`` block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def prune(self):
+        """Close idle connections past max_idle_time or max_lifetime."""
+        with self._cond:
+            stale = self._collect_stale(time.monotonic())
+        self._close_entries(stale)
+        return len(stale)
+
+    def close(self):
+        """
+        Close all idle connections and refuse further borrows.
+
+        Borrowed connections are closed when they are returned.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_entries(idle)
+
+    def _checkout(self, deadline, stale):
+        """Pick an idle entry or reserve a slot for a new connection.
+
+        Returns None when a slot was reserved.  Entries evicted on the way are
+        appended to stale so the caller can close them outside the lock.
+        """
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolError("Pool is closed")
+                now = time.monotonic()
+                stale.extend(self._collect_stale(now))
+                if self._idle:
+                    self._hits += 1
+                    return self._idle.pop()
+                if self._size < self.maxsize:
+                    self._size += 1
+                    return None
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - now
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if self._idle or self._size < self.maxsize:
+                        continue
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        "Timed out waiting for a connection from the pool"
+                    )
+
+    def _collect_stale(self, now):
+        """Remove expired entries from the idle deque.  Lock must be held."""
+        stale = []
+        kept = collections.deque()
+        for entry in self._idle:
+            idle_for = now - entry.last_used
+            if self._expired(entry, now) or (
+                self.max_idle_time is not None
+                and idle_for >= self.max_idle_time
+                and self._size - len(stale) > self.minsize
+            ):
+                stale.append(entry)
+            else:
+                kept.append(entry)
+        if stale:
+            self._idle = kept
+            self._size -= len(stale)
+            self._evictions += len(stale)
+        return stale
+
+    def _expired(self, entry, now):
+        return (
+            self.max_lifetime is not None
+            and now - entry.created_at >= self.max_lifetime
+        )
+
+    def _check_alive(self, entry):
+        """Ping entries that sat idle past ping_after; drop them if dead."""
+        if self.ping_after is None:
+            return True
+        if time.monotonic() - entry.last_used < self.ping_after:
+            return True
+        try:
+            entry.connection.ping(reconnect=False)
+            return True
+        except err.MySQLError:
+            with self._cond:
+                self._size -= 1
+                self._ping_failures += 1
+                self._cond.notify()
+            self._close_entries([entry])
+            return False
+
+    def _create(self):
+        """Open a connection for a slot already counted in self._size."""
+        try:
+            conn = self._connection_factory(**self._connect_kwargs)
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._creations += 1
+        return _PoolEntry(conn, time.monotonic())
+
+    @staticmethod
+    def _close_entries(entries):
+        for entry in entries:
+            conn = entry.connection
+            if conn.open:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
@@ -0,0 +1,227 @@
+# Server-side prepared statements (binary protocol)
+# https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_command_phase_ps.html
+import datetime
+import decimal
+import functools
+import re
+import struct
+
+from . import err
+from .constants import FIELD_TYPE
+
+#: Matches pyformat placeholders (%s, %(name)s) and escaped percent signs.
+RE_PLACEHOLDER = re.compile(r"%(?:\((\w+)\))?s|%%")
+
+CURSOR_TYPE_NO_CURSOR = 0x00
+UNSIGNED_PARAM = 0x80
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_UINT64_MAX = (1 << 64) - 1
+
+
+class PreparedStatement:
+    """A statement prepared on the server with COM_STMT_PREPARE.
+
+    Instances are owned and cached by :class:`~pymysql.connections.Connection`
+    and are only valid for the session that prepared them.
+    """
+
+    __slots__ = ("sql", "statement_id", "param_count", "column_count")
+
+    def __init__(self, sql, statement_id, param_count, column_count):
+        self.sql = sql
+        self.statement_id = statement_id
+        self.param_count = param_count
+        self.column_count = column_count
+
+    def __repr__(self):
+        return "<PreparedStatement id={} params={}>".format(
+            self.statement_id, self.param_count
+        )
+
+
+@functools.lru_cache(maxsize=256)
+def convert_placeholders(query):
+    """Rewrite a pyformat query for the server.
+
+    Returns ``(sql, names)`` where ``sql`` uses ``?`` markers and ``names``
+    is the tuple of ``%(name)s`` keys in order, or None for positional
+    ``%s`` markers.
+
+    :raise ProgrammingError: If positional and named placeholders are mixed.
+    """
+    names = []
+    positional = False
+
+    def replace(m):
+        nonlocal positional
+        if m.group(0) == "%%":
+            return "%"
+        if m.group(1) is None:
+            positional = True
+        else:
+            names.append(m.group(1))
+        return "?"
+
+    sql = RE_PLACEHOLDER.sub(replace, query)
+    if positional and names:
+        raise err.ProgrammingError("Cannot mix %s and %(name)s placeholders")
+    return sql, (tuple(names) if names else None)
+
+
+def bind_args(names, args):
+    """Order execute() args to match the ``?`` markers."""
+    if args is None:
+        return ()
+    if names is not None:
+        if not isinstance(args, dict):
+            raise err.ProgrammingError("Named placeholders require a dict of args")
+        try:
+            return tuple(args[name] for name in names)
+        except KeyError as e:
+            raise err.ProgrammingError(f"Missing value for placeholder {e}")
+    if isinstance(args, (tuple, list)):
+        return tuple(args)
+    if isinstance(args, dict):
+        raise err.ProgrammingError("Positional placeholders require a sequence of args")
+    return (args,)
+
+
+def _lenenc_bytes(data):
+    n = len(data)
+    if n < 0xFB:
+        return bytes([n]) + data
+    elif n < (1 << 16):
+        return b"\xfc" + struct.pack("<H", n) + data
+    elif n < (1 << 24):
+        return b"\xfd" + struct.pack("<I", n)[:3] + data
+    return b"\xfe" + struct.pack("<Q", n) + data
+
+
+def _encode_datetime(value):
+    if value.microsecond:
+        return struct.pack(
+            "<BHBBBBBI",
+            11,
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+            value.microsecond,
+        )
+    return struct.pack(
+        "<BHBBBBB",
+        7,
+        value.year,
+        value.month,
+        value.day,
+        value.hour,
+        value.minute,
+        value.second,
+    )
+
+
+def _encode_timedelta(value):
+    negative = value < datetime.timedelta(0)
+    if negative:
+        value = -value
+    days = value.days
+    hours, rest = divmod(value.seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if value.microseconds:
+        return struct.pack(
+            "<BBIBBBI",
+            12,
+            negative,
+            days,
+            hours,
+            minutes,
+            seconds,
+            value.microseconds,
+        )
+    return struct.pack("<BBIBBB", 8, negative, days, hours, minutes, seconds)
+
+
+def _encode_time(value):
+    if value.microsecond:
+        return struct.pack(
+            "<BBIBBBI",
+            12,
+            0,
+            0,
+            value.hour,
+            value.minute,
+            value.second,
+            value.microsecond,
+        )
+    return struct.pack("<BBIBBB", 8, 0, 0, value.hour, value.minute, value.second)
+
+
+def encode_param(value, encoding):
+    """Return ``(type_code, flags, payload)`` for one bound parameter."""
+    if value is None:
+        return FIELD_TYPE.NULL, 0, b""
+    if isinstance(value, bool):
+        return FIELD_TYPE.TINY, 0, struct.pack("<b", value)
+    if isinstance(value, int):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            return FIELD_TYPE.LONGLONG, 0, struct.pack("<q", value)
+        if 0 <= value <= _UINT64_MAX:
+            return FIELD_TYPE.LONGLONG, UNSIGNED_PARAM, struct.pack("<Q", value)
+        return FIELD_TYPE.NEWDECIMAL, 0, _lenenc_bytes(str(value).encode("ascii"))
+    if isinstance(value, float):
+        return FIELD_TYPE.DOUBLE, 0, struct.pack("<d", value)
+    if isinstance(value, str):
+        return FIELD_TYPE.VAR_STRING, 0, _lenenc_bytes(value.encode(encoding))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return FIELD_TYPE.BLOB, 0, _lenenc_bytes(bytes(value))
+    if isinstance(value, decimal.Decimal):
+        return FIELD_TYPE.NEWDECIMAL, 0, _lenenc_bytes(str(value).encode("ascii"))
+    if isinstance(value, datetime.datetime):
+        return FIELD_TYPE.DATETIME, 0, _encode_datetime(value)
+    if isinstance(value, datetime.date):
+        return (
+            FIELD_TYPE.DATE,
+            0,
+            struct.pack("<BHBB", 4, value.year, value.month, value.day),
+        )
+    if isinstance(value, datetime.timedelta):
+        return FIELD_TYPE.TIME, 0, _encode_timedelta(value)
+    if isinstance(value, datetime.time):
+        return FIELD_TYPE.TIME, 0, _encode_time(value)
+    raise err.ProgrammingError(
+        f"Unsupported parameter type for prepared statement: {type(value)!r}"
+    )
+
+
+def build_execute_payload(stmt, params, encoding):
+    """Build the COM_STMT_EXECUTE body (everything after the command byte)."""
+    if len(params) != stmt.param_count:
+        raise err.ProgrammingError(
+            "Statement expects %d parameters, got %d"
+            % (stmt.param_count, len(params))
+        )
+    payload = bytearray(
+        struct.pack("<IBI", stmt.statement_id, CURSOR_TYPE_NO_CURSOR, 1)
+    )
+    if not params:
+        return bytes(payload)
+
+    null_bitmap = bytearray((len(params) + 7) // 8)
+    types = bytearray()
+    values = bytearray()
+    for i, value in enumerate(params):
+        type_code, flags, data = encode_param(value, encoding)
+        if type_code == FIELD_TYPE.NULL:
+            null_bitmap[i >> 3] |= 1 << (i & 7)
+        types += bytes((type_code, flags))
+        values += data
+
+    payload += null_bitmap
+    payload.append(1)  # new-params-bound flag: types follow
+    payload += types
+    payload += values
+    return bytes(payload)
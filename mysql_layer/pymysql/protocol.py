@@ -2,9 +2,11 @@
 # http://dev.mysql.com/doc/internals/en/client-server-protocol.html
 
 from .charset import MBLENGTH
-from .constants import FIELD_TYPE, SERVER_STATUS
+from .constants import FIELD_TYPE, FLAG, SERVER_STATUS
 from . import err
 
+import datetime
+import functools
 import struct
 import sys
 
@@ -48,6 +50,10 @@ class MysqlPacket:
     """Representation of a MySQL response packet.
 
     Provides an interface for reading/parsing the packet results.
+
+    The payload may be a memoryview into the connection's receive buffer, in
+    which case it is only valid until the next packet is read.  Methods that
+    return payload bytes always return a copy.
     """
 
     __slots__ = ("_position", "_data")
@@ -57,11 +63,15 @@ class MysqlPacket:
         self._data = data
 
     def get_all_data(self):
+        return bytes(self._data)
+
+    def get_buffer(self):
+        """Return the payload without copying it (see the class docstring)."""
         return self._data
 
     def read(self, size):
         """Read the first 'size' bytes in packet and advance cursor past them."""
-        result = self._data[self._position : (self._position + size)]
+        result = bytes(self._data[self._position : (self._position + size)])
         if len(result) != size:
             error = (
                 "Result length not requested length:\n"
@@ -79,7 +89,7 @@ class MysqlPacket:
 
         (Subsequent read() will return errors.)
         """
-        result = self._data[self._position :]
+        result = bytes(self._data[self._position :])
         self._position = None  # ensure no subsequent read()
         return result
 
@@ -107,7 +117,7 @@ class MysqlPacket:
         No error checking is done.  If requesting outside end of buffer
         an empty string (or string shorter than 'length') may be returned!
         """
-        return self._data[position : (position + length)]
+        return bytes(self._data[position : (position + length)])
 
     def read_uint8(self):
         result = self._data[self._position]
@@ -135,6 +145,8 @@ class MysqlPacket:
         return result
 
     def read_string(self):
+        if isinstance(self._data, memoryview):
+            self._data = self._data.tobytes()
         end_pos = self._data.find(b"\0", self._position)
         if end_pos < 0:
             return None
@@ -188,6 +200,13 @@ class MysqlPacket:
         # If \xFE is LengthEncodedInteger header, 8bytes followed.
         return self._data[0] == 0xFE and len(self._data) < 9
 
+    def is_eof_ok_packet(self):
+        # With CLIENT.DEPRECATE_EOF a row stream ends with an OK packet using
+        # the 0xFE header instead of an EOF packet.  A row can only start with
+        # 0xFE when its first value is longer than 16MB, so such a packet is
+        # never shorter than 0xFFFFFF bytes.
+        return self._data[0] == 0xFE and len(self._data) < 0xFFFFFF
+
     def is_auth_switch_request(self):
         # http://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::AuthSwitchRequest
         return self._data[0] == 0xFE
@@ -216,7 +235,7 @@ class MysqlPacket:
         errno = self.read_uint16()
         if DEBUG:
             print("errno =", errno)
-        err.raise_mysql_exception(self._data)
+        err.raise_mysql_exception(bytes(self._data))
 
     def dump(self):
         dump_packet(self._data)
@@ -291,7 +310,7 @@ class OKPacketWrapper:
     """
 
     def __init__(self, from_packet):
-        if not from_packet.is_ok_packet():
+        if not (from_packet.is_ok_packet() or from_packet.is_eof_ok_packet()):
             raise ValueError(
                 "Cannot create "
                 + str(self.__class__.__name__)
@@ -354,3 +373,291 @@ class LoadLocalPacketWrapper:
 
     def __getattr__(self, key):
         return getattr(self.packet, key)
+
+
+# Binary protocol rows (prepared statement results)
+# https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_binary_resultset.html
+
+_FIXED_FORMATS = {
+    FIELD_TYPE.TINY: "b",
+    FIELD_TYPE.SHORT: "h",
+    FIELD_TYPE.YEAR: "h",
+    FIELD_TYPE.INT24: "i",
+    FIELD_TYPE.LONG: "i",
+    FIELD_TYPE.LONGLONG: "q",
+    FIELD_TYPE.FLOAT: "f",
+    FIELD_TYPE.DOUBLE: "d",
+}
+
+_unpack_H = struct.Struct("<H").unpack_from
+_unpack_I = struct.Struct("<I").unpack_from
+_unpack_Q = struct.Struct("<Q").unpack_from
+_unpack_date = struct.Struct("<HBB").unpack_from
+_unpack_datetime = struct.Struct("<HBBBBB").unpack_from
+_unpack_time = struct.Struct("<BIBBB").unpack_from
+
+# Column kinds for BinaryRowDecoder
+_FIXED = 0
+_DATE = 1
+_DATETIME = 2
+_TIME = 3
+_LENENC = 4
+
+
+def _binary_date(data, pos):
+    length = data[pos]
+    pos += 1
+    if not length:
+        return "0000-00-00", pos
+    year, month, day = _unpack_date(data, pos)
+    try:
+        return datetime.date(year, month, day), pos + length
+    except ValueError:
+        return "%04d-%02d-%02d" % (year, month, day), pos + length
+
+
+def _binary_datetime(data, pos):
+    length = data[pos]
+    pos += 1
+    if not length:
+        return "0000-00-00 00:00:00", pos
+    if length == 4:
+        year, month, day = _unpack_date(data, pos)
+        hour = minute = second = 0
+    else:
+        year, month, day, hour, minute, second = _unpack_datetime(data, pos)
+    microsecond = _unpack_I(data, pos + 7)[0] if length == 11 else 0
+    try:
+        value = datetime.datetime(
+            year, month, day, hour, minute, second, microsecond
+        )
+    except ValueError:
+        value = "%04d-%02d-%02d %02d:%02d:%02d" % (
+            year,
+            month,
+            day,
+            hour,
+            minute,
+            second,
+        )
+    return value, pos + length
+
+
+def _binary_time(data, pos):
+    length = data[pos]
+    pos += 1
+    if not length:
+        return datetime.timedelta(0), pos
+    negative, days, hour, minute, second = _unpack_time(data, pos)
+    microsecond = _unpack_I(data, pos + 8)[0] if length == 12 else 0
+    value = datetime.timedelta(
+        days=days,
+        hours=hour,
+        minutes=minute,
+        seconds=second,
+        microseconds=microsecond,
+    )
+    return (-value if negative else value), pos + length
+
+
+class BinaryRowDecoder:
+    """Decode binary protocol rows of one result set.
+
+    The per-column work is planned once from the field descriptors: integers
+    and floats are read with precompiled ``struct`` formats, temporal types
+    are built straight from their packed fields, and only string-like columns
+    go through ``encoding``/``converter`` as in the text protocol.  Rows
+    without NULLs read each run of consecutive fixed-width columns with a
+    single ``unpack_from`` call.
+
+    FLOAT columns arrive as 4-byte single-precision values and are returned as
+    the exact Python float of that value (e.g. ``1.100000023841858`` for a
+    stored ``1.1``), whereas text rows give the server's shortest decimal
+    rendering (``1.1``).  Round or use DOUBLE if the text form matters.
+    """
+
+    __slots__ = ("_columns", "_segments", "_bitmap_len", "_no_nulls")
+
+    def __init__(self, fields, converters):
+        """
+        :param fields: FieldDescriptorPacket for each column.
+        :param converters: ``(encoding, converter)`` for each column, as built
+            by MySQLResult for text rows.
+        """
+        self._columns = columns = []
+        for field, (encoding, converter) in zip(fields, converters):
+            fmt = _FIXED_FORMATS.get(field.type_code)
+            if fmt is not None:
+                # FLOAT/DOUBLE UNSIGNED are still sent as plain IEEE values.
+                if field.flags & FLAG.UNSIGNED and fmt in "bhiq":
+                    fmt = fmt.upper()
+                columns.append((_FIXED, struct.Struct("<" + fmt), None, None))
+            elif field.type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE):
+                columns.append((_DATE, None, None, None))
+            elif field.type_code in (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+                columns.append((_DATETIME, None, None, None))
+            elif field.type_code == FIELD_TYPE.TIME:
+                columns.append((_TIME, None, None, None))
+            else:
+                columns.append((_LENENC, None, encoding, converter))
+
+        # Plan for rows without NULLs: each run of fixed-width columns becomes
+        # one (Struct, None) step, every other column a (None, index) step.
+        segments = []
+        run = ""
+        for index, (kind, st, _, _) in enumerate(columns):
+            if kind == _FIXED:
+                run += st.format[1:]
+                continue
+            if run:
+                segments.append((struct.Struct("<" + run), None))
+                run = ""
+            segments.append((None, index))
+        if run:
+            segments.append((struct.Struct("<" + run), None))
+        self._segments = segments
+
+        # Two reserved bits precede the column bits.
+        self._bitmap_len = (len(columns) + 9) // 8
+        self._no_nulls = bytes(self._bitmap_len)
+
+    def decode(self, data):
+        """Decode one row packet payload into a tuple."""
+        bitmap_end = 1 + self._bitmap_len
+        if data[1:bitmap_end] == self._no_nulls:
+            return self._decode_no_nulls(data, bitmap_end)
+
+        row = []
+        pos = bitmap_end
+        for index, column in enumerate(self._columns):
+            bit = index + 2
+            if data[1 + (bit >> 3)] & (1 << (bit & 7)):
+                row.append(None)
+                continue
+            value, pos = self._decode_column(column, data, pos)
+            row.append(value)
+        return tuple(row)
+
+    def _decode_no_nulls(self, data, pos):
+        row = []
+        for st, index in self._segments:
+            if st is not None:
+                row += st.unpack_from(data, pos)
+                pos += st.size
+            else:
+                value, pos = self._decode_column(self._columns[index], data, pos)
+                row.append(value)
+        return tuple(row)
+
+    @staticmethod
+    def _decode_column(column, data, pos):
+        kind, st, encoding, converter = column
+        if kind == _FIXED:
+            return st.unpack_from(data, pos)[0], pos + st.size
+        if kind == _LENENC:
+            length = data[pos]
+            pos += 1
+            if length == UNSIGNED_SHORT_COLUMN:
+                length = _unpack_H(data, pos)[0]
+                pos += 2
+            elif length == UNSIGNED_INT24_COLUMN:
+                length = data[pos] | data[pos + 1] << 8 | data[pos + 2] << 16
+                pos += 3
+            elif length == UNSIGNED_INT64_COLUMN:
+                length = _unpack_Q(data, pos)[0]
+                pos += 8
+            if encoding is not None:
+                value = str(data[pos : pos + length], encoding)
+            else:
+                value = bytes(data[pos : pos + length])
+            pos += length
+            if converter is not None:
+                value = converter(value)
+            return value, pos
+        if kind == _DATETIME:
+            return _binary_datetime(data, pos)
+        if kind == _DATE:
+            return _binary_date(data, pos)
+        return _binary_time(data, pos)
+
+
+# Text protocol rows
+# https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_com_query_response_text_resultset_row.html
+
+
+def _long_length(data, pos):
+    """Read a length prefixed by 0xFC, 0xFD or 0xFE at pos.
+
+    Returns ``(length, position after the prefix)``.
+    """
+    prefix = data[pos]
+    if prefix == UNSIGNED_SHORT_COLUMN:
+        return data[pos + 1] | data[pos + 2] << 8, pos + 3
+    if prefix == UNSIGNED_INT24_COLUMN:
+        return data[pos + 1] | data[pos + 2] << 8 | data[pos + 3] << 16, pos + 4
+    return _unpack_Q(data, pos + 1)[0], pos + 9
+
+
+def _text_value_expr(index, encoding, converter, namespace):
+    value = "data[pos : pos + n]"
+    if encoding is None:
+        value = f"bytes({value})"
+    elif encoding == "ascii" and converter in (int, float):
+        # int() and float() parse ASCII digits from the buffer directly.
+        return f"{converter.__name__}({value})"
+    else:
+        value = f"str({value}, {encoding!r})"
+    if converter is not None:
+        namespace[f"convert{index}"] = converter
+        value = f"convert{index}({value})"
+    return value
+
+
+def _compile_text_row_decoder(converters):
+    namespace = {"_long_length": _long_length}
+    lines = ["def decode(data):", "    pos = 0"]
+    for index, (encoding, converter) in enumerate(converters):
+        value = _text_value_expr(index, encoding, converter, namespace)
+        lines += [
+            "    n = data[pos]",
+            "    if n < %d:" % NULL_COLUMN,
+            "        pos += 1",
+            f"        v{index} = {value}",
+            "        pos += n",
+            "    elif n == %d:" % NULL_COLUMN,
+            "        pos += 1",
+            f"        v{index} = None",
+            "    else:",
+            "        n, pos = _long_length(data, pos)",
+            f"        v{index} = {value}",
+            "        pos += n",
+        ]
+    lines.append(
+        "    return (%s)" % "".join(f"v{i}, " for i in range(len(converters)))
+    )
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+_cached_text_row_decoder = functools.lru_cache(maxsize=128)(_compile_text_row_decoder)
+
+
+def text_row_decoder(converters):
+    """Return a function decoding one text protocol row payload into a tuple.
+
+    The function is generated for the column list: one straight-line pass over
+    the payload, with each column's decode and converter call inlined.  Result
+    sets with the same ``(encoding, converter)`` list share it.
+
+    It raises IndexError when a row has fewer columns than converters; callers
+    fall back to decoding that row column by column.
+
+    :param converters: ``(encoding, converter)`` for each column, as built by
+        MySQLResult.
+    """
+    converters = tuple(converters)
+    try:
+        return _cached_text_row_decoder(converters)
+    except TypeError:
+        # A custom converter that isn't hashable.
+        return _compile_text_row_decoder(converters)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# mysql_fixtures(벤치마크와 공유하는 패킷 생성 도구)가 mysql_layer를 sys.path에 추가함
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
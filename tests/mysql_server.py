@@ -0,0 +1,119 @@
+"""socketpair 반대편에서 명령 하나씩 응답하는 가짜 MySQL 서버 (pymysql 테스트용)"""
+import asyncio
+import socket
+import struct
+import threading
+
+from mysql_fixtures import packet_stream
+
+from pymysql.aio import AsyncConnection
+from pymysql.connections import Connection
+from pymysql.constants import CLIENT, SERVER_STATUS
+
+OK_PACKET = b'\x00\x00\x00\x02\x00\x00\x00'
+
+
+def error_packet(errno, message):
+    return b'\xff' + struct.pack('<H', errno) + b'#HY000' + message
+
+
+def result_payloads(definitions, rows, deprecate_eof=False, more_results=False):
+    """결과 집합 payload 목록. DEPRECATE_EOF면 컬럼 정의 뒤 EOF가 없고 OK 형식(0xFE) 패킷으로 끝납니다."""
+    status = SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT
+    if more_results:
+        status |= SERVER_STATUS.SERVER_MORE_RESULTS_EXISTS
+    if deprecate_eof:
+        return [bytes([len(definitions)])] + definitions + rows + [b'\xfe\x00\x00' + struct.pack('<HH', status, 0)]
+    eof = b'\xfe' + struct.pack('<HH', 0, status)
+    return [bytes([len(definitions)])] + definitions + [b'\xfe' + struct.pack('<HH', 0, 2)] + rows + [eof]
+
+
+def response(*payload_lists):
+    """payload 목록들(여러 결과 집합)을 시퀀스 번호가 이어지는 응답 하나로 만듭니다."""
+    return packet_stream([payload for payloads in payload_lists for payload in payloads])
+
+
+class FakeServer:
+    """명령 패킷을 하나씩 읽고 respond(command, payload)가 돌려준 바이트를 보냅니다.
+
+    실제 서버처럼 응답을 다 보낼 때까지(blocking) 다음 명령을 읽지 않습니다.
+    """
+
+    def __init__(self, sock, respond):
+        self.sock = sock
+        self.commands = []
+        self._respond = respond
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def recv_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def read_command(self):
+        header = self.recv_exactly(4)
+        return self.recv_exactly(header[0] | header[1] << 8 | header[2] << 16)
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def _serve(self):
+        try:
+            while True:
+                payload = self.read_command()
+                self.commands.append(payload)
+                response = self._respond(payload[0], payload[1:])
+                if response:
+                    self.send(response)
+        except (EOFError, OSError):
+            pass
+
+    def close(self):
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+        self._thread.join(5)
+
+
+def _socketpair(buffer_size):
+    server_sock, client_sock = socket.socketpair()
+    if buffer_size:
+        for sock in (server_sock, client_sock):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+    return server_sock, client_sock
+
+
+def _negotiate_eof(conn, deprecate_eof):
+    # handshake 없이 연결하므로 handshake에서 정해지는 DEPRECATE_EOF를 직접 설정
+    if deprecate_eof:
+        conn.client_flag |= CLIENT.DEPRECATE_EOF
+    else:
+        conn.client_flag &= ~CLIENT.DEPRECATE_EOF
+
+
+def connect(respond, deprecate_eof=False, buffer_size=None, timeout=5, server_class=FakeServer, **kwargs):
+    """FakeServer와 socketpair로 이어진 (인증 없이 바로 명령을 보내는) Connection을 만듭니다.
+
+    server_class로 FakeServer를 상속한 서버를 쓸 수 있고, kwargs는 Connection에 그대로 넘깁니다.
+    """
+    server_sock, client_sock = _socketpair(buffer_size)
+    server = server_class(server_sock, respond)
+    conn = Connection(user='test', defer_connect=True, read_timeout=timeout, write_timeout=timeout, **kwargs)
+    _negotiate_eof(conn, deprecate_eof)
+    conn._sock = client_sock
+    return conn, server
+
+
+async def connect_async(respond, deprecate_eof=False, buffer_size=None, timeout=5, server_class=FakeServer, **kwargs):
+    """connect()의 AsyncConnection 버전"""
+    server_sock, client_sock = _socketpair(buffer_size)
+    server = server_class(server_sock, respond)
+    conn = AsyncConnection(user='test', read_timeout=timeout, write_timeout=timeout, **kwargs)
+    _negotiate_eof(conn, deprecate_eof)
+    conn._reader, conn._sock = await asyncio.open_connection(sock=client_sock)
+    return conn, server
@@ -0,0 +1,160 @@
+"""sha256_password / caching_sha2_password 등 인증 단계 테스트 (동기, asyncio 연결 모두)"""
+import asyncio
+import os
+import socket
+import struct
+import threading
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from mysql_fixtures import packet
+
+import pymysql
+from pymysql import _auth, aio
+from pymysql.constants import CLIENT, COMMAND
+
+PASSWORD = b'secret'
+CAPABILITIES = CLIENT.PROTOCOL_41 | CLIENT.SECURE_CONNECTION | CLIENT.PLUGIN_AUTH | CLIENT.LONG_PASSWORD
+OK_PACKET = b'\x00\x00\x00\x02\x00\x00\x00'
+ACCESS_DENIED = b'\xff' + struct.pack('<H', 1045) + b'#28000Access denied'
+
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PUBLIC_KEY_PEM = PRIVATE_KEY.public_key().public_bytes(
+    serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+)
+
+
+def decrypt_password(data, salt):
+    message = PRIVATE_KEY.decrypt(
+        data, padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None)
+    )
+    return _auth._xor_password(message, salt)
+
+
+class AuthServer:
+    """handshake를 보내고 flow(server, 인증 응답)로 인증을 진행한 뒤 모든 명령에 OK로 답하는 서버"""
+
+    def __init__(self, plugin, flow):
+        self.plugin = plugin
+        self.salt = os.urandom(20)
+        self._flow = flow
+        self._seq = 0
+        self._listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self._listener.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def send(self, payload):
+        self._sock.sendall(packet(self._seq, payload))
+        self._seq += 1
+
+    def recv(self):
+        header = self._recv_exactly(4)
+        self._seq = header[3] + 1
+        return self._recv_exactly(header[0] | header[1] << 8 | header[2] << 16)
+
+    def _recv_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def _handshake(self):
+        return (
+            b'\x0a8.0.36\x00' + struct.pack('<I', 1) + self.salt[:8] + b'\x00'
+            + struct.pack('<HBHHB', CAPABILITIES & 0xFFFF, 45, 2, CAPABILITIES >> 16, 21)
+            + bytes(10) + self.salt[8:] + b'\x00' + self.plugin + b'\x00'
+        )
+
+    def _serve(self):
+        self._sock, _ = self._listener.accept()
+        try:
+            self.send(self._handshake())
+            response = self.recv()
+            pos = response.index(b'\x00', 32) + 1  # 고정 헤더 32바이트 + 사용자 이름
+            if self._flow(self, response[pos + 1:pos + 1 + response[pos]]):
+                self.send(OK_PACKET)
+            else:
+                self.send(ACCESS_DENIED)
+                return
+            while True:
+                self._seq = 0
+                command = self.recv()
+                if command[0] == COMMAND.COM_QUIT:
+                    return
+                self.send(OK_PACKET)
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._sock.close()
+            self._listener.close()
+
+
+def caching_sha2_fast(server, auth_response):
+    server.send(b'\x01\x03')
+    return auth_response == _auth.scramble_caching_sha2(PASSWORD, server.salt)
+
+
+def caching_sha2_full_rsa(server, auth_response):
+    server.send(b'\x01\x04')
+    if server.recv() != b'\x02':
+        return False
+    server.send(b'\x01' + PUBLIC_KEY_PEM)
+    return decrypt_password(server.recv(), server.salt) == PASSWORD + b'\x00'
+
+
+def switch_to(plugin, check):
+    def flow(server, auth_response):
+        server.send(b'\xfe' + plugin + b'\x00' + server.salt + b'\x00')
+        return check(server)
+    return flow
+
+
+def sha256_rsa(server):
+    if server.recv() != b'\x01':
+        return False
+    server.send(b'\x01' + PUBLIC_KEY_PEM)
+    return decrypt_password(server.recv(), server.salt) == PASSWORD + b'\x00'
+
+
+def native_password(server):
+    return server.recv() == _auth.scramble_native_password(PASSWORD, server.salt)
+
+
+FLOWS = {
+    'caching_sha2_fast': (b'caching_sha2_password', caching_sha2_fast),
+    'caching_sha2_full_rsa': (b'caching_sha2_password', caching_sha2_full_rsa),
+    'switch_sha256_rsa': (b'mysql_native_password', switch_to(b'sha256_password', sha256_rsa)),
+    'switch_native': (b'caching_sha2_password', switch_to(b'mysql_native_password', native_password)),
+}
+
+
+def connect_sync(port, password):
+    conn = pymysql.connect(host='127.0.0.1', port=port, user='test', password=password, read_timeout=5)
+    conn.close()
+
+
+def connect_async(port, password):
+    async def run():
+        conn = await aio.connect(host='127.0.0.1', port=port, user='test', password=password, read_timeout=5)
+        conn.close()
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('connect', [connect_sync, connect_async], ids=['sync', 'async'])
+@pytest.mark.parametrize('flow', sorted(FLOWS))
+def test_auth_flow(connect, flow):
+    server = AuthServer(*FLOWS[flow])
+    connect(server.port, PASSWORD.decode())
+
+
+@pytest.mark.parametrize('connect', [connect_sync, connect_async], ids=['sync', 'async'])
+def test_wrong_password_is_rejected(connect):
+    server = AuthServer(*FLOWS['caching_sha2_full_rsa'])
+    with pytest.raises(pymysql.OperationalError) as excinfo:
+        connect(server.port, 'wrong')
+    assert excinfo.value.args[0] == 1045
@@ -0,0 +1,76 @@
+"""바이너리 프로토콜(prepared statement) 행 디코딩 테스트"""
+import datetime
+import struct
+
+from mysql_fixtures import PacketSource, binary_row, column_definition, result_payloads
+
+from pymysql.connections import MySQLResult
+from pymysql.constants import FIELD_TYPE, FLAG
+
+
+def decode(columns, rows):
+    definitions = [column_definition(i, type_code, flags) for i, (_, type_code, flags) in enumerate(columns)]
+    result = MySQLResult(PacketSource(result_payloads(definitions, [binary_row([fmt for fmt, _, _ in columns], row) for row in rows])), True)
+    result.read()
+    return result.rows
+
+
+UNSIGNED_COLUMNS = [
+    ('B', FIELD_TYPE.TINY, FLAG.UNSIGNED),
+    ('H', FIELD_TYPE.SHORT, FLAG.UNSIGNED),
+    ('I', FIELD_TYPE.LONG, FLAG.UNSIGNED),
+    ('Q', FIELD_TYPE.LONGLONG, FLAG.UNSIGNED),
+    ('f', FIELD_TYPE.FLOAT, FLAG.UNSIGNED),
+    ('d', FIELD_TYPE.DOUBLE, FLAG.UNSIGNED),
+]
+
+
+def test_unsigned_integer_and_float_columns():
+    values = (255, 65535, 2**32 - 1, 2**64 - 1, 0.5, 1.25)
+    assert decode(UNSIGNED_COLUMNS, [values]) == (values,)
+
+
+def test_unsigned_columns_with_nulls():
+    values = (200, None, 3_000_000_000, None, None, 2.5)
+    assert decode(UNSIGNED_COLUMNS, [values]) == (values,)
+
+
+def test_float_is_widened_single_precision():
+    (row,) = decode([('f', FIELD_TYPE.FLOAT, 0)], [(1.1,)])
+    assert row[0] == struct.unpack('<f', struct.pack('<f', 1.1))[0]
+    assert row[0] != 1.1
+
+
+def test_temporal_columns():
+    columns = [
+        (None, FIELD_TYPE.DATE, 0),
+        (None, FIELD_TYPE.DATETIME, 0),
+        (None, FIELD_TYPE.DATETIME, 0),
+        (None, FIELD_TYPE.TIME, 0),
+        (None, FIELD_TYPE.DATE, 0),
+    ]
+    values = (
+        struct.pack('<BHBB', 4, 2024, 2, 29),
+        struct.pack('<BHBBBBBI', 11, 2024, 1, 2, 3, 4, 5, 678),
+        struct.pack('<B', 0),
+        struct.pack('<BBIBBBI', 12, 1, 1, 2, 3, 4, 5),
+        struct.pack('<BHBB', 4, 2024, 2, 30),
+    )
+    assert decode(columns, [values]) == ((
+        datetime.date(2024, 2, 29),
+        datetime.datetime(2024, 1, 2, 3, 4, 5, 678),
+        '0000-00-00 00:00:00',
+        -datetime.timedelta(days=1, hours=2, minutes=3, seconds=4, microseconds=5),
+        '2024-02-30',
+    ),)
+
+
+def test_fixed_runs_between_string_columns():
+    columns = [
+        ('q', FIELD_TYPE.LONGLONG, 0),
+        ('I', FIELD_TYPE.LONG, FLAG.UNSIGNED),
+        (None, FIELD_TYPE.VAR_STRING, 0),
+        ('h', FIELD_TYPE.SHORT, 0),
+        ('d', FIELD_TYPE.DOUBLE, 0),
+    ]
+    assert decode(columns, [(-5, 4_000_000_000, b'\x03abc', -2, 0.25)]) == ((-5, 4_000_000_000, b'abc', -2, 0.25),)
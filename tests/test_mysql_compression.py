@@ -0,0 +1,122 @@
+"""압축 프로토콜(zlib, zstd) 테스트"""
+import asyncio
+import time
+
+import pytest
+from mysql_fixtures import column_definition, lenenc
+from mysql_server import OK_PACKET, FakeServer, connect, connect_async, response, result_payloads
+
+from pymysql import compression, err
+from pymysql.constants import COMMAND, FIELD_TYPE
+
+ALGORITHMS = [
+    compression.ZLIB,
+    pytest.param(compression.ZSTD, marks=pytest.mark.skipif(
+        compression.zstandard is None, reason='zstandard is not installed'
+    )),
+]
+
+ROWS = [lenenc(b'%d' % i) + lenenc(b'row %d ' % i + b'z' * 100) for i in range(200)]
+EXPECTED = tuple((i, 'row %d ' % i + 'z' * 100) for i in range(200))
+LONG_QUERY = 'SELECT id, name FROM t WHERE name <> %s' % ("'" + 'q' * 100 + "'")
+
+
+class CompressedServer(FakeServer):
+    """압축 frame으로 명령을 읽고, 응답을 패킷 중간에서 나눈 두 frame으로 몇 바이트씩 끊어 보내는 서버"""
+
+    algorithm = compression.ZLIB
+    chunk_size = 3
+
+    def __init__(self, sock, respond):
+        self.compressor = compression.PacketCompressor(self.algorithm)
+        super().__init__(sock, respond)
+
+    def _take(self, num_bytes):
+        while True:
+            data = self.compressor.take(num_bytes)
+            if data is not None:
+                return bytes(data)
+            header = self.recv_exactly(compression.HEADER_SIZE)
+            self.compressor.feed(self.recv_exactly(self.compressor.read_header(header)))
+
+    def read_command(self):
+        header = self._take(4)
+        return self._take(header[0] | header[1] << 8 | header[2] << 16)
+
+    def send(self, data):
+        middle = len(data) // 2 + 1
+        framed = self.compressor.pack(data[:middle]) + self.compressor.pack(data[middle:])
+        for start in range(0, len(framed), self.chunk_size):
+            self.sock.sendall(framed[start:start + self.chunk_size])
+            time.sleep(0.0005)
+
+
+def server_for(algorithm):
+    return type('CompressedServer', (CompressedServer,), {'algorithm': algorithm})
+
+
+def respond(command, sql):
+    assert command == COMMAND.COM_QUERY
+    if sql.startswith(b'SELECT'):
+        return response(result_payloads([column_definition(0, FIELD_TYPE.LONGLONG), column_definition(1, FIELD_TYPE.VAR_STRING, charset=45)], ROWS))
+    return response([OK_PACKET])
+
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_compressed_frames_split_across_reads(algorithm):
+    conn, server = connect(respond, server_class=server_for(algorithm))
+    conn._compressor = compression.PacketCompressor(algorithm)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(LONG_QUERY)
+        assert cursor.fetchall() == EXPECTED
+        cursor.execute('SET @a = 1')
+        cursor.execute(LONG_QUERY)
+        assert cursor.fetchall() == EXPECTED
+    finally:
+        server.close()
+    assert server.commands[0][1:] == LONG_QUERY.encode()
+
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_compressed_frames_split_across_reads_async(algorithm):
+    async def run():
+        conn, server = await connect_async(respond, server_class=server_for(algorithm))
+        conn._compressor = compression.PacketCompressor(algorithm)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(LONG_QUERY)
+                rows = await cursor.fetchall()
+                await cursor.execute('SET @a = 1')
+                return rows
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == EXPECTED
+
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_packet_compressor_round_trip(algorithm):
+    sender = compression.PacketCompressor(algorithm)
+    receiver = compression.PacketCompressor(algorithm)
+    data = b'x' * 10 + b'y' * 300
+    # 짧은 조각은 압축하지 않은 frame(원래 길이 0)으로 보냄
+    short = sender.pack(data[:10])
+    assert short[4:7] == b'\x00\x00\x00'
+    stream = short + sender.pack(data[10:])
+    pos = 0
+    while pos < len(stream):
+        length = receiver.read_header(stream[pos:pos + compression.HEADER_SIZE])
+        pos += compression.HEADER_SIZE
+        receiver.feed(stream[pos:pos + length])
+        pos += length
+    assert receiver.take(4) == data[:4]
+    assert receiver.take(len(data)) is None
+    assert receiver.take(len(data) - 4) == data[4:]
+
+
+def test_corrupt_frame_raises_internal_error():
+    receiver = compression.PacketCompressor(compression.ZLIB)
+    receiver.read_header(b'\x04\x00\x00\x00\x64\x00\x00')
+    with pytest.raises(err.InternalError):
+        receiver.feed(b'junk')
@@ -0,0 +1,82 @@
+"""EOF 패킷과 DEPRECATE_EOF(OK 패킷) 종료 결과 집합 테스트"""
+import asyncio
+
+import pytest
+from mysql_fixtures import column_definition, lenenc
+from mysql_server import OK_PACKET, connect, connect_async, response, result_payloads
+
+from pymysql import aio, cursors
+from pymysql.connections import Connection
+from pymysql.constants import CLIENT, COMMAND, FIELD_TYPE
+
+DEFINITIONS = [column_definition(0, FIELD_TYPE.LONGLONG), column_definition(1, FIELD_TYPE.VAR_STRING, charset=45)]
+ROWS = [lenenc(b'%d' % i) + lenenc(b'n%d' % i) for i in range(3)]
+EXPECTED = ((0, 'n0'), (1, 'n1'), (2, 'n2'))
+
+
+def responder(deprecate_eof):
+    """SELECT는 결과 집합, CALL은 결과 집합 두 개와 OK, 그 외는 영향받은 행 3개의 OK로 답합니다."""
+    def respond(command, sql):
+        assert command == COMMAND.COM_QUERY
+        if sql.startswith(b'SELECT'):
+            return response(result_payloads(DEFINITIONS, ROWS, deprecate_eof))
+        if sql.startswith(b'CALL'):
+            return response(
+                result_payloads(DEFINITIONS, ROWS[:1], deprecate_eof, more_results=True),
+                result_payloads(DEFINITIONS, ROWS[1:], deprecate_eof, more_results=True),
+                [OK_PACKET],
+            )
+        return response([b'\x00\x03\x00\x02\x00\x00\x00'])
+    return respond
+
+
+@pytest.mark.parametrize('cursorclass', [cursors.Cursor, cursors.SSCursor], ids=['buffered', 'unbuffered'])
+@pytest.mark.parametrize('deprecate_eof', [False, True], ids=['eof', 'ok'])
+def test_result_terminators(deprecate_eof, cursorclass):
+    conn, server = connect(responder(deprecate_eof), deprecate_eof=deprecate_eof)
+    try:
+        cursor = conn.cursor(cursorclass)
+        cursor.execute('SELECT id, name FROM t')
+        assert tuple(cursor.fetchall()) == EXPECTED
+        assert [d[0] for d in cursor.description] == ['c0', 'c1']
+
+        cursor.execute('CALL p()')
+        sets = [tuple(cursor.fetchall())]
+        while cursor.nextset():
+            sets.append(tuple(cursor.fetchall()))
+        assert sets == [EXPECTED[:1], EXPECTED[1:], ()]
+
+        assert cursor.execute('UPDATE t SET name = name') == 3
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize('cursorclass', [aio.AsyncCursor, aio.AsyncSSCursor], ids=['buffered', 'unbuffered'])
+@pytest.mark.parametrize('deprecate_eof', [False, True], ids=['eof', 'ok'])
+def test_result_terminators_async(deprecate_eof, cursorclass):
+    async def run():
+        conn, server = await connect_async(responder(deprecate_eof), deprecate_eof=deprecate_eof)
+        try:
+            async with conn.cursor(cursorclass) as cursor:
+                await cursor.execute('SELECT id, name FROM t')
+                rows = tuple(await cursor.fetchall())
+                await cursor.execute('CALL p()')
+                sets = [tuple(await cursor.fetchall())]
+                while await cursor.nextset():
+                    sets.append(tuple(await cursor.fetchall()))
+                return rows, sets, await cursor.execute('UPDATE t SET name = name')
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == (EXPECTED, [EXPECTED[:1], EXPECTED[1:], ()], 3)
+
+
+@pytest.mark.parametrize('offered', [False, True])
+def test_deprecate_eof_follows_server_capabilities(offered):
+    conn = Connection(user='test', defer_connect=True)
+    conn.server_version = '8.0.36'
+    conn.server_capabilities = CLIENT.PROTOCOL_41 | CLIENT.SECURE_CONNECTION
+    if offered:
+        conn.server_capabilities |= CLIENT.DEPRECATE_EOF
+    conn._handshake_response_header()
+    assert bool(conn.client_flag & CLIENT.DEPRECATE_EOF) == offered
@@ -0,0 +1,121 @@
+"""쿼리 파이프라이닝(query_pipeline / execute_pipeline) 테스트"""
+import asyncio
+
+import pytest
+from mysql_fixtures import column_definition, lenenc
+from mysql_server import OK_PACKET, connect, connect_async, error_packet, response, result_payloads
+
+from pymysql import err
+from pymysql.constants import COMMAND, FIELD_TYPE
+
+# 작은 소켓 버퍼에서 응답이 요청보다 훨씬 커지도록 행마다 200바이트 문자열 10개
+FILLER = b'x' * 200
+
+
+def select_response(command, sql):
+    assert command == COMMAND.COM_QUERY
+    n = int(sql.split()[1])
+    rows = [lenenc(str(n).encode()) + lenenc(FILLER) for _ in range(10)]
+    definitions = [column_definition(0, FIELD_TYPE.LONGLONG), column_definition(1, FIELD_TYPE.VAR_STRING)]
+    return response(result_payloads(definitions, rows))
+
+
+def test_large_pipeline_does_not_deadlock():
+    # 서버가 응답을 보내다 막힌 동안 클라이언트도 나머지 쿼리를 보내다 막히면 timeout으로 실패함
+    conn, server = connect(select_response, buffer_size=4096)
+    try:
+        cursor = conn.cursor()
+        cursor.execute_pipeline(['SELECT %d' % i for i in range(1000)])
+        firsts = [cursor.fetchall()[0][0]]
+        while cursor.nextset():
+            firsts.append(cursor.fetchall()[0][0])
+        assert firsts == list(range(1000))
+    finally:
+        server.close()
+
+
+def test_large_pipeline_does_not_deadlock_async():
+    async def run():
+        conn, server = await connect_async(select_response, buffer_size=4096)
+        try:
+            # 쓰기 버퍼가 high-water mark(64KB)를 넘도록 쿼리 하나를 120바이트 이상으로 채움
+            conn.pipeline_window = 1024 * 1024
+            outcomes = await conn.query_pipeline(['SELECT %d /* %s */' % (i, 'y' * 100) for i in range(1000)])
+            return [results[0].rows[0][0] for results in outcomes]
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == list(range(1000))
+
+
+def mixed_response(command, sql):
+    """SELECT n은 n 한 행, CALL은 결과 집합 두 개와 OK, 없는 테이블은 1146 오류로 답합니다."""
+    definitions = [column_definition(0, FIELD_TYPE.LONGLONG)]
+    if sql.startswith(b'SELECT'):
+        return response(result_payloads(definitions, [lenenc(sql.split()[1])]))
+    if sql.startswith(b'CALL'):
+        return response(
+            result_payloads(definitions, [lenenc(b'10')], more_results=True),
+            result_payloads(definitions, [lenenc(b'11')], more_results=True),
+            [OK_PACKET],
+        )
+    return response([error_packet(1146, b"Table 'test.missing' doesn't exist")])
+
+
+MIXED_QUERIES = ['SELECT 0', 'DELETE FROM missing', 'CALL p()', 'DELETE FROM missing', 'SELECT 4']
+
+
+def summarize(outcomes):
+    return [
+        outcome.args[0] if isinstance(outcome, err.MySQLError) else [result.rows for result in outcome]
+        for outcome in outcomes
+    ]
+
+
+MIXED_SUMMARY = [[((0,),)], 1146, [((10,),), ((11,),), None], 1146, [((4,),)]]
+
+
+@pytest.mark.parametrize('pipeline_window', [None, 32], ids=['one-batch', 'batches'])
+def test_query_pipeline_returns_errors_in_place(pipeline_window):
+    conn, server = connect(mixed_response)
+    if pipeline_window:
+        conn.pipeline_window = pipeline_window
+    try:
+        assert summarize(conn.query_pipeline(MIXED_QUERIES)) == MIXED_SUMMARY
+    finally:
+        server.close()
+
+
+def test_execute_pipeline_raises_first_error_with_pipeline_index():
+    conn, server = connect(mixed_response)
+    try:
+        cursor = conn.cursor()
+        with pytest.raises(err.ProgrammingError) as excinfo:
+            cursor.execute_pipeline(MIXED_QUERIES)
+        assert excinfo.value.args[0] == 1146
+        assert excinfo.value.pipeline_index == 1
+        # 오류 뒤의 결과까지 모두 읽었으므로 연결을 그대로 쓸 수 있음
+        assert len(server.commands) == len(MIXED_QUERIES)
+        cursor.execute_pipeline(['SELECT 5', 'CALL p()'])
+        sets = [tuple(cursor.fetchall())]
+        while cursor.nextset():
+            sets.append(tuple(cursor.fetchall()))
+        assert sets == [((5,),), ((10,),), ((11,),), ()]
+    finally:
+        server.close()
+
+
+def test_pipeline_errors_async():
+    async def run():
+        conn, server = await connect_async(mixed_response)
+        try:
+            outcomes = summarize(await conn.query_pipeline(MIXED_QUERIES))
+            async with conn.cursor() as cursor:
+                with pytest.raises(err.ProgrammingError) as excinfo:
+                    await cursor.execute_pipeline(MIXED_QUERIES[2:])
+                await cursor.execute_pipeline(['SELECT 6'])
+                return outcomes, excinfo.value.pipeline_index, await cursor.fetchall()
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == (MIXED_SUMMARY, 1, ((6,),))
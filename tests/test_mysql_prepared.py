@@ -0,0 +1,130 @@
+"""서버 측 prepared statement(PreparedCursor) 테스트"""
+import asyncio
+import datetime
+import struct
+
+import pytest
+from mysql_fixtures import binary_row, column_definition
+from mysql_server import OK_PACKET, connect, connect_async, response, result_payloads
+
+from pymysql import aio, cursors
+from pymysql.constants import COMMAND, FIELD_TYPE, FLAG
+
+# (struct 포맷, 타입, flags): 부호 없는 정수/실수와 날짜/시간 컬럼
+COLUMNS = [
+    ('Q', FIELD_TYPE.LONGLONG, FLAG.UNSIGNED),
+    ('I', FIELD_TYPE.LONG, FLAG.UNSIGNED),
+    ('d', FIELD_TYPE.DOUBLE, FLAG.UNSIGNED),
+    (None, FIELD_TYPE.DATETIME, 0),
+    (None, FIELD_TYPE.DATE, 0),
+    (None, FIELD_TYPE.TIME, 0),
+    (None, FIELD_TYPE.VAR_STRING, 0),
+]
+ROW = (
+    2**64 - 1,
+    4_000_000_000,
+    0.5,
+    struct.pack('<BHBBBBBI', 11, 2024, 5, 6, 7, 8, 9, 123456),
+    struct.pack('<BHBB', 4, 2024, 5, 6),
+    struct.pack('<BBIBBB', 8, 1, 0, 1, 30, 0),
+    None,
+)
+EXPECTED = (
+    2**64 - 1,
+    4_000_000_000,
+    0.5,
+    datetime.datetime(2024, 5, 6, 7, 8, 9, 123456),
+    datetime.date(2024, 5, 6),
+    -datetime.timedelta(hours=1, minutes=30),
+    None,
+)
+
+
+class PreparingServer:
+    """COM_STMT_PREPARE/EXECUTE/CLOSE에 답하고 받은 명령을 기록하는 가짜 서버의 응답 함수"""
+
+    def __init__(self, deprecate_eof):
+        self.deprecate_eof = deprecate_eof
+        self.prepared = {}
+        self.closed = []
+        self.executed = []
+
+    def definitions(self):
+        return [column_definition(i, type_code, flags) for i, (_, type_code, flags) in enumerate(COLUMNS)]
+
+    def __call__(self, command, payload):
+        if command == COMMAND.COM_STMT_PREPARE:
+            statement_id = len(self.prepared) + 1
+            self.prepared[statement_id] = payload
+            params = payload.count(b'?')
+            packets = [b'\x00' + struct.pack('<IHHxH', statement_id, len(COLUMNS), params, 0)]
+            for definitions in ([column_definition(i, FIELD_TYPE.VAR_STRING) for i in range(params)], self.definitions()):
+                if definitions:
+                    packets += definitions
+                    if not self.deprecate_eof:
+                        packets.append(b'\xfe\x00\x00\x02\x00')
+            return response(packets)
+        if command == COMMAND.COM_STMT_EXECUTE:
+            self.executed.append(payload)
+            return response(result_payloads(
+                self.definitions(), [binary_row([fmt for fmt, _, _ in COLUMNS], ROW)], self.deprecate_eof
+            ))
+        if command == COMMAND.COM_STMT_CLOSE:
+            self.closed.append(struct.unpack('<I', payload)[0])
+            return b''
+        return response([OK_PACKET])
+
+
+@pytest.mark.parametrize('deprecate_eof', [False, True], ids=['eof', 'ok'])
+def test_prepared_statement_round_trip(deprecate_eof):
+    server = PreparingServer(deprecate_eof)
+    conn, fake = connect(server, deprecate_eof=deprecate_eof, cursorclass=cursors.PreparedCursor)
+    try:
+        cursor = conn.cursor()
+        assert cursor.execute('SELECT * FROM t WHERE id = %s AND name = %s', (2**63, 'x')) == 1
+        assert cursor.fetchall() == (EXPECTED,)
+        assert cursor.execute('SELECT * FROM t WHERE id = %s AND name = %s', (None, 'y')) == 1
+        assert cursor.fetchall() == (EXPECTED,)
+    finally:
+        fake.close()
+
+    # 두 번째 실행은 준비된 statement를 재사용
+    assert list(server.prepared.values()) == [b'SELECT * FROM t WHERE id = ? AND name = ?']
+    first, second = server.executed
+    statement_id, _, _, null_bitmap, bound = struct.unpack_from('<IBIBB', first)
+    assert (statement_id, null_bitmap, bound) == (1, 0, 1)
+    # BIGINT UNSIGNED 파라미터는 unsigned flag(0x80)와 함께 보냄
+    assert first[11:15] == bytes((FIELD_TYPE.LONGLONG, 0x80, FIELD_TYPE.VAR_STRING, 0))
+    assert first[15:] == struct.pack('<Q', 2**63) + b'\x01x'
+    assert struct.unpack_from('<IBIB', second)[3] == 0b01
+
+
+def test_least_recently_used_statement_is_closed():
+    server = PreparingServer(False)
+    conn, fake = connect(server, cursorclass=cursors.PreparedCursor, prepared_statement_cache_size=2)
+    try:
+        cursor = conn.cursor()
+        for sql in ('SELECT %s', 'SELECT %s, 1', 'SELECT %s', 'SELECT %s, 2'):
+            cursor.execute(sql, (1,))
+            cursor.fetchall()
+    finally:
+        fake.close()
+
+    assert list(server.prepared.values()) == [b'SELECT ?', b'SELECT ?, 1', b'SELECT ?, 2']
+    assert server.closed == [2]
+    assert list(conn._prepared_statements) == [b'SELECT ?', b'SELECT ?, 2']
+
+
+@pytest.mark.parametrize('deprecate_eof', [False, True], ids=['eof', 'ok'])
+def test_prepared_statement_round_trip_async(deprecate_eof):
+    async def run():
+        server = PreparingServer(deprecate_eof)
+        conn, fake = await connect_async(server, deprecate_eof=deprecate_eof, cursorclass=aio.AsyncPreparedCursor)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute('SELECT * FROM t WHERE id = %s', (7,))
+                return await cursor.fetchall()
+        finally:
+            fake.close()
+
+    assert asyncio.run(run()) == (EXPECTED,)
@@ -0,0 +1,84 @@
+"""Connection 수신 버퍼(recv_into, 재사용 bytearray) 테스트"""
+import socket
+import time
+
+import pytest
+from mysql_fixtures import column_definition, lenenc
+from mysql_server import FakeServer, connect, response, result_payloads
+
+from pymysql import cursors, err
+from pymysql.connections import RECV_BUFFER_SIZE
+from pymysql.constants import CR, FIELD_TYPE
+
+DEFINITIONS = [column_definition(0, FIELD_TYPE.LONGLONG), column_definition(1, FIELD_TYPE.VAR_STRING, charset=45)]
+BIG_VALUE = 'b' * 300_000
+SMALL_ROWS = 6000
+
+
+def respond(command, sql):
+    if sql == b'SELECT big':
+        return response(result_payloads(DEFINITIONS, [lenenc(b'1') + lenenc(BIG_VALUE.encode())]))
+    rows = [lenenc(b'%d' % i) + lenenc(b's' * 100) for i in range(SMALL_ROWS)]
+    return response(result_payloads(DEFINITIONS, rows))
+
+
+class TricklingServer(FakeServer):
+    """패킷 헤더와 payload가 여러 recv에 걸치도록 응답을 7바이트씩 끊어 보내는 서버"""
+
+    def send(self, data):
+        for start in range(0, len(data), 7):
+            self.sock.sendall(data[start:start + 7])
+            if start % 700 == 0:
+                time.sleep(0.0005)
+
+
+class HangUpServer(FakeServer):
+    """응답을 절반만 보내고 연결을 끊는 서버"""
+
+    def send(self, data):
+        self.sock.sendall(data[:len(data) // 2])
+        self.sock.shutdown(socket.SHUT_WR)
+
+
+def test_buffer_grows_for_large_packet_and_shrinks_back():
+    conn, server = connect(respond)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT big')
+        assert cursor.fetchall() == ((1, BIG_VALUE),)
+        assert len(conn._recv_view) > RECV_BUFFER_SIZE
+
+        # 커진 버퍼보다 많은 작은 패킷을 읽으면 기본 크기로 돌아옴
+        cursor.execute('SELECT small')
+        rows = cursor.fetchall()
+        assert len(rows) == SMALL_ROWS
+        assert rows[-1] == (SMALL_ROWS - 1, 's' * 100)
+        assert len(conn._recv_view) == RECV_BUFFER_SIZE
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize('cursorclass', [cursors.Cursor, cursors.SSCursor], ids=['buffered', 'unbuffered'])
+def test_packets_split_across_recv_calls(cursorclass):
+    conn, server = connect(respond, server_class=TricklingServer)
+    try:
+        cursor = conn.cursor(cursorclass)
+        cursor.execute('SELECT big')
+        assert tuple(cursor.fetchall()) == ((1, BIG_VALUE),)
+        cursor.execute('SELECT small')
+        rows = tuple(cursor.fetchall())
+        assert len(rows) == SMALL_ROWS
+        assert rows[0] == (0, 's' * 100)
+    finally:
+        server.close()
+
+
+def test_connection_lost_mid_packet():
+    conn, server = connect(respond, server_class=HangUpServer)
+    try:
+        with pytest.raises(err.OperationalError) as excinfo:
+            conn.cursor().execute('SELECT big')
+    finally:
+        server.close()
+    assert excinfo.value.args[0] == CR.CR_SERVER_LOST
+    assert conn._sock is None
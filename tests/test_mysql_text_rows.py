@@ -0,0 +1,92 @@
+"""텍스트 프로토콜 행 디코더(결과 집합별 생성 디코더) 테스트"""
+import datetime
+from decimal import Decimal
+
+import pytest
+from mysql_fixtures import PacketSource, column_definition, lenenc, result_payloads
+
+from pymysql import converters
+from pymysql.connections import MySQLResult
+from pymysql.constants import FIELD_TYPE
+from pymysql.protocol import text_row_decoder
+
+
+def text_row(values):
+    return b''.join(b'\xfb' if v is None else lenenc(v) for v in values)
+
+
+def decode(columns, rows, decoders=None):
+    definitions = [column_definition(i, type_code, charset=charset) for i, (type_code, charset) in enumerate(columns)]
+    source = PacketSource(result_payloads(definitions, rows))
+    if decoders is not None:
+        source.decoders = decoders
+    result = MySQLResult(source)
+    result.read()
+    return result.rows
+
+
+COLUMNS = [
+    (FIELD_TYPE.LONGLONG, 63),
+    (FIELD_TYPE.VAR_STRING, 45),
+    (FIELD_TYPE.BLOB, 63),
+    (FIELD_TYPE.DOUBLE, 63),
+    (FIELD_TYPE.DATETIME, 63),
+    (FIELD_TYPE.NEWDECIMAL, 63),
+]
+
+
+def test_values_and_nulls():
+    rows = [
+        text_row([b'1', '가나다'.encode(), b'\x00\xff', b'0.5', b'2024-05-06 07:08:09', b'1.25']),
+        text_row([None, None, None, None, None, None]),
+    ]
+    assert decode(COLUMNS, rows) == (
+        (1, '가나다', b'\x00\xff', 0.5, datetime.datetime(2024, 5, 6, 7, 8, 9), Decimal('1.25')),
+        (None,) * 6,
+    )
+
+
+@pytest.mark.parametrize('size', [251, 65_535, 65_536, 70_000], ids=['0xfc', '0xfc-max', '0xfd', '0xfd-70k'])
+def test_long_length_prefixes(size):
+    text, blob = 'x' * size, bytes(range(256)) * (size // 256) + b'y' * (size % 256)
+    assert decode(COLUMNS[1:3], [text_row([text.encode(), blob]), text_row([b'short', None])]) == (
+        (text, blob),
+        ('short', None),
+    )
+
+
+def test_short_row_falls_back_to_present_columns():
+    # 컬럼이 부족한 행은 있는 컬럼만 담긴 tuple로 읽음 (PyMySQL/PyMySQL#434)
+    rows = [text_row([b'1', b'a']), text_row([b'2'])]
+    assert decode(COLUMNS[:3], rows) == ((1, 'a'), (2,))
+
+
+def test_custom_converter():
+    decoders = dict(converters.decoders)
+    decoders[FIELD_TYPE.LONGLONG] = lambda value: ('id', value)
+    assert decode(COLUMNS[:2], [text_row([b'7', b'z'])], decoders) == ((('id', '7'), 'z'),)
+
+
+class Unhashable:
+    """__eq__만 정의해 해시할 수 없는 converter"""
+
+    def __eq__(self, other):
+        return isinstance(other, Unhashable)
+
+    def __call__(self, value):
+        return value.upper()
+
+
+def test_unhashable_converter_is_compiled_without_cache():
+    shape = [('utf8', Unhashable()), (None, None)]
+    decoder = text_row_decoder(shape)
+    assert decoder(memoryview(text_row([b'ab', b'cd']))) == ('AB', b'cd')
+    assert text_row_decoder(shape) is not decoder
+
+
+def test_decoders_are_shared_per_column_shape():
+    shape = [('ascii', int), ('utf8', None)]
+    assert text_row_decoder(shape) is text_row_decoder(list(shape))
+    assert text_row_decoder(shape)(text_row([b'12', b'ok'])) == (12, 'ok')
+    with pytest.raises(IndexError):
+        text_row_decoder(shape)(text_row([b'12']))
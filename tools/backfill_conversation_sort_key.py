@@ -0,0 +1,150 @@
+"""Conversation 테이블에 시간순 sort_key와 GSI를 추가하고 기존 항목을 채웁니다.
+
+    python tools/backfill_conversation_sort_key.py [--segments 4] [--dry-run]
+
+1. thread_id-sort_key-index GSI가 없으면 생성합니다 (sort_key가 있는 항목만 인덱싱됨).
+2. sort_key가 없는 Conversation 항목에 sort_key를 기록하고 created_at을 epoch 초 정수로 통일합니다.
+3. ISO 문자열로 저장된 Thread.created_at을 epoch 초 정수로 바꿉니다.
+
+get_message_list는 이 인덱스를 읽으므로 새 코드를 배포하기 전에 백필을 완료해야 합니다.
+여러 번 실행해도 안전합니다.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from message_codec import make_sort_key, CONVERSATION_SORT_INDEX  # noqa: E402
+
+dynamodb = boto3.resource('dynamodb')
+
+
+def to_epoch_seconds(value):
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+    return int(value)
+
+
+def ensure_sort_index(table_name):
+    client = dynamodb.meta.client
+    description = client.describe_table(TableName=table_name)['Table']
+    if any(index['IndexName'] == CONVERSATION_SORT_INDEX for index in description.get('GlobalSecondaryIndexes', [])):
+        return
+
+    index = {
+        'IndexName': CONVERSATION_SORT_INDEX,
+        'KeySchema': [
+            {'AttributeName': 'thread_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'sort_key', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {
+            'ProjectionType': 'INCLUDE',
+            'NonKeyAttributes': ['role', 'content', 'content_z', 'content_format', 'created_at', 'assistant_id']
+        }
+    }
+    if description.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        throughput = description['ProvisionedThroughput']
+        index['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+            'WriteCapacityUnits': throughput['WriteCapacityUnits']
+        }
+
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': 'thread_id', 'AttributeType': 'S'},
+            {'AttributeName': 'sort_key', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexUpdates=[{'Create': index}]
+    )
+    print(f"Creating {CONVERSATION_SORT_INDEX} on {table_name}")
+
+
+def scan_segment(table, segment, total_segments, filter_expression, projection, attribute_names=None):
+    scan_params = {
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'FilterExpression': filter_expression,
+        'ProjectionExpression': projection
+    }
+    if attribute_names:
+        scan_params['ExpressionAttributeNames'] = attribute_names
+    while True:
+        response = table.scan(**scan_params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def backfill_conversation_segment(table, segment, total_segments, dry_run):
+    updated = 0
+    for item in scan_segment(table, segment, total_segments, Attr('sort_key').not_exists(),
+                             'thread_id, message_id, created_at, #role', {'#role': 'role'}):
+        created_at = to_epoch_seconds(item['created_at'])
+        if not dry_run:
+            try:
+                table.update_item(
+                    Key={'thread_id': item['thread_id'], 'message_id': item['message_id']},
+                    UpdateExpression='SET sort_key = :sort_key, created_at = :created_at',
+                    ConditionExpression='attribute_exists(message_id) AND attribute_not_exists(sort_key)',
+                    ExpressionAttributeValues={
+                        ':sort_key': make_sort_key(created_at, item['message_id'], item['role']),
+                        ':created_at': created_at
+                    }
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+        updated += 1
+    return updated
+
+
+def backfill_thread_segment(table, segment, total_segments, dry_run):
+    updated = 0
+    for item in scan_segment(table, segment, total_segments, Attr('created_at').attribute_type('S'),
+                             'thread_id, created_at'):
+        if not dry_run:
+            table.update_item(
+                Key={'thread_id': item['thread_id']},
+                UpdateExpression='SET created_at = :created_at',
+                ExpressionAttributeValues={':created_at': to_epoch_seconds(item['created_at'])}
+            )
+        updated += 1
+    return updated
+
+
+def run_segments(function, table, total_segments, dry_run):
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        futures = [executor.submit(function, table, segment, total_segments, dry_run) for segment in range(total_segments)]
+        return sum(future.result() for future in futures)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--conversation-table', default='Conversation')
+    parser.add_argument('--thread-table', default='Thread')
+    parser.add_argument('--segments', type=int, default=4, help='병렬 스캔 세그먼트 수')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        ensure_sort_index(args.conversation_table)
+
+    conversations = run_segments(backfill_conversation_segment, dynamodb.Table(args.conversation_table),
+                                 args.segments, args.dry_run)
+    threads = run_segments(backfill_thread_segment, dynamodb.Table(args.thread_table),
+                           args.segments, args.dry_run)
+    print(f"Conversation items {'to update' if args.dry_run else 'updated'}: {conversations}")
+    print(f"Thread items {'to update' if args.dry_run else 'updated'}: {threads}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Thread 테이블에 사용자별 thread 목록용 GSI(user_id, last_activity)를 추가합니다.
+
+    python tools/create_thread_user_index.py [--table Thread]
+
+user_id가 없는 이전 thread는 인덱스에 포함되지 않습니다.
+"""
+import argparse
+import boto3
+
+INDEX_NAME = 'user_id-last_activity-index'
+
+# list_threads 응답에 필요한 집계 속성만 인덱스에 복제
+PROJECTED_ATTRIBUTES = [
+    'assistant_id', 'created_at', 'message_count', 'last_message_preview', 'last_message_role'
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--table', default='Thread')
+    args = parser.parse_args()
+
+    client = boto3.client('dynamodb')
+    description = client.describe_table(TableName=args.table)['Table']
+    if any(index['IndexName'] == INDEX_NAME for index in description.get('GlobalSecondaryIndexes', [])):
+        print(f"{INDEX_NAME} already exists on {args.table}")
+        return
+
+    index = {
+        'IndexName': INDEX_NAME,
+        'KeySchema': [
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'last_activity', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': PROJECTED_ATTRIBUTES}
+    }
+    # 프로비저닝 모드 테이블은 인덱스 처리량도 지정해야 함
+    if description.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        throughput = description['ProvisionedThroughput']
+        index['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+            'WriteCapacityUnits': throughput['WriteCapacityUnits']
+        }
+
+    client.update_table(
+        TableName=args.table,
+        AttributeDefinitions=[
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'last_activity', 'AttributeType': 'N'}
+        ],
+        GlobalSecondaryIndexUpdates=[{'Create': index}]
+    )
+    print(f"Creating {INDEX_NAME} on {args.table}")
+
+
+if __name__ == '__main__':
+    main()